@@ -1,5 +1,7 @@
-from .database import SessionLocal
-from typing import Generator
+from .database import (
+    SessionLocal, ReadSessionLocal, AsyncSessionLocal, AsyncReadSessionLocal, ThreadpoolSession,
+)
+from typing import AsyncGenerator, Generator
 
 
 def get_db() -> Generator:
@@ -7,4 +9,37 @@ def get_db() -> Generator:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db() -> Generator:
+    """Session on the read replica (DATABASE_READ_URL), or the primary when none is configured."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def _async_session(async_factory, sync_factory) -> AsyncGenerator:
+    if async_factory is not None:
+        async with async_factory() as db:
+            yield db
+        return
+    db = ThreadpoolSession(sync_factory())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def get_async_db() -> AsyncGenerator:
+    """AsyncSession on the async engine, or a threadpool-backed stand-in without one."""
+    async for db in _async_session(AsyncSessionLocal, SessionLocal):
+        yield db
+
+
+async def get_async_read_db() -> AsyncGenerator:
+    """get_async_db() on the read replica, when configured."""
+    async for db in _async_session(AsyncReadSessionLocal, ReadSessionLocal):
+        yield db
@@ -1,23 +1,60 @@
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from .database import engine
-from .models import Base
+from .database import engine, SessionLocal, async_engine, async_read_engine, db_pool_stats
 from .routers import lines, pads, stats, setup, stages, predict
+from .utils.prediction_log import start_prediction_writer, stop_prediction_writer, get_prediction_writer
+from .utils.rollup import install_stats_rollup
+from .utils.schema import ensure_schema
+from .utils.refcache import refcache
+from .utils.mix_batcher import start_mix_batcher, stop_mix_batcher, get_mix_batcher
+from .ml.pool import start_analysis_pool, stop_analysis_pool, get_analysis_pool
+from .ml.frame_cache import frame_cache
+from .ml.model import predict_mix_cache_stats
 
 # -----------------------------------------------------------------------------
-# Create tables (if not using Alembic for migrations)
+# Create tables (if not using Alembic for migrations) + missing indexes
 # -----------------------------------------------------------------------------
-Base.metadata.create_all(bind=engine)
+ensure_schema(engine)
+
+# -----------------------------------------------------------------------------
+# Startup / shutdown
+#   - optional write-behind Prediction log (PREDICTION_WRITE_BEHIND=1);
+#     flushed cleanly on shutdown
+#   - optional pad_status_counts rollup for /stats (STATS_ROLLUP=1)
+#   - warm the lines/belts/stages reference cache
+#   - process pool for image analysis (IMAGE_POOL=0 to run it in-thread)
+#   - optional micro-batcher for /predict/material_mix (MIX_BATCHER=1);
+#     drained before the prediction log is flushed
+# -----------------------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with SessionLocal() as db:
+        refcache.load(db)
+    install_stats_rollup(engine)
+    start_prediction_writer(engine)
+    start_analysis_pool()
+    start_mix_batcher(engine)
+    try:
+        yield
+    finally:
+        await stop_mix_batcher()
+        stop_analysis_pool()
+        stop_prediction_writer()
+        if async_engine is not None:
+            await async_engine.dispose()
+        if async_read_engine is not None and async_read_engine is not async_engine:
+            await async_read_engine.dispose()
 
 # -----------------------------------------------------------------------------
 # App init
 # -----------------------------------------------------------------------------
-app = FastAPI(title="Rail QMS PoC", version="0.1.0")
+app = FastAPI(title="Rail QMS PoC", version="0.1.0", lifespan=lifespan)
 
 # -----------------------------------------------------------------------------
 # CORS (allow local dev UIs on 5173 React and 5174 Vue)
@@ -69,4 +106,20 @@ def root():
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/metrics")
+def metrics():
+    """In-process counters (queue depths, flush latency, ...) as JSON."""
+    writer = get_prediction_writer()
+    pool = get_analysis_pool()
+    batcher = get_mix_batcher()
+    return {
+        "prediction_writer": writer.stats() if writer else {"enabled": False},
+        "image_pool": pool.stats() if pool else {"enabled": False},
+        "frame_cache": frame_cache.stats() if frame_cache else {"enabled": False},
+        "mix_cache": predict_mix_cache_stats(),
+        "mix_batcher": batcher.stats() if batcher else {"enabled": False},
+        "refcache": refcache.stats(),
+        "db_pools": db_pool_stats(),
+    }
\ No newline at end of file
@@ -1,25 +1,488 @@
-import base64, io, random
-from PIL import Image, ImageFilter, ImageOps
+import base64, binascii, io, os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+from ..utils.memory import reset_peak_rss, peak_rss_mb
 
 DEFECTS = ["CRACK", "INCLUSION", "BURN_MARK", "CHIP", "SURFACE_POROSITY"]
-MODEL_VERSION = "image-heuristic-0.1"
-
-def analyze_image(image_b64: str | None, brakepad_id: str | None):
-    # If image is provided, derive simple features (contrast/edges).
-    score = 0.8
-    picked = []
-    if image_b64:
-        img = Image.open(io.BytesIO(base64.b64decode(image_b64.split(",")[-1]))).convert("L")
-        edges = img.filter(ImageFilter.FIND_EDGES)
-        contrast = ImageOps.autocontrast(img)
-        # heuristic: high edges variance → crack/chip; low contrast → burn mark.
-        # # (In practice, replace with proper CNN)
-        w, h = img.size
-        if w * h > 0:
-            picked = random.sample(DEFECTS, k=random.randint(0, 2))
-            score = round(random.uniform(0.55, 0.95), 3)
+MODEL_VERSION = "image-detectors-0.2"
+
+# ---------------------------------------------------------------------
+# Decode limits (checked from the header, before any pixel is decoded)
+#   IMAGE_MAX_BYTES       encoded payload size
+#   IMAGE_MAX_PIXELS      width * height as declared by the header
+#   IMAGE_ANALYSIS_SIDE   longest side the features are computed at
+# ---------------------------------------------------------------------
+MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(20 * 1024 * 1024)))
+MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(50_000_000)))
+ANALYSIS_SIDE = int(os.getenv("IMAGE_ANALYSIS_SIDE", "640"))
+ALLOWED_FORMATS = {"PNG", "JPEG", "WEBP", "BMP", "TIFF"}
+
+
+class ImageRejected(ValueError):
+    """Payload is not an acceptable image (bad encoding, unknown format)."""
+
+
+class ImageTooLarge(ImageRejected):
+    """Payload or declared dimensions exceed IMAGE_MAX_BYTES / IMAGE_MAX_PIXELS."""
+
+
+def image_bytes(image: str | bytes) -> bytes:
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        data = image if isinstance(image, bytes) else bytes(image)
+        if len(data) > MAX_BYTES:
+            raise ImageTooLarge(f"image is {len(data)} bytes (limit {MAX_BYTES})")
+        return data
+    b64 = image.split(",")[-1]  # tolerate data: URLs
+    # reject on the encoded length, before allocating the decoded copy
+    if len(b64) * 3 // 4 > MAX_BYTES:
+        raise ImageTooLarge(f"image is ~{len(b64) * 3 // 4} bytes (limit {MAX_BYTES})")
+    try:
+        return base64.b64decode(b64, validate=False)
+    except (binascii.Error, ValueError) as e:
+        raise ImageRejected(f"invalid base64 image: {e}")
+
+
+def decode_image(image: str | bytes, max_side: int = ANALYSIS_SIDE,
+                 max_pixels: int = MAX_PIXELS) -> tuple[np.ndarray, float]:
+    """
+    Bytes or base64 -> (uint8 grayscale array whose longest side is <= max_side,
+    scale from array to original pixel coordinates).
+    Format and dimensions are checked from the header first. JPEG is decoded
+    directly at a reduced DCT scale (draft), so no full-size copy is made;
+    other formats are decoded at full size by reduce() (transient), then
+    box-reduced before the grayscale conversion. At full size (max_side=0)
+    the grayscale array is filled band by band from the decoded frame, so
+    the only full-size copies are the decode itself and the result.
+    """
+    data = image_bytes(image)
+    try:
+        img = Image.open(io.BytesIO(data))  # lazy: reads the header only
+    except Exception:
+        raise ImageRejected("unreadable image (unknown or corrupt format)")
+    if img.format not in ALLOWED_FORMATS:
+        raise ImageRejected(f"unsupported image format: {img.format}")
+    orig_w, orig_h = img.size
+    if orig_w <= 0 or orig_h <= 0:
+        raise ImageRejected("empty image")
+    if orig_w * orig_h > max_pixels:
+        raise ImageTooLarge(f"image is {orig_w}x{orig_h} (limit {max_pixels} pixels)")
+
+    w, h = orig_w, orig_h
+    if max_side > 0 and max(w, h) > max_side:
+        if img.format == "JPEG":
+            img.draft("L", (max(1, w * max_side // max(w, h)), max(1, h * max_side // max(w, h))))
+            w, h = img.size  # after draft: the reduced DCT scale
+        factor = -(-max(w, h) // max_side)  # ceil
+        if factor > 1:
+            img = img.reduce(factor)
+    if img.mode != "L" and (w, h) == (orig_w, orig_h):
+        return _gray_in_bands(img), 1.0
+    if img.mode != "L":
+        img = img.convert("L")
+    gray = np.asarray(img, dtype=np.uint8)
+    return gray, orig_w / gray.shape[1]
+
+
+def _gray_in_bands(img: Image.Image, band: int = 256) -> np.ndarray:
+    """Full-size grayscale array, converting `band` rows at a time (no full-size "L" image)."""
+    w, h = img.size
+    img.load()
+    gray = np.empty((h, w), dtype=np.uint8)
+    for y in range(0, h, band):
+        gray[y:y + band] = np.asarray(img.crop((0, y, w, min(y + band, h))).convert("L"))
+    return gray
+
+
+# ---------------------------------------------------------------------
+# Detectors: plain NumPy on the decoded grayscale array, no randomness.
+# Thresholds are gray-level deltas against the pad's own level and were
+# tuned on the synthetic renderer (utils/images._draw_defect): pad ~150
+# (transit) / ~130 (freight) on a ~246 background; crack ~75, chip ~79,
+# contamination ~60, surface pits ~120, glaze outline ~205.
+# Check changes with:  python -m bench.bench_cv_defects
+# ---------------------------------------------------------------------
+
+# where each defect usually comes from; the strongest finding wins
+STAGE_FOR_DEFECT = {
+    "CRACK": "Curing",
+    "CHIP": "Grinding",
+    "BURN_MARK": "Grinding",
+    "SURFACE_POROSITY": "Molding",
+    "INCLUSION": "Mixing",
+}
+
+CRACK_DELTA = 35         # crack must be this much darker than pixels 3px above and below
+CRACK_COVERAGE = 0.5     # ... over at least this fraction of the pad's width
+SOLID_DELTA = 45         # chips / inclusions: solid regions this much darker than the pad
+INCLUSION_MAX_GRAY = 68  # solid regions darker than this are foreign material, not chips
+PIT_DELTA = 6            # pits: darker than the local 15x15 mean by this much
+PIT_MAX_SIDE = 8         # ... and no larger than this (px at analysis resolution)
+PIT_MIN_COUNT = 8
+BURN_DELTA = 30          # glaze/burn: brighter than the pad by this much
+BURN_MIN_PIXELS = 160     # ... over at least this many pixels
+
+# tiled mode (large frames analysed at full resolution, tile by tile)
+# The frame itself is decoded whole (PNG can't be decoded in bands), as the
+# downscaling path does for non-JPEG frames too; the grayscale array is then
+# filled band by band. About 4 bytes per pixel at peak (RGB decode + the
+# grayscale array). Only the detectors' working arrays are bounded by the
+# tile size. The default cap is IMAGE_MAX_PIXELS; lower it to bound the
+# per-request memory of tiled analysis.
+TILED_MAX_PIXELS = int(os.getenv("IMAGE_TILED_MAX_PIXELS", str(MAX_PIXELS)))
+TILE_SIZE = int(os.getenv("IMAGE_TILE_SIZE", "512"))
+TILE_OVERLAP = int(os.getenv("IMAGE_TILE_OVERLAP", "64"))   # >= half the largest defect
+TILE_WORKERS = int(os.getenv("IMAGE_TILE_WORKERS", "1"))    # threads per image
+
+
+def _box_sum(a: np.ndarray, r: int) -> np.ndarray:
+    """Sum over the (2r+1)^2 window around each pixel (clipped at the borders), via cumsums."""
+    out = a.astype(np.int32)
+    for axis in (0, 1):
+        c = np.cumsum(out, axis=axis)
+        n = out.shape[axis]
+        hi = np.minimum(np.arange(n) + r, n - 1)
+        lo = np.arange(n) - r - 1
+        upper = np.take(c, hi, axis=axis)
+        lower = np.where(
+            (lo >= 0).reshape((-1, 1) if axis == 0 else (1, -1)),
+            np.take(c, np.maximum(lo, 0), axis=axis), 0)
+        out = upper - lower
+    return out
+
+
+def _erode(mask: np.ndarray, r: int) -> np.ndarray:
+    return _box_sum(mask, r) == _box_sum(np.ones_like(mask), r)
+
+
+def _label(mask: np.ndarray) -> tuple[np.ndarray, int]:
+    """
+    4-connected component labels (-1 = background), by min-label propagation
+    with pointer jumping: converges in O(log diameter) whole-array passes.
+    """
+    h, w = mask.shape
+    big = h * w
+    lab = np.where(mask, np.arange(big, dtype=np.int64).reshape(h, w), big)
+    while True:
+        nxt = lab.copy()
+        np.minimum(nxt[1:, :], lab[:-1, :], out=nxt[1:, :])
+        np.minimum(nxt[:-1, :], lab[1:, :], out=nxt[:-1, :])
+        np.minimum(nxt[:, 1:], lab[:, :-1], out=nxt[:, 1:])
+        np.minimum(nxt[:, :-1], lab[:, 1:], out=nxt[:, :-1])
+        nxt[~mask] = big
+        flat = nxt.ravel()
+        fg = flat < big
+        for _ in range(2):
+            flat[fg] = flat[flat[fg]]
+        if np.array_equal(nxt, lab):
+            break
+        lab = nxt
+    out = np.full(big, -1, dtype=np.int64)
+    roots, ids = np.unique(lab.ravel()[mask.ravel()], return_inverse=True)
+    out[mask.ravel()] = ids
+    return out.reshape(h, w), len(roots)
+
+
+def _components(mask: np.ndarray, gray: np.ndarray) -> dict:
+    """Per-component area, mean gray, bbox (y0, x0, y1, x1 inclusive) and boundary length."""
+    lab, n = _label(mask)
+    if n == 0:
+        return {"n": 0}
+    ys, xs = np.nonzero(mask)
+    ids = lab[ys, xs]
+    area = np.bincount(ids, minlength=n)
+    mean = np.bincount(ids, weights=gray[ys, xs], minlength=n) / area
+    y0 = np.full(n, mask.shape[0]); x0 = np.full(n, mask.shape[1])
+    y1 = np.zeros(n, dtype=np.int64); x1 = np.zeros(n, dtype=np.int64)
+    np.minimum.at(y0, ids, ys); np.minimum.at(x0, ids, xs)
+    np.maximum.at(y1, ids, ys); np.maximum.at(x1, ids, xs)
+    interior = _erode(mask, 1)
+    perim = np.bincount(ids[~interior[ys, xs]], minlength=n)
+    return {"n": n, "area": area, "mean": mean, "y0": y0, "x0": x0, "y1": y1, "x1": x1, "perimeter": perim}
+
+
+def _otsu(hist: np.ndarray) -> int:
+    levels = np.arange(256)
+    w0 = np.cumsum(hist)
+    w1 = w0[-1] - w0
+    m0 = np.cumsum(hist * levels)
+    mu0 = m0 / np.maximum(w0, 1)
+    mu1 = (m0[-1] - m0) / np.maximum(w1, 1)
+    return int(np.argmax(w0 * w1 * (mu0 - mu1) ** 2))
+
+
+def _find_pad(gray: np.ndarray) -> tuple[tuple[int, int, int, int], int, int]:
+    """
+    Pad bbox (y0, x0, y1, x1), pad gray level and background level.
+    The pad is the darker Otsu class; rows/columns that are mostly pad bound it.
+    Close-up frames without visible background use the whole image.
+    """
+    hist = np.bincount(gray.ravel(), minlength=256)
+    t = _otsu(hist)
+    bg = int(np.argmax(hist[t + 1:])) + t + 1 if hist[t + 1:].any() else 255
+    material = gray <= t
+    rows = np.flatnonzero(material.mean(axis=1) > 0.5)
+    if rows.size:
+        cols = np.flatnonzero(material[rows[0]:rows[-1] + 1].mean(axis=0) > 0.5)
+    if not rows.size or not cols.size:
+        box = (0, 0, gray.shape[0] - 1, gray.shape[1] - 1)
+        bg = 255
+    else:
+        box = (int(rows[0]), int(cols[0]), int(rows[-1]), int(cols[-1]))
+    crop = gray[box[0]:box[2] + 1, box[1]:box[3] + 1]
+    pad_level = int(np.argmax(np.bincount(crop.ravel(), minlength=256)))
+    return box, pad_level, bg
+
+
+def _intersect(a, b):
+    """Intersection of two inclusive (y0, x0, y1, x1) boxes, or None."""
+    box = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    return box if box[0] <= box[2] and box[1] <= box[3] else None
+
+
+def _frame_context(gray: np.ndarray) -> dict:
+    """
+    Pad box, inner box (rounded corners / outline trimmed), pad level and
+    background, from the whole frame (subsampled past 1024px so large frames
+    cost no extra memory).
+    """
+    H, W = gray.shape
+    s = max(1, -(-max(H, W) // 1024))
+    (y0, x0, y1, x1), pad_level, bg = _find_pad(gray[::s, ::s])
+    box = (y0 * s, x0 * s, min(y1 * s + s - 1, H - 1), min(x1 * s + s - 1, W - 1))
+    my, mx = int((box[2] - box[0]) * 0.08), int((box[3] - box[1]) * 0.08)
+    inner = (box[0] + my, box[1] + mx, box[2] - my, box[3] - mx)
+    return {"box": box, "inner": inner, "pad_level": pad_level, "bg": bg}
+
+
+# ---------------------------------------------------------------------
+# Per-tile measurements. Each tile is analysed with `overlap` px of context
+# but only reports what lies in its own core, so overlapping tiles never
+# count anything twice; _decide() turns the summed measurements into
+# findings. Whole-frame analysis is the single-tile case.
+# ---------------------------------------------------------------------
+def _measure_tile(tile: np.ndarray, origin, core, ctx) -> dict:
+    oy, ox = origin
+    ext = (oy, ox, oy + tile.shape[0] - 1, ox + tile.shape[1] - 1)
+
+    def owned(ys, xs):
+        return (ys >= core[0]) & (ys <= core[2]) & (xs >= core[1]) & (xs <= core[3])
+
+    out = {"ridge_x": [], "ridge_y": [], "solid": [], "pits": [], "bright": 0, "bright_area": 0, "bright_box": None}
+    pad_level, bg = ctx["pad_level"], ctx["bg"]
+
+    box = _intersect(ctx["box"], ext)
+    if box is not None:
+        ly0, lx0, ly1, lx1 = box[0] - oy, box[1] - ox, box[2] - oy, box[3] - ox
+
+        # cracks: thin dark ridges (darker than both neighbours 3px up and down)
+        d = 3
+        g = tile.astype(np.int16)
+        ridge = np.zeros(tile.shape, dtype=bool)
+        if tile.shape[0] > 2 * d:
+            ridge[d:-d, :] = (((g[:-2 * d, :] - g[d:-d, :]) >= CRACK_DELTA)
+                              & ((g[2 * d:, :] - g[d:-d, :]) >= CRACK_DELTA))
+        ridge = ridge[ly0:ly1 + 1, lx0:lx1 + 1]
+        if ridge.any():
+            # straight full-width rows are backplate/slot lines, not cracks
+            structural = ridge.mean(axis=1) >= 0.7
+            structural = structural | np.r_[structural[1:], False] | np.r_[False, structural[:-1]]
+            ridge[structural] = False
+            ys, xs = np.nonzero(ridge)
+            ys, xs = ys + box[0], xs + box[1]
+            keep = owned(ys, xs)
+            out["ridge_x"], out["ridge_y"] = xs[keep], ys[keep]
+
+        # chips / inclusions: solid dark regions that survive a 7x7 erosion
+        crop = tile[ly0:ly1 + 1, lx0:lx1 + 1]
+        comps = _components(_erode(crop <= pad_level - SOLID_DELTA, 3), crop)
+        for i in range(comps["n"]):
+            if comps["area"][i] < 12:
+                continue
+            cy0, cx0 = comps["y0"][i] + box[0], comps["x0"][i] + box[1]
+            cy1, cx1 = comps["y1"][i] + box[0], comps["x1"][i] + box[1]
+            if owned(np.array([(cy0 + cy1) // 2]), np.array([(cx0 + cx1) // 2]))[0]:
+                out["solid"].append((int(cy0), int(cx0), int(cy1), int(cx1),
+                                     int(comps["area"][i]), float(comps["mean"][i])))
+
+    inner = _intersect(ctx["inner"], ext)
+    if inner is not None:
+        ly0, lx0, ly1, lx1 = inner[0] - oy, inner[1] - ox, inner[2] - oy, inner[3] - ox
+        crop = tile[ly0:ly1 + 1, lx0:lx1 + 1]
+
+        # porosity: small isolated blobs darker than the local 15x15 mean
+        r = 7
+        local = _box_sum(crop, r) / _box_sum(np.ones_like(crop), r)
+        dark = crop < local - PIT_DELTA
+        # keep only blobs with nothing else dark on the ring PIT_MAX_SIDE px out;
+        # lines and large regions drop here, so labelling only sees small blobs
+        ring = _box_sum(dark, PIT_MAX_SIDE) - _box_sum(dark, PIT_MAX_SIDE - 1)
+        comps = _components(dark & (ring == 0), crop)
+        if comps["n"]:
+            h = comps["y1"] - comps["y0"] + 1
+            w = comps["x1"] - comps["x0"] + 1
+            pits = (comps["area"] >= 2) & (h <= PIT_MAX_SIDE) & (w <= PIT_MAX_SIDE)
+            py0, px0 = comps["y0"][pits] + inner[0], comps["x0"][pits] + inner[1]
+            py1, px1 = comps["y1"][pits] + inner[0], comps["x1"][pits] + inner[1]
+            keep = owned((py0 + py1) // 2, (px0 + px1) // 2)
+            out["pits"] = list(zip(py0[keep].tolist(), px0[keep].tolist(), py1[keep].tolist(), px1[keep].tolist()))
+
+        # burn / glaze: pixels well above the pad level (but not background)
+        own = _intersect(inner, core)
+        if own is not None:
+            oy0, ox0, oy1, ox1 = own[0] - oy, own[1] - ox, own[2] - oy, own[3] - ox
+            sub = tile[oy0:oy1 + 1, ox0:ox1 + 1]
+            bright = (sub >= pad_level + BURN_DELTA) & (sub < bg - 20)
+            out["bright_area"] = int(sub.size)
+            n = int(bright.sum())
+            if n:
+                ys, xs = np.nonzero(bright)
+                out["bright"] = n
+                out["bright_box"] = (int(ys.min()) + own[0], int(xs.min()) + own[1],
+                                     int(ys.max()) + own[0], int(xs.max()) + own[1])
+    return out
+
+
+def _union(boxes):
+    boxes = [b for b in boxes if b is not None]
+    if not boxes:
+        return None
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def _finding(defect: str, confidence: float, box) -> dict:
+    y0, x0, y1, x1 = (int(v) for v in box)
+    return {"defect": defect, "confidence": round(float(min(1.0, max(0.0, confidence))), 3),
+            "bbox": [x0, y0, x1 + 1, y1 + 1]}
+
+
+def _decide(parts: list[dict], ctx: dict) -> list[dict]:
+    """Pad-level findings from the tiles' measurements."""
+    findings = []
+    y0, x0, y1, x1 = ctx["box"]
+
+    # CRACK: ridges covering enough of the pad's width
+    xs = np.concatenate([np.asarray(p["ridge_x"], dtype=np.int64) for p in parts])
+    if xs.size:
+        ys = np.concatenate([np.asarray(p["ridge_y"], dtype=np.int64) for p in parts])
+        coverage = np.unique(xs).size / (x1 - x0 + 1)
+        if coverage >= CRACK_COVERAGE:
+            ylo, yhi = np.percentile(ys, [1, 99])
+            findings.append(_finding("CRACK", 0.5 + (coverage - CRACK_COVERAGE), (ylo, xs.min(), yhi, xs.max())))
+
+    # INCLUSION: very dark solid regions; CHIP: irregular (low fill) solid regions on the pad's edge
+    edge = 0.12 * min(y1 - y0 + 1, x1 - x0 + 1)
+    for cy0, cx0, cy1, cx1, area, mean in (c for p in parts for c in p["solid"]):
+        bbox = (cy0 - 3, cx0 - 3, cy1 + 3, cx1 + 3)  # undo the erosion
+        fill = area / ((cy1 - cy0 + 1) * (cx1 - cx0 + 1))
+        on_edge = min(cy0 - y0, cx0 - x0, y1 - cy1, x1 - cx1) <= edge
+        if mean <= INCLUSION_MAX_GRAY:
+            findings.append(_finding("INCLUSION", 0.5 + (INCLUSION_MAX_GRAY - mean) / 20, bbox))
+        elif on_edge and fill < 0.7:
+            findings.append(_finding("CHIP", 0.5 + (0.7 - fill), bbox))
+
+    # SURFACE_POROSITY: enough pits
+    pits = [b for p in parts for b in p["pits"]]
+    if len(pits) >= PIT_MIN_COUNT:
+        findings.append(_finding("SURFACE_POROSITY", 0.5 + (len(pits) - PIT_MIN_COUNT) / 30, _union(pits)))
+
+    # BURN_MARK: enough bright pixels
+    bright = sum(p["bright"] for p in parts)
+    if bright >= BURN_MIN_PIXELS:
+        findings.append(_finding("BURN_MARK", 0.5 + (bright - BURN_MIN_PIXELS) / 1100,
+                                 _union(p["bright_box"] for p in parts)))
+    return findings
+
+
+def _tiles(shape, box, tile: int, overlap: int):
+    """(extended region, core) pairs covering `box`; cores tile it exactly."""
+    H, W = shape
+    for cy in range(box[0], box[2] + 1, tile):
+        for cx in range(box[1], box[3] + 1, tile):
+            core = (cy, cx, min(cy + tile - 1, box[2]), min(cx + tile - 1, box[3]))
+            ext = (max(0, core[0] - overlap), max(0, core[1] - overlap),
+                   min(H - 1, core[2] + overlap), min(W - 1, core[3] + overlap))
+            yield ext, core
+
+
+def detect_defects(gray: np.ndarray) -> list[dict]:
+    """All findings for one grayscale frame: [{defect, confidence, bbox=[x0, y0, x1, y1]}]."""
+    ctx = _frame_context(gray)
+    H, W = gray.shape
+    whole = (0, 0, H - 1, W - 1)
+    return _decide([_measure_tile(gray, (0, 0), whole, ctx)], ctx)
+
+
+def detect_defects_tiled(gray: np.ndarray, tile: int = TILE_SIZE, overlap: int = TILE_OVERLAP,
+                         workers: int = TILE_WORKERS) -> tuple[list[dict], int]:
+    """
+    detect_defects() over overlapping tiles of the pad: working memory is
+    O(tile^2) whatever the frame size. Returns (findings, tiles analysed).
+    """
+    ctx = _frame_context(gray)
+    tiles = list(_tiles(gray.shape, ctx["box"], tile, overlap))
+
+    def run(t):
+        (ey0, ex0, ey1, ex1), core = t
+        return _measure_tile(gray[ey0:ey1 + 1, ex0:ex1 + 1], (ey0, ex0), core, ctx)  # view, no copy
+
+    if workers > 1 and len(tiles) > 1:
+        # NumPy drops the GIL inside most of these kernels
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(run, tiles))
+    else:
+        parts = [run(t) for t in tiles]
+    return _decide(parts, ctx), len(tiles)
+
+
+def summarize_findings(findings: list[dict]) -> dict:
+    """Pad-level verdict from findings: distinct defects (strongest first), score, stage_guess."""
+    best: dict[str, float] = {}
+    for f in findings:
+        best[f["defect"]] = max(best.get(f["defect"], 0.0), f["confidence"])
+    defects = sorted(best, key=lambda d: (-best[d], DEFECTS.index(d)))
+    # score = P(defective): the strongest finding, or a low prior when nothing fired
+    score = round(max(best.values()), 3) if best else 0.05
+    stage_guess = STAGE_FOR_DEFECT[defects[0]] if defects else None
+    return {"defects": defects, "score": score, "stage_guess": stage_guess}
+
+
+def analyze_image(image: str | bytes | None, brakepad_id: str | None, tiled: bool = False):
+    """
+    Deterministic: the same image always gives the same defects, score and stage_guess.
+    tiled=True analyses the frame at full resolution (up to IMAGE_TILED_MAX_PIXELS,
+    which defaults to IMAGE_MAX_PIXELS) in overlapping tiles instead of downscaling
+    it to IMAGE_ANALYSIS_SIDE first; the frame is decoded whole, then converted to
+    grayscale in bands.
+    peak_rss_mb is this request's peak (peak_rss_scope "request") only in a pool
+    worker on Linux, which runs one request at a time; elsewhere (IMAGE_POOL=0,
+    other platforms) it is the process peak ("process") and is not reset.
+    """
+    if not image:
+        # nothing to look at; report no findings rather than invent some
+        return {"defects": [], "stage_guess": None, "score": None, "model_version": MODEL_VERSION,
+                "findings": []}
+    scoped = reset_peak_rss()
+    gray, scale = decode_for_analysis(image, tiled)
+    return analyze_decoded(gray, scale, tiled, scoped)
+
+
+def decode_for_analysis(image: str | bytes, tiled: bool = False) -> tuple[np.ndarray, float]:
+    """decode_image at the resolution analyze_image works at (full size when tiled)."""
+    if tiled:
+        return decode_image(image, max_side=0, max_pixels=min(MAX_PIXELS, TILED_MAX_PIXELS))
+    return decode_image(image, max_side=ANALYSIS_SIDE)
+
+
+def analyze_decoded(gray: np.ndarray, scale: float, tiled: bool = False, scoped: bool = False) -> dict:
+    """The detector half of analyze_image, for callers that already hold the decoded frame."""
+    if tiled:
+        findings, n_tiles = detect_defects_tiled(gray)
     else:
-        picked = random.sample(DEFECTS, k=random.randint(0, 2))
-        score = round(random.uniform(0.55, 0.9), 3)
-    stage_guess = random.choice(["Grinding", "Painting", "Final QC"]) if picked else None
-    return {"defects": picked, "stage_guess": stage_guess, "score": score, "model_version": MODEL_VERSION}
\ No newline at end of file
+        findings, n_tiles = detect_defects(gray), 1
+    if scale != 1.0:
+        for f in findings:
+            f["bbox"] = [int(round(v * scale)) for v in f["bbox"]]
+    return {**summarize_findings(findings), "model_version": MODEL_VERSION, "findings": findings,
+            "tiles": n_tiles, "peak_rss_mb": peak_rss_mb(), "peak_rss_scope": "request" if scoped else "process"}
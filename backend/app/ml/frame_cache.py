@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from .cv_defects import MODEL_VERSION, analyze_decoded, decode_for_analysis, reset_peak_rss
+
+# ---------------------------------------------------------------------
+# Result cache for repeated camera frames (retries, stalled conveyors)
+#   FRAME_CACHE=0               disable
+#   FRAME_CACHE_MAX             entries kept (LRU beyond this)
+#   FRAME_CACHE_TTL_S           entry lifetime
+#   FRAME_CACHE_MAX_DISTANCE    dHash bits that may differ for a near-duplicate
+#                               (0 = identical perceptual hash, -1 = exact bytes only)
+# Keyed by sha1 of the encoded bytes and a 64-bit difference hash of the
+# decoded frame; entries are only valid for the MODEL_VERSION that made them.
+# A dHash can't see pits or hairline cracks, so near-duplicate matches are
+# only made between frames of the same pad (brakepad_id); frames without a
+# pad id only hit on identical bytes.
+# The API process only hashes bytes (exact hits). Decoding happens once, in
+# the analysis worker (analyze_or_match): it computes the dHash from the
+# frame it decodes for the detectors and checks it against the pad's cached
+# dHashes, which the API passes along, before running them.
+# ---------------------------------------------------------------------
+ENABLED = os.getenv("FRAME_CACHE", "1").strip().lower() in ("1", "true", "yes", "on")
+MAX_ENTRIES = int(os.getenv("FRAME_CACHE_MAX", "2048"))
+TTL_S = float(os.getenv("FRAME_CACHE_TTL_S", "300"))
+MAX_DISTANCE = int(os.getenv("FRAME_CACHE_MAX_DISTANCE", "4"))
+
+
+def dhash(gray: np.ndarray) -> int:
+    """64-bit difference hash: 9x8 thumbnail, one bit per left/right brightness step."""
+    thumb = np.asarray(Image.fromarray(gray).resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def analyze_or_match(data: bytes, tiled: bool, candidates: list[tuple[str, int]], max_distance: int) -> dict:
+    """
+    Runs where analyze_image runs (pool worker). One decode yields the dHash
+    and the detector input. If a candidate (cache key, dHash) is within
+    max_distance, returns {"near_key": key, "dhash": dh} without running the
+    detectors; otherwise the analyze_image result plus "dhash".
+    """
+    scoped = reset_peak_rss()
+    gray, scale = decode_for_analysis(data, tiled)
+    dh = dhash(gray)
+    best_key, best_d = None, max_distance + 1
+    for key, cand in candidates:
+        d = (cand ^ dh).bit_count()
+        if d < best_d:
+            best_key, best_d = key, d
+    if best_key is not None:
+        return {"near_key": best_key, "dhash": dh}
+    return {**analyze_decoded(gray, scale, tiled, scoped), "dhash": dh}
+
+
+class FrameCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_s: float = TTL_S, max_distance: int = MAX_DISTANCE):
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        # sha1 -> (expires_at, dhash, model_version, scope, result); order = recency
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # counters
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, sha1: str) -> Optional[dict]:
+        """Cached result (a copy) for identical bytes, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(sha1)
+            if entry is not None and self._live(sha1, entry, now):
+                self._entries.move_to_end(sha1)
+                self.exact_hits += 1
+                return copy.deepcopy(entry[4])
+            return None
+
+    def candidates(self, scope: Optional[str]) -> list[tuple[str, int]]:
+        """(key, dHash) of the live entries a near-duplicate in `scope` may match."""
+        if scope is None or self.max_distance < 0:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            return [(key, e[1]) for key, e in list(self._entries.items())
+                    if e[3] == scope and self._live(key, e, now)]
+
+    def get_near(self, key: str) -> Optional[dict]:
+        """Result for a near-duplicate match found by analyze_or_match (None if it expired meanwhile)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._live(key, entry, now):
+                return None
+            self._entries.move_to_end(key)
+            self.near_hits += 1
+            return copy.deepcopy(entry[4])
+
+    def _live(self, key: str, entry: tuple, now: float) -> bool:
+        # caller holds the lock
+        if entry[0] < now or entry[2] != MODEL_VERSION:
+            del self._entries[key]
+            self.expired += 1
+            return False
+        return True
+
+    def put(self, sha1: str, dh: int, result: dict, scope: Optional[str] = None) -> None:
+        """Store a freshly analysed frame (each put is one cache miss)."""
+        with self._lock:
+            self.misses += 1
+            self._entries[sha1] = (time.monotonic() + self.ttl_s, dh, result.get("model_version"), scope,
+                                   copy.deepcopy(result))
+            self._entries.move_to_end(sha1)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.near_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": True,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "max_distance": self.max_distance,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
+
+
+frame_cache: Optional[FrameCache] = FrameCache() if ENABLED else None
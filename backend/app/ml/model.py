@@ -1,5 +1,10 @@
+import hashlib
 import os
 import math, random
+import threading
+from collections import OrderedDict
+
+import numpy as np
 
 FEATURES = [
     "resin_pct","fiber_pct","metal_powder_pct","filler_pct","abrasives_pct","binder_pct",
@@ -78,22 +83,39 @@ def score_features(row: dict):
 
     return label, risk, contribs
 
+def _midpoint_contribs():
+    """Contribution of each feature when moved to its nominal midpoint (0.0 for sane ranges)."""
+    out = []
+    for k in FEATURES:
+        lo, hi = NOMINAL[k]
+        out.append(WEIGHTS[k] * _deviation_score((lo + hi) / 2.0, lo, hi))
+    return out
+
 def permutation_importance(row: dict):
     """
     Local importance: impact of moving each feature to the nominal midpoint.
     Positive means it *reduced* risk when corrected -> important contributor.
+
+    The model is additive (clamped at total/5), so instead of re-scoring the row
+    once per feature we swap that feature's term for its midpoint term in the
+    total: total - term + mid, O(F). importance_batch() does the same
+    arithmetic, so both give the same numbers.
     """
-    _, baseline_risk, _ = score_features(row)
+    _, baseline_risk, contribs = score_features(row)
+    total = 0.0
+    for k in FEATURES:  # same order as score_features
+        total += contribs[k]
+    mids = _midpoint_contribs()
     importances = {}
-    for k in FEATURES:
-        tmp = dict(row)
-        tmp[k] = (NOMINAL[k][0] + NOMINAL[k][1]) / 2.0  # midpoint
-        _, new_risk, _ = score_features(tmp)
+    for i, k in enumerate(FEATURES):
+        new_risk = min(1.0, (total - contribs[k] + mids[i]) / 5.0)
         importances[k] = max(0.0, baseline_risk - new_risk)
     return importances
 
-def predict_mix(row: dict):
+def predict_mix(row: dict, explain: bool = True):
     """
+    explain=False skips the per-feature importances (explanation is None).
+
     Returns a dict with:
       - label           : "PASS"/"FAIL"/"AT_RISK"
       - score           : P(FAIL) in [0,1]   <-- canonical scalar
@@ -105,9 +127,125 @@ def predict_mix(row: dict):
       - quality         : alias of label  (for UI)
       - probability     : alias of confidence (for UI)
     """
+    # explain=False costs less than a cache lookup; only the importances are worth memoizing
+    if _mix_memo.max_size <= 0 or not explain:
+        return _predict_mix_uncached(row, explain)
+    return _mix_memo.get_or_compute(row, explain)
+
+def _predict_mix_uncached(row: dict, explain: bool = True):
     label, risk, _ = score_features(row)  # risk = P(FAIL)
-    expl = permutation_importance(row)
+    expl = permutation_importance(row) if explain else None
+    return _result_dict(label, risk, expl)
+
+# ---------------------------------------------------------------------------
+# LRU memo in front of predict_mix (production reuses a few recipes a lot)
+#   MIX_CACHE_SIZE       entries (0 disables)
+#   MIX_CACHE_DECIMALS   features are rounded to this many decimals for the key
+# Entries belong to one parameter fingerprint (MODEL_VERSION, NOMINAL,
+# WEIGHTS, threshold, risk band); any change to those empties the cache on
+# the next call, so it never serves results from old parameters.
+# ---------------------------------------------------------------------------
+MIX_CACHE_SIZE = int(os.getenv("MIX_CACHE_SIZE", "4096"))
+MIX_CACHE_DECIMALS = int(os.getenv("MIX_CACHE_DECIMALS", "6"))
+
+def _params_fingerprint():
+    # dict/list equality against the stored snapshot is cheaper than hashing them per call
+    return (MODEL_VERSION, MIX_FAIL_THRESHOLD, LOW, HIGH, NOMINAL, WEIGHTS, FEATURES)
+
+def _snapshot(fp):
+    return tuple(dict(v) if isinstance(v, dict) else list(v) if isinstance(v, list) else v for v in fp)
+
+class _MixMemo:
+    def __init__(self, max_size: int = MIX_CACHE_SIZE, decimals: int = MIX_CACHE_DECIMALS):
+        self.max_size = max_size
+        self.decimals = decimals
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _copy(result: dict) -> dict:
+        # callers may mutate what they get back; the cached dict must not change
+        out = dict(result)
+        if out.get("explanation") is not None:
+            out["explanation"] = dict(out["explanation"])
+        if "risk_band" in out:
+            out["risk_band"] = list(out["risk_band"])
+        return out
+
+    def get_or_compute(self, row: dict, explain: bool) -> dict:
+        key = (tuple(round(float(row[k]), self.decimals) for k in FEATURES), bool(explain))
+        fp = _params_fingerprint()
+        with self._lock:
+            if fp != self._fingerprint:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._fingerprint = _snapshot(fp)
+            hit = self._entries.get(key)
+            if hit is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy(hit)
+            self.misses += 1
+
+        result = _predict_mix_uncached(row, explain)
+        with self._lock:
+            if fp == self._fingerprint:  # parameters unchanged while we computed
+                self._entries[key] = self._copy(result)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.max_size > 0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+_mix_memo = _MixMemo()
+
+def predict_mix_cache_stats() -> dict:
+    return _mix_memo.stats()
+
+def mix_input_hash(row: dict, explain: bool = True) -> str:
+    """
+    Digest of the features (rounded like the memo key) and the parameter
+    fingerprint. A stored Prediction with the same hash is what predict_mix
+    would return now, so it can be served without re-scoring.
+    explain=False (no importances stored) gives a different digest, so such
+    rows never stand in for predict_mix(row) with its explanation.
+    """
+    feats = ",".join(repr(round(float(row[k]), MIX_CACHE_DECIMALS)) for k in FEATURES)
+    suffix = "" if explain else "|no-explain"
+    return hashlib.sha256(f"{feats}|{_params_fingerprint()!r}{suffix}".encode()).hexdigest()
 
+def params_hash() -> str:
+    """Short digest of the current parameter fingerprint (changes when NOMINAL/WEIGHTS/... do)."""
+    return hashlib.sha256(repr(_params_fingerprint()).encode()).hexdigest()[:16]
+
+def stored_result(label, score, explanation=None) -> dict:
+    """predict_mix-shaped dict rebuilt from a persisted Prediction row."""
+    return _result_dict(label, float(score), explanation)
+
+def _result_dict(label, risk, expl):
     # confidence should align with the chosen label
     if label == "FAIL":
         confidence = risk
@@ -134,4 +272,99 @@ def predict_mix(row: dict):
         None
     )
 
-    return out
\ No newline at end of file
+    return out
+
+# ---------------------------------------------------------------------------
+# Vectorized batch scoring
+#   Same NOMINAL / WEIGHTS / threshold logic as score_features(), applied to
+#   an (N, len(FEATURES)) matrix in one NumPy pass. Per-feature terms are
+#   accumulated column by column in FEATURES order so the totals (and hence
+#   risks/labels) are bit-for-bit identical to the scalar path.
+# ---------------------------------------------------------------------------
+def _param_arrays():
+    """lo/hi/weight vectors in FEATURES order (rebuilt per call: 10 items, and
+    picks up any runtime change to NOMINAL/WEIGHTS)."""
+    lo = np.array([NOMINAL[k][0] for k in FEATURES], dtype=np.float64)
+    hi = np.array([NOMINAL[k][1] for k in FEATURES], dtype=np.float64)
+    w = np.array([WEIGHTS[k] for k in FEATURES], dtype=np.float64)
+    return lo, hi, w
+
+def mixes_to_matrix(rows) -> np.ndarray:
+    """List of mix dicts (or objects with the feature attributes) -> (N, 10) float64 matrix."""
+    rows = list(rows)
+    X = np.empty((len(rows), len(FEATURES)), dtype=np.float64)
+    for i, row in enumerate(rows):
+        if isinstance(row, dict):
+            X[i] = [float(row[k]) for k in FEATURES]
+        else:
+            X[i] = [float(getattr(row, k)) for k in FEATURES]
+    return X
+
+def _contribs_matrix(X: np.ndarray) -> np.ndarray:
+    lo, hi, w = _param_arrays()
+    # same branches/denominators as _deviation_score(): max(1e-6, bound)
+    dev = np.where(X < lo, (lo - X) / np.maximum(1e-6, lo), 0.0)
+    dev = np.where(X > hi, (X - hi) / np.maximum(1e-6, hi), dev)
+    return w * dev
+
+def _sum_in_order(C: np.ndarray) -> np.ndarray:
+    # left-to-right accumulation (np.sum uses pairwise summation, which can
+    # differ from the scalar loop in the last ulp)
+    total = np.zeros(C.shape[0], dtype=np.float64)
+    for j in range(C.shape[1]):
+        total += C[:, j]
+    return total
+
+def _labels_for(risk: np.ndarray) -> np.ndarray:
+    if LOW is not None and HIGH is not None and LOW < HIGH:
+        return np.where(risk < LOW, "PASS", np.where(risk > HIGH, "FAIL", "AT_RISK"))
+    return np.where(risk >= MIX_FAIL_THRESHOLD, "FAIL", "PASS")
+
+def score_batch(X):
+    """
+    Vectorized score_features() over many rows.
+
+    Args:
+      X: (N, 10) array-like in FEATURES order, or a list of mix dicts.
+
+    Returns:
+      labels:   (N,) array of str ("PASS"/"FAIL"/"AT_RISK" if band enabled)
+      risk:     (N,) float64, P(FAIL) in [0,1]
+      contribs: (N, 10) float64 raw contributions, columns in FEATURES order
+    """
+    if isinstance(X, np.ndarray):
+        X = np.asarray(X, dtype=np.float64)
+    else:
+        X = mixes_to_matrix(X)
+    if X.ndim != 2 or X.shape[1] != len(FEATURES):
+        raise ValueError(f"Expected shape (N, {len(FEATURES)}), got {X.shape}")
+
+    contribs = _contribs_matrix(X)
+    total = _sum_in_order(contribs)
+    risk = np.minimum(1.0, total / 5.0)
+    return _labels_for(risk), risk, contribs
+
+def importance_batch(contribs: np.ndarray, risk: np.ndarray) -> np.ndarray:
+    """
+    Vectorized permutation_importance() from score_batch() outputs.
+    Returns an (N, 10) matrix, columns in FEATURES order.
+    """
+    mids = np.array(_midpoint_contribs(), dtype=np.float64)
+    # totals[:, i] = row total with feature i's term swapped for its midpoint
+    # term, same arithmetic as permutation_importance()
+    totals = _sum_in_order(contribs)[:, None] - contribs + mids
+    new_risk = np.minimum(1.0, totals / 5.0)
+    return np.maximum(0.0, risk[:, None] - new_risk)
+
+def predict_mix_batch(rows, explain: bool = True) -> list[dict]:
+    """
+    predict_mix() for many rows at once: one score_batch() pass (plus one
+    importance_batch() pass if explain). Same per-row dicts as predict_mix().
+    """
+    labels, risk, contribs = score_batch(rows)
+    expl = importance_batch(contribs, risk) if explain else None
+    out = []
+    for i in range(len(risk)):
+        e = dict(zip(FEATURES, expl[i].tolist())) if explain else None
+        out.append(_result_dict(str(labels[i]), float(risk[i]), e))
+    return out
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------
+# Process pool for CPU-bound image analysis (keeps the API's GIL free)
+#   IMAGE_POOL=0              disable; analysis runs in the AnyIO threadpool
+#   IMAGE_POOL_WORKERS        processes (0 = one per core, the default)
+#   IMAGE_POOL_MAX_PENDING    queued + running tasks before submit() refuses (503)
+# ---------------------------------------------------------------------
+ENABLED = os.getenv("IMAGE_POOL", "1").strip().lower() in ("1", "true", "yes", "on")
+WORKERS = int(os.getenv("IMAGE_POOL_WORKERS", "0"))
+MAX_PENDING = int(os.getenv("IMAGE_POOL_MAX_PENDING", "0"))  # 0 = 4 per worker
+
+
+class AnalysisPoolBusy(Exception):
+    """Raised by AnalysisPool.submit when max_pending tasks are already queued or running."""
+
+
+def init_worker() -> None:
+    # pay the NumPy/Pillow import once per process, not on the first request
+    from . import cv_defects  # noqa: F401
+    from ..utils.memory import mark_single_request_process
+    mark_single_request_process()  # one task at a time: peak_rss_mb can be per request
+
+
+class AnalysisPool:
+    """
+    Size-bounded ProcessPoolExecutor. submit() never queues without limit:
+    past max_pending it raises AnalysisPoolBusy so the caller can shed load.
+    """
+
+    def __init__(self, workers: int = WORKERS, max_pending: int = MAX_PENDING):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.max_pending = max_pending if max_pending > 0 else 4 * self.workers
+        self._lock = threading.Lock()
+        self._in_flight = 0  # queued + running; guarded by _lock
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # counters
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.max_task_ms = 0.0
+        self._total_task_ms = 0.0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: the API process has DB/writer threads, which fork() doesn't mix well with
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        )
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+
+    def stop(self) -> None:
+        with self._lock:
+            ex, self._executor = self._executor, None
+        if ex is not None:
+            ex.shutdown(wait=True, cancel_futures=True)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight  # queued + running
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Run fn(*args) in a worker process; raises AnalysisPoolBusy when full."""
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self.rejected += 1
+                raise AnalysisPoolBusy(f"image analysis pool is full ({self.max_pending} pending)")
+            self._in_flight += 1
+        t0 = time.perf_counter()
+        try:
+            fut = self._submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        with self._lock:
+            self.submitted += 1
+        fut.add_done_callback(lambda f: self._done(f, t0))
+        return fut
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            ex = self._executor
+        try:
+            return ex.submit(fn, *args)
+        except BrokenProcessPool:
+            # a worker died (e.g. OOM-killed); replace the pool once and retry
+            log.warning("image analysis pool broken; restarting")
+            with self._lock:
+                if self._executor is ex:
+                    self._executor = self._new_executor()
+                    self.restarts += 1
+                ex = self._executor
+            return ex.submit(fn, *args)
+
+    def _done(self, fut: Future, t0: float) -> None:
+        ms = (time.perf_counter() - t0) * 1000.0
+        with self._lock:
+            self._in_flight -= 1
+            if fut.cancelled() or fut.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self.max_task_ms = max(self.max_task_ms, ms)
+            self._total_task_ms += ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                "enabled": True,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "restarts": self.restarts,
+                "avg_task_ms": round(self._total_task_ms / done, 3) if done else 0.0,
+                "max_task_ms": round(self.max_task_ms, 3),
+            }
+
+
+# ---------------------------------------------------------------------
+# Process-wide instance (started/stopped from main.py lifespan)
+# ---------------------------------------------------------------------
+_pool: Optional[AnalysisPool] = None
+
+
+def get_analysis_pool() -> Optional[AnalysisPool]:
+    """The running pool, or None when disabled / not started."""
+    return _pool
+
+
+def start_analysis_pool() -> Optional[AnalysisPool]:
+    global _pool
+    if not ENABLED:
+        return None
+    if _pool is None:
+        _pool = AnalysisPool()
+    _pool.start()
+    return _pool
+
+
+def stop_analysis_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.stop()
+        _pool = None
@@ -6,7 +6,7 @@ from enum import Enum as PyEnum
 
 from typing import List
 from sqlalchemy import (
-Column, Integer, String, DateTime, Enum as SAEnum, ForeignKey, Float, JSON, func
+Column, Integer, BigInteger, String, DateTime, Enum as SAEnum, ForeignKey, Float, JSON, Index, Sequence, func
 )
 from sqlalchemy.orm import declarative_base, relationship
 import uuid
@@ -14,6 +14,12 @@ import uuid
 
 Base = declarative_base()
 
+def _has_pg_trgm(ddl, target, bind, **kw) -> bool:
+    """ddl_if hook: only build trigram indexes where the pg_trgm extension is installed."""
+    if bind is None or bind.dialect.name != "postgresql":
+        return False
+    return bind.exec_driver_sql("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'").first() is not None
+
 class PadType(PyEnum):
     TRANSIT = "TRANSIT"
     FREIGHT = "FREIGHT"
@@ -23,6 +29,10 @@ class PadStatus(PyEnum):
     FAILED = "FAILED"
     IN_PROGRESS = "IN_PROGRESS"
 
+# Numeric part of synthetic serial numbers (TR-01-02-00042); allocated in blocks
+# by utils/synthetic.py so repeated runs never collide on serial_number.
+pad_serial_seq = Sequence("brake_pad_serial_seq", metadata=Base.metadata)
+
 class BrakePad(Base):
     __tablename__ = "brake_pads"
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -40,6 +50,31 @@ class BrakePad(Base):
     stage = relationship("Stage", back_populates="pads")
     predictions = relationship("Prediction", back_populates="brakepad", cascade="all, delete-orphan")
 
+    # Access paths of /pads and /stats (see bench/bench_pad_indexes.py):
+    #  - (created_at, id): default sort + stable/keyset paging
+    #  - (line_id, status): /stats GROUP BY (index-only) and the line filter
+    #  - (<filter>, created_at, id): filter + default sort without a separate sort step
+    #  - (batch_code, id): batch_code sort/paging (serial_number is already unique)
+    #  - search (PostgreSQL only): text_pattern_ops btrees for prefix typeahead,
+    #    pg_trgm GIN for ILIKE '%q%' when the extension is installed
+    # pad_type is left unindexed: two values, ~50/50, a scan is cheaper.
+    __table_args__ = (
+        Index("ix_brake_pads_created_at_id", "created_at", "id"),
+        Index("ix_brake_pads_line_status", "line_id", "status"),
+        Index("ix_brake_pads_status_created_at", "status", "created_at", "id"),
+        Index("ix_brake_pads_belt_created_at", "belt_id", "created_at", "id"),
+        Index("ix_brake_pads_stage_created_at", "stage_id", "created_at", "id"),
+        Index("ix_brake_pads_batch_code_id", "batch_code", "id"),
+        Index("ix_brake_pads_serial_prefix", "serial_number",
+              postgresql_ops={"serial_number": "text_pattern_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_brake_pads_batch_code_prefix", "batch_code",
+              postgresql_ops={"batch_code": "text_pattern_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_brake_pads_serial_trgm", "serial_number", postgresql_using="gin",
+              postgresql_ops={"serial_number": "gin_trgm_ops"}).ddl_if(callable_=_has_pg_trgm),
+        Index("ix_brake_pads_batch_code_trgm", "batch_code", postgresql_using="gin",
+              postgresql_ops={"batch_code": "gin_trgm_ops"}).ddl_if(callable_=_has_pg_trgm),
+    )
+
 class AssemblyLine(Base):
     __tablename__ = "assembly_lines"
     id = Column(Integer, primary_key=True)
@@ -94,4 +129,31 @@ class Prediction(Base):
     score = Column(Float, nullable=True)
     explanation_json = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
-    brakepad = relationship("BrakePad", back_populates="predictions")
\ No newline at end of file
+    # ml.model.mix_input_hash of the scored mix; lets /predict/pad reuse an unchanged result
+    input_hash = Column(String(64), nullable=True)
+    brakepad = relationship("BrakePad", back_populates="predictions")
+
+    # per-pad history / latest prediction (material_mixes.brakepad_id is already unique-indexed)
+    __table_args__ = (
+        Index("ix_predictions_brakepad_created_at", "brakepad_id", "created_at"),
+    )
+
+# Rollup of pad counts per (line, stage, status) so /stats is O(lines), not O(pads).
+# Maintained by statement-level triggers on brake_pads (PostgreSQL, STATS_ROLLUP=1);
+# see utils/rollup.py.
+class PadStatusCount(Base):
+    __tablename__ = "pad_status_counts"
+    line_id = Column(Integer, ForeignKey("assembly_lines.id"), primary_key=True)
+    stage_id = Column(Integer, ForeignKey("stages.id"), primary_key=True)
+    status = Column(SAEnum(PadStatus, name="pad_status"), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+# Resume point of a long-running backfill (utils/backfill.py): one row per
+# run name, updated in the same transaction as each chunk it covers.
+class BackfillCheckpoint(Base):
+    __tablename__ = "backfill_checkpoints"
+    name = Column(String, primary_key=True)
+    last_key = Column(String, nullable=True)  # highest brake_pads.id written
+    rows_done = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
-import math
-from ..deps import get_db
+from sqlalchemy import func, literal, select, tuple_
+from datetime import datetime
+import base64, json, math
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..deps import get_async_read_db
 from ..models import BrakePad, PadStatus, PadType, Stage  # PadStatus, PadType enums in models
+from ..utils.refcache import refcache, RefSnapshot
 
 router = APIRouter()
 
-def _list_pads_impl(
-        db: Session, 
+async def _list_pads_impl(
+        db: AsyncSession, 
         page:int, 
         page_size:int, 
         sort_by:str, 
@@ -19,6 +21,10 @@ def _list_pads_impl(
         belt_id: int | None = Query(None),
         stage_id: int | None = Query(None),
         q: str | None = Query(None, description="Search serial_number or batch_code"),
+        q_mode: str = "contains",
+        paging: str = "page",
+        cursor: str | None = None,
+        approximate_total: bool = False,
         ):
 
     # Build filters
@@ -39,12 +45,20 @@ def _list_pads_impl(
         filters.append(BrakePad.stage_id == stage_id)
 
     if q:
-        ql = f"%{q.strip()}%"
         # serial or batch_code (batch_code may be missing in some schemas; getattr guards)
         col_batch = getattr(BrakePad, "batch_code")
-        filters.append(
-            (BrakePad.serial_number.ilike(ql)) | (col_batch.ilike(ql))
-        )
+        if q_mode == "prefix":
+            # structured ids (TR-01-02-00042, BC-0102-...) -> btree range scan
+            ql = _prefix_pattern(q)
+            filters.append(
+                (BrakePad.serial_number.like(ql, escape="\\")) | (col_batch.like(ql, escape="\\"))
+            )
+        else:
+            # substring; served by the pg_trgm GIN indexes when installed
+            ql = f"%{q.strip()}%"
+            filters.append(
+                (BrakePad.serial_number.ilike(ql)) | (col_batch.ilike(ql))
+            )
 
     # Validate & build sorting
     # Decide sort column (support stage sequence/name via JOIN)
@@ -57,44 +71,145 @@ def _list_pads_impl(
         if col is None:
             raise HTTPException(status_code=400, detail=f"Invalid sort_by: {sort_by}")
 
-    order = col.asc() if sort_dir.lower() == "asc" else col.desc()
+    asc = sort_dir.lower() == "asc"
+    order = col.asc() if asc else col.desc()
+    echo_filters = {
+        "status": status, "pad_type": pad_type,
+        "line_id": line_id, "belt_id": belt_id, "stage_id": stage_id, "q": q,
+    }
+
+    # Total (filtered) — exact COUNT, or the planner's row estimate when asked.
+    # Keyset paging exists to avoid scans: it only ever reports the estimate
+    # (None where the database has no cheap one).
+    keyset = paging == "cursor" or cursor
+    if keyset:
+        total = await _estimated_total(db, filters)
+        estimated = total is not None
+    else:
+        total, estimated = await _filtered_total(db, filters, approximate_total)
+
+    q_base = select(BrakePad)
+    if join_stage:
+        q_base = q_base.join(Stage, Stage.id == BrakePad.stage_id) # (JOIN only when needed for stage sorting)
+    q_base = q_base.where(*filters)
+    ref = await refcache.aget(db)  # stage_name/seq for display come from the reference cache, no JOIN
+
+    # Keyset mode: seek past (sort value, id) of the previous page instead of OFFSET
+    if keyset:
+        if cursor:
+            value, last_id = _decode_cursor(cursor, sort_by, sort_dir)
+            key = tuple_(col, BrakePad.id)
+            bound = tuple_(literal(value, col.type), literal(last_id, BrakePad.id.type))
+            q_base = q_base.where(key > bound if asc else key < bound)
+        id_order = BrakePad.id.asc() if asc else BrakePad.id.desc()  # same direction so (col, id) is one seekable key
+        rows = (await db.execute(q_base.order_by(order, id_order).limit(page_size + 1))).scalars().all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = _encode_cursor(rows[-1], sort_by, sort_dir, ref) if has_more and rows else None
+        return {
+            "items": [_pad_to_dict(p, ref) for p in rows],
+            "total": total,
+            "total_is_estimate": estimated,
+            "page_size": page_size,
+            "paging": "cursor",
+            "next_cursor": next_cursor,
+            "sort_by": sort_by,
+            "sort_dir": sort_dir.lower(),
+            "filters": echo_filters,
+        }
 
-    # Total (filtered)
-    total = db.query(func.count(BrakePad.id)).filter(*filters).scalar() or 0
     pages = max(1, math.ceil(total / page_size)) if total else 1
     page = min(page, pages)
 
     # Page slice
-    q_base = db.query(BrakePad)
-    if join_stage:
-        q_base = q_base.join(Stage, Stage.id == BrakePad.stage_id) # (JOIN only when needed for stage sorting)
-    qset = (
+    qset = (await db.execute(
         q_base
-        .options(joinedload(BrakePad.stage))      # for stage_name/seq display, avoid N+1
-        .filter(*filters)
         .order_by(order, BrakePad.id.asc())  # tie-breaker for stable paging
         .offset((page - 1) * page_size)
         .limit(page_size)
-    ).all()
+    )).scalars().all()
 
     return {
-        "items": [_pad_to_dict(p) for p in qset],
+        "items": [_pad_to_dict(p, ref) for p in qset],
         "total": total,
+        "total_is_estimate": estimated,
         "page": page,
         "page_size": page_size,
         "pages": pages,
         "sort_by": sort_by,
         "sort_dir": sort_dir.lower(),
-         "filters": {
-            "status": status, "pad_type": pad_type,
-            "line_id": line_id, "belt_id": belt_id, "stage_id": stage_id, "q": q,
-        },
+        "filters": echo_filters,
     }
 
+async def _filtered_total(db: AsyncSession, filters: list, approximate: bool) -> tuple[int, bool]:
+    """
+    Exact filtered COUNT(*), or (approximate=True, PostgreSQL only) the planner's
+    row estimate from EXPLAIN — O(1) instead of a scan, good enough for page counters.
+    """
+    if approximate:
+        estimate = await _estimated_total(db, filters)
+        if estimate is not None:
+            return estimate, True
+    return (await db.scalar(select(func.count()).select_from(BrakePad).where(*filters))) or 0, False
+
+async def _estimated_total(db: AsyncSession, filters: list) -> int | None:
+    """The planner's row estimate for the filtered pads (PostgreSQL), else None."""
+    if db.bind.dialect.name != "postgresql":
+        return None
+    stmt = select(BrakePad.id).where(*filters)
+    sql = str(stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}))
+    # driver-level SQL: text() would read ":word" in the inlined search text as a bind parameter
+    plan = await db.run_sync(
+        lambda s: s.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar())
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+# SEARCH: LIKE prefix pattern with wildcards in the user text escaped.
+# Serials/batch codes are upper-case, so the prefix is upper-cased and matched
+# case-sensitively (text_pattern_ops btree; ILIKE can't use it).
+def _prefix_pattern(q: str) -> str:
+    raw = q.strip().upper()
+    return raw.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+# CURSOR: opaque token = urlsafe base64 of [sort_by, sort_dir, last sort value, last id]
+def _cursor_value(p: BrakePad, sort_by: str, ref: RefSnapshot):
+    if sort_by in ("stage_seq", "stage_name"):
+        st = ref.stage(p.stage_id) or {}
+        return st.get("sequence" if sort_by == "stage_seq" else "name")
+    v = getattr(p, sort_by)
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return _enum_name_or_value(v)
+
+def _encode_cursor(p: BrakePad, sort_by: str, sort_dir: str, ref: RefSnapshot) -> str:
+    raw = json.dumps([sort_by, sort_dir.lower(), _cursor_value(p, sort_by, ref), p.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(token: str, sort_by: str, sort_dir: str):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        c_sort, c_dir, value, last_id = json.loads(raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if c_sort != sort_by or c_dir != sort_dir.lower():
+        raise HTTPException(status_code=400, detail="Cursor does not match sort_by/sort_dir")
+    try:
+        if sort_by == "created_at":
+            value = datetime.fromisoformat(value)
+        elif sort_by == "status":
+            value = PadStatus[value]
+        elif sort_by == "pad_type":
+            value = PadType[value]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, last_id
+
 def _enum_name_or_value(x):
     return getattr(x, "name", x)
 
-def _pad_to_dict(p: BrakePad) -> dict:
+def _pad_to_dict(p: BrakePad, ref: RefSnapshot) -> dict:
+    st = ref.stage(p.stage_id) or {}
     return {
         "id": p.id,
         "serial_number": p.serial_number,
@@ -103,8 +218,8 @@ def _pad_to_dict(p: BrakePad) -> dict:
         "line_id": p.line_id,
         "belt_id": p.belt_id,
         "stage_id": p.stage_id, # this is raw Foreign Key
-        "stage_name": getattr(p.stage, "name", None),   # ← user-friendly attribute
-        "stage_seq": getattr(p.stage, "sequence", None),
+        "stage_name": st.get("name"),   # ← user-friendly attribute
+        "stage_seq": st.get("sequence"),
         "batch_code": getattr(p, "batch_code", None),
         "created_at": p.created_at,
     }
@@ -132,9 +247,27 @@ def _coerce_enum_list(values, enum_cls):
             raise HTTPException(status_code=400, detail=f"Invalid {enum_cls.__name__} value: {v}")
     return out
 
+# Typeahead → /pads/suggest?q=TR-01-02  (prefix match, index range scan + LIMIT)
+@router.get("/suggest")
+async def suggest_pads(
+    q: str = Query(..., min_length=1),
+    field: str = Query("serial_number", pattern="^(serial_number|batch_code)$"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Serial number / batch code suggestions for the search box."""
+    col = BrakePad.serial_number if field == "serial_number" else getattr(BrakePad, "batch_code")
+    rows = (await db.execute(
+        select(BrakePad.id, BrakePad.serial_number, getattr(BrakePad, "batch_code"))
+        .where(col.like(_prefix_pattern(q), escape="\\"))
+        .order_by(col.asc())
+        .limit(limit)
+    )).all()
+    return [{"id": r[0], "serial_number": r[1], "batch_code": r[2]} for r in rows]
+
 # Canonical path → /pads  (no redirect)
 @router.get("")
-def list_pads_alias1(
+async def list_pads_alias1(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),  # user-configurable in UI; backend caps at 100
     # SORTING: query params
@@ -147,14 +280,20 @@ def list_pads_alias1(
     belt_id: int | None = Query(None),
     stage_id: int | None = Query(None), # ← filter by stage via dropdown (ID)
     q: str | None = Query(None, description="Search serial_number or batch_code"),
-    db: Session = Depends(get_db)
+    q_mode: str = Query("contains", pattern="^(contains|prefix)$", description="prefix = fast typeahead on structured ids"),
+    # PAGING: "page" (OFFSET, default) or "cursor" (keyset; pass back next_cursor; estimated total only)
+    paging: str = Query("page", pattern="^(page|cursor)$"),
+    cursor: str | None = Query(None, description="Opaque next_cursor from the previous response"),
+    approximate_total: bool = Query(False, description="Use the planner's row estimate instead of COUNT(*)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """List brake pads (alias: '/pads')."""
-    return _list_pads_impl(db, page, page_size, sort_by, sort_dir, status, pad_type, line_id, belt_id, stage_id, q)
+    return await _list_pads_impl(db, page, page_size, sort_by, sort_dir, status, pad_type, line_id, belt_id, stage_id, q,
+                           q_mode, paging, cursor, approximate_total)
 
 # Friendly alias → /pads/ (trailing slash)
 @router.get("/")
-def list_pads_alias2(
+async def list_pads_alias2(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),  # user-configurable in UI; backend caps at 100
     # SORTING: query params
@@ -167,7 +306,13 @@ def list_pads_alias2(
     belt_id: int | None = Query(None),
     stage_id: int | None = Query(None),
     q: str | None = Query(None, description="Search serial_number or batch_code"),
-    db: Session = Depends(get_db)
+    q_mode: str = Query("contains", pattern="^(contains|prefix)$", description="prefix = fast typeahead on structured ids"),
+    # PAGING: "page" (OFFSET, default) or "cursor" (keyset; pass back next_cursor; estimated total only)
+    paging: str = Query("page", pattern="^(page|cursor)$"),
+    cursor: str | None = Query(None, description="Opaque next_cursor from the previous response"),
+    approximate_total: bool = Query(False, description="Use the planner's row estimate instead of COUNT(*)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """List brake pads (alias: '/pads/')."""
-    return _list_pads_impl(db, page, page_size, sort_by, sort_dir, status, pad_type, line_id, belt_id, stage_id, q)
\ No newline at end of file
+    return await _list_pads_impl(db, page, page_size, sort_by, sort_dir, status, pad_type, line_id, belt_id, stage_id, q,
+                           q_mode, paging, cursor, approximate_total)
\ No newline at end of file
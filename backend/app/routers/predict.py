@@ -1,33 +1,98 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import hashlib
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import or_
+from sqlalchemy import or_, insert, select
+from pydantic import ValidationError
 
+from ..database import SessionLocal
 from ..deps import get_db
 from ..models import Prediction, PredictionKind, BrakePad, MaterialMix
+from ..utils.prediction_log import get_prediction_writer, PredictionQueueFull
+from ..utils.batch_infer import run_batch_inference, ARCHIVE_SUFFIXES
+from ..utils.backfill import run_mix_backfill
+from ..utils.images import get_image_dir
+from ..utils.jobs import jobs
+from ..utils.mix_batcher import get_mix_batcher, MixBatcherBusy
 
 # ✅ ML functions live here (as observed)
-from ..ml.model import predict_mix
-from ..ml.cv_defects import analyze_image
+from ..ml.model import predict_mix, predict_mix_batch
+from ..ml.cv_defects import analyze_image, image_bytes, ImageTooLarge, MAX_BYTES as IMAGE_MAX_BYTES
+from ..ml.pool import get_analysis_pool, AnalysisPoolBusy
+from ..ml.frame_cache import analyze_or_match, frame_cache
 from ..ml import model as ml_model  # gives access to NOMINAL, WEIGHTS, thresholds
 
 # Pydantic schemas – existing schema names
 from ..schemas import (
     PredictMixRequest, PredictMixResponse,
+    PredictMixBatchRequest, PredictMixBatchResponse,
     PredictImageRequest, PredictImageResponse, PredictPadResponse
 )
 
 router = APIRouter()
 
+def _log_prediction(db: Session, fields: dict, integrity_detail: str = "Invalid brakepad_id",
+                    write_behind: bool = True) -> None:
+    """
+    Persist one Prediction row for audit/expert-in-the-loop.
+    With PREDICTION_WRITE_BEHIND on, the row is queued for the background flusher
+    (503 if the queue is full); otherwise it is inserted and committed inline.
+    write_behind=False always writes inline (callers that read the row back).
+    Callers validate brakepad_id before calling this.
+    """
+    writer = get_prediction_writer() if write_behind else None
+    if writer is not None:
+        try:
+            writer.submit(fields)
+        except PredictionQueueFull:
+            raise HTTPException(status_code=503, detail="Prediction log is busy, retry shortly",
+                                headers={"Retry-After": "1"})
+        return
+
+    db.add(Prediction(**fields))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=integrity_detail)
+
 @router.post("/material_mix", response_model=PredictMixResponse, name="predict:material_mix")
-def predict_material_mix(req: PredictMixRequest, db: Session = Depends(get_db)):
+async def predict_material_mix(
+    req: PredictMixRequest,
+    explain: bool = Query(True, description="Include per-feature explanation (set false for high-rate callers)"),
+    db: Session = Depends(get_db),
+):
     """
     Predict quality from a material mix/process parameters payload.
     Frontend calls POST /predict/material_mix.
     PredictMixRequest inherits attributes from MixIn base class
+    With MIX_BATCHER=1, concurrent requests are scored and logged together
+    (utils/mix_batcher.py); the response is the same.
     """
+    batcher = get_mix_batcher()
+    if batcher is None:
+        return await run_in_threadpool(_predict_material_mix_sync, req, explain, db)
+    bp_id = getattr(req, "brakepad_id", None) or None
     try:
-        result = predict_mix(req.dict())
+        return await batcher.submit(req.dict(), bp_id, explain)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except MixBatcherBusy:
+        raise HTTPException(status_code=503, detail="Mix scoring is busy, retry shortly",
+                            headers={"Retry-After": "1"})
+    except PredictionQueueFull:
+        raise HTTPException(status_code=503, detail="Prediction log is busy, retry shortly",
+                            headers={"Retry-After": "1"})
+
+def _predict_material_mix_sync(req: PredictMixRequest, explain: bool, db: Session) -> dict:
+    try:
+        result = predict_mix(req.dict(), explain=explain)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"predict_mix failed: {e}")
 
@@ -39,109 +104,393 @@ def predict_material_mix(req: PredictMixRequest, db: Session = Depends(get_db)):
         if not exists:
             raise HTTPException(status_code=400, detail=f"Unknown brakepad_id: {bp_id}")
         
-    pred = Prediction(
+    _log_prediction(db, dict(
         brakepad_id=bp_id,                    # ← None is OK now
         kind=PredictionKind.MIX,
         model_version=result.get("model_version", "demo"),
         label=result.get("label"),
         score=result.get("score", 0.0),           # score = P(FAIL)
         explanation_json=result.get("explanation"),  # shap/weights/etc.
-    )
-    db.add(pred)
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        # if someone sends an invalid FK despite our check
-        raise HTTPException(status_code=400, detail="Invalid brakepad_id")
+    ))  # IntegrityError -> 400 if someone sends an invalid FK despite our check
 
     # result already includes quality/probability (UI aliases)
     return result
 
 # Back-compat alias so older clients using /predict/mix continue to work
 @router.post("/mix", response_model=PredictMixResponse, include_in_schema=False)
-def predict_material_mix_alias(req: PredictMixRequest, db: Session = Depends(get_db)):
-    return predict_material_mix(req, db)
+async def predict_material_mix_alias(req: PredictMixRequest, explain: bool = Query(True), db: Session = Depends(get_db)):
+    return await predict_material_mix(req, explain, db)
 
 
-@router.post("/image", response_model=PredictImageResponse, name="predict:image")
-def predict_image(req: PredictImageRequest, db: Session = Depends(get_db)):
+def _validation_message(e: ValidationError) -> str:
+    parts = []
+    for err in e.errors():
+        loc = ".".join(str(x) for x in err.get("loc", ()))
+        parts.append(f"{loc}: {err['msg']}" if loc else err["msg"])
+    return "; ".join(parts)
+
+@router.post("/material_mix/batch", response_model=PredictMixBatchResponse, name="predict:material_mix_batch")
+def predict_material_mix_batch(
+    req: PredictMixBatchRequest,
+    explain: bool = Query(True, description="Include per-feature explanation for each item"),
+    db: Session = Depends(get_db),
+):
     """
-    Run the CV model over a base64 image (synthetic or captured) and return detected defects.
+    Score many material mixes in one call.
+    - each item is a PredictMixRequest, validated individually (bad items get an error, the rest still score)
+    - all brakepad_ids are checked with a single IN query
+    - valid items are scored together and their Prediction rows inserted in one transaction
     """
+    results: list[dict] = [None] * len(req.items)
+    valid: list[tuple[int, PredictMixRequest]] = []
+    for i, raw in enumerate(req.items):
+        try:
+            valid.append((i, PredictMixRequest.model_validate(raw)))
+        except ValidationError as e:
+            results[i] = {"index": i, "ok": False, "error": _validation_message(e)}
+
+    # FK check for every referenced pad in one round trip
+    wanted = {item.brakepad_id for _, item in valid if item.brakepad_id}
+    known = set()
+    if wanted:
+        known = {row[0] for row in db.query(BrakePad.id).filter(BrakePad.id.in_(wanted)).all()}
+    scorable = []
+    for i, item in valid:
+        if item.brakepad_id and item.brakepad_id not in known:
+            results[i] = {"index": i, "ok": False, "error": f"Unknown brakepad_id: {item.brakepad_id}"}
+        else:
+            scorable.append((i, item))
+
+    if scorable:
+        try:
+            scored = predict_mix_batch([item for _, item in scorable], explain=explain)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"predict_mix failed: {e}")
+
+        rows = []
+        for (i, item), result in zip(scorable, scored):
+            results[i] = {"index": i, "ok": True, "result": result}
+            rows.append({
+                "brakepad_id": item.brakepad_id or None,
+                "kind": PredictionKind.MIX,
+                "model_version": result.get("model_version", "demo"),
+                "label": result.get("label"),
+                "score": result.get("score", 0.0),
+                "explanation_json": result.get("explanation"),
+            })
+        # one multi-row INSERT + one COMMIT for the whole batch
+        try:
+            db.execute(insert(Prediction), rows)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            # a pad was deleted between the IN check and the insert
+            raise HTTPException(status_code=400, detail="Invalid brakepad_id in batch")
+
+    succeeded = sum(1 for r in results if r["ok"])
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+async def _run_analysis(fn, *args) -> dict:
+    """
+    fn(*args) (analyze_image or analyze_or_match) off the event loop: in the
+    process pool when it is running (503 if its queue is full or a worker
+    died mid-task), otherwise in the AnyIO threadpool.
+    """
+    pool = get_analysis_pool()
     try:
-        result = analyze_image(req.image_base64, req.brakepad_id)
+        if pool is not None:
+            try:
+                fut = pool.submit(fn, *args)
+            except AnalysisPoolBusy:
+                raise HTTPException(status_code=503, detail="Image analysis is busy, retry shortly",
+                                    headers={"Retry-After": "1"})
+            return await asyncio.wrap_future(fut)
+        return await run_in_threadpool(fn, *args)
+    except HTTPException:
+        raise
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except BrokenProcessPool:
+        # not the image's fault: the pool is replaced on the next submit
+        raise HTTPException(status_code=503, detail="Image analysis worker crashed, retry shortly",
+                            headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"analyze_image failed: {e}")
 
-    bp_id = req.brakepad_id or None
+def _log_image_prediction(db: Session, result: dict, brakepad_id: str | None) -> None:
+    """Validate the pad and log the IMAGE prediction (blocking; run in the threadpool)."""
+    bp_id = brakepad_id or None
     if bp_id:
         exists = db.query(BrakePad.id).filter(BrakePad.id == bp_id).first()
         if not exists:
             raise HTTPException(400, detail=f"Unknown brakepad_id: {bp_id}")
 
-    pred = Prediction(
+    _log_prediction(db, dict(
         brakepad_id=bp_id,
         kind=PredictionKind.IMAGE,
         model_version=result.get("model_version", "demo"),
         label=",".join(result.get("defects", [])),
         score=result.get("score", 0.0),
-        explanation_json={"stage_guess": result.get("stage_guess")},
-    )
-    db.add(pred)
+        explanation_json={"stage_guess": result.get("stage_guess"), "findings": result.get("findings"),
+                          "tiles": result.get("tiles"), "cache_hit": result.get("cache_hit", False)},
+    ))
+
+def _cache_hit(cached: dict) -> dict:
+    # the stored peak RSS belongs to the request that analysed the frame, not this one
+    return {**cached, "cache_hit": True, "peak_rss_mb": None, "peak_rss_scope": "cached"}
+
+def _frame_key(image: str | bytes) -> tuple[bytes, str]:
+    data = image_bytes(image)
+    return data, hashlib.sha1(data).hexdigest()
+
+async def _analyze_image_cached(image: str | bytes | None, brakepad_id: str | None, tiled: bool = False) -> dict:
+    """
+    Frame cache in front of analysis: identical / near-identical frames skip the detectors.
+    Only the bytes are hashed here; the frame is decoded once, in the analysis worker.
+    """
+    if frame_cache is None or not image:
+        return {**await _run_analysis(analyze_image, image, brakepad_id, tiled), "cache_hit": False}
     try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=400, detail="Invalid brakepad_id")
+        data, key = await run_in_threadpool(_frame_key, image)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"analyze_image failed: {e}")
+
+    scope = brakepad_id or None  # near-duplicates only within one pad's frames
+    if tiled:  # tiled and downscaled results are cached separately
+        key, scope = key + ":tiled", scope and scope + ":tiled"
+    cached = frame_cache.get(key)
+    if cached is not None:
+        return _cache_hit(cached)
+    # bytes: no second base64 decode
+    result = await _run_analysis(analyze_or_match, data, tiled, frame_cache.candidates(scope),
+                                 frame_cache.max_distance)
+    if "near_key" in result:
+        cached = frame_cache.get_near(result["near_key"])
+        if cached is not None:
+            return _cache_hit(cached)
+        result = await _run_analysis(analyze_or_match, data, tiled, [], -1)  # matched entry expired meanwhile
+    dh = result.pop("dhash")
+    frame_cache.put(key, dh, result, scope)
+    return {**result, "cache_hit": False}
 
+async def _predict_image_impl(db: Session, image: str | bytes | None, brakepad_id: str | None,
+                              tiled: bool = False) -> dict:
+    """Shared by the JSON/base64 and the binary upload routes: analyze, validate pad, log."""
+    result = await _analyze_image_cached(image, brakepad_id, tiled)
+    await run_in_threadpool(_log_image_prediction, db, result, brakepad_id)
     return result
 
+_TILED_HELP = ("Analyse at full resolution in overlapping tiles (large line-scan frames). "
+               "The whole frame is decoded in memory (~4 bytes/pixel), so tiled frames are "
+               "limited to IMAGE_TILED_MAX_PIXELS (413 above it)")
+
+@router.post("/image", response_model=PredictImageResponse, name="predict:image")
+async def predict_image(
+    req: PredictImageRequest,
+    tiled: bool = Query(False, description=_TILED_HELP),
+    db: Session = Depends(get_db),
+):
+    """
+    Run the CV model over a base64 image (synthetic or captured) and return detected defects.
+    """
+    return await _predict_image_impl(db, req.image_base64, req.brakepad_id, tiled)
+
+_MULTIPART_OVERHEAD = 64 * 1024  # boundaries, part headers and the brakepad_id field
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"image exceeds {IMAGE_MAX_BYTES} bytes")
+
+def _declared_length(request: Request) -> int | None:
+    try:
+        return int(request.headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+async def _read_octet_stream(request: Request) -> bytes:
+    """Read the raw body chunk by chunk, stopping at IMAGE_MAX_BYTES; one join, no extra copies."""
+    declared = _declared_length(request)
+    if declared is not None and declared > IMAGE_MAX_BYTES:
+        raise _too_large()
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > IMAGE_MAX_BYTES:
+            raise _too_large()
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+@router.post("/image/upload", response_model=PredictImageResponse, name="predict:image_upload")
+async def predict_image_upload(
+    request: Request,
+    brakepad_id: str | None = Query(None, description="Pad UUID (or send as a 'brakepad_id' form field)"),
+    tiled: bool = Query(False, description=_TILED_HELP),
+    db: Session = Depends(get_db),
+):
+    """
+    Binary variant of POST /predict/image, without the base64/JSON overhead.
+      multipart/form-data:       'file' (or 'image') part + optional 'brakepad_id' field
+      application/octet-stream:  raw image bytes as the body, brakepad_id as a query param
+    Oversized bodies are refused on Content-Length before anything is read; raw bodies
+    without one (chunked) are counted as they stream in. Multipart needs a Content-Length
+    (411 otherwise), since the form parser spools parts to disk before we see their size;
+    the server holds the body to its declared length. The bytes go straight to the decoder.
+    """
+    ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if ctype == "multipart/form-data":
+        declared = _declared_length(request)
+        if declared is None:
+            raise HTTPException(status_code=411, detail="multipart uploads need a Content-Length; "
+                                                        "send chunked bodies as application/octet-stream")
+        if declared > IMAGE_MAX_BYTES + _MULTIPART_OVERHEAD:
+            raise _too_large()
+        form = await request.form(max_files=1, max_fields=10)
+        try:
+            upload = form.get("file") or form.get("image")
+            if not isinstance(upload, UploadFile):
+                raise HTTPException(status_code=400, detail="multipart body needs a 'file' part")
+            if upload.size is not None and upload.size > IMAGE_MAX_BYTES:
+                raise _too_large()
+            data = await upload.read()
+            brakepad_id = brakepad_id or form.get("brakepad_id") or None
+        finally:
+            await form.close()
+    elif ctype in ("application/octet-stream", "") or ctype.startswith("image/"):
+        data = await _read_octet_stream(request)
+    else:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {ctype}")
+
+    if not data:
+        raise HTTPException(status_code=400, detail="empty image body")
+    return await _predict_image_impl(db, data, brakepad_id, tiled)
+
+@router.post("/image/batch", name="predict:image_batch")
+def predict_image_batch(
+    archive: str | None = Query(None, description="Archive (.zip/.tar/.tar.gz) inside IMAGE_DIR; default: IMAGE_DIR itself"),
+    workers: int | None = Query(None, description="Analysis processes (default: one per core)"),
+    rescore: bool = Query(False, description="Re-analyse pads already scored for the current model version"),
+    tiled: bool = Query(False, description=_TILED_HELP),
+):
+    """
+    Background job: analyse every pad_<serial> image in IMAGE_DIR (or an archive
+    in it) and bulk-write IMAGE predictions. Poll GET /setup/jobs/{id}.
+    """
+    img_dir = get_image_dir().resolve()
+    source = img_dir
+    if archive:
+        source = (img_dir / archive).resolve()
+        if source.parent != img_dir or not source.name.lower().endswith(ARCHIVE_SUFFIXES) or not source.is_file():
+            raise HTTPException(status_code=400, detail=f"Not an archive in the image directory: {archive}")
+
+    params = {"source": str(source), "workers": workers, "rescore": rescore, "tiled": tiled}
+
+    def run(job):
+        with SessionLocal() as db:
+            return run_batch_inference(db, source, workers=workers, rescore=rescore, tiled=tiled, job=job)
+
+    job = jobs.submit("image_batch", run, params)
+    return {"job_id": job.id, "status": job.status, "status_url": f"/setup/jobs/{job.id}"}
+
+@router.post("/backfill", name="predict:backfill")
+def predict_backfill(
+    chunk_size: int = Query(1000, ge=1, le=50000),
+    max_rows_per_sec: float = Query(2000.0, ge=0, description="Write throttle (0 = unthrottled)"),
+    explain: bool = Query(True, description="Store per-feature importances (what /predict/pad returns; without them it re-scores the pad)"),
+    restart: bool = Query(False, description="Ignore the checkpoint and re-score every pad"),
+):
+    """
+    Background job: write a MIX prediction for every pad with a material mix
+    under the current model parameters, resuming from the last checkpoint.
+    Poll GET /setup/jobs/{id}.
+    """
+    params = {"chunk_size": chunk_size, "max_rows_per_sec": max_rows_per_sec, "explain": explain,
+              "restart": restart}
+
+    def run(job):
+        with SessionLocal() as db:
+            return run_mix_backfill(db, chunk_size=chunk_size, max_rows_per_sec=max_rows_per_sec,
+                                    explain=explain, restart=restart, job=job)
+
+    job = jobs.submit("mix_backfill", run, params)
+    return {"job_id": job.id, "status": job.status, "status_url": f"/setup/jobs/{job.id}"}
+
+_MIX_COLUMNS = [getattr(MaterialMix, k) for k in ml_model.FEATURES]
+
+def _as_utc(ts: datetime | None) -> datetime | None:
+    # SQLite hands back naive datetimes for timestamps stored as UTC
+    return ts.replace(tzinfo=timezone.utc) if ts is not None and ts.tzinfo is None else ts
+
 @router.get("/pad", response_model=PredictPadResponse, name="predict:pad")
 def predict_for_pad(
     id: str = Query(..., description="Pad UUID or serial_number"),
+    force: bool = Query(False, description="Re-score and log a new Prediction even if the stored one is current"),
     db: Session = Depends(get_db),
 ):
     """
-    Predict quality for a *specific pad* by loading its latest MaterialMix
-    and calling the same predict_mix() logic under the hood.
+    Predict quality for a *specific pad* from its latest MaterialMix, using
+    the same predict_mix() logic as /predict/material_mix.
     Accepts either BrakePad.id (UUID) or BrakePad.serial_number.
+
+    Idempotent: when the pad's latest MIX prediction for this MODEL_VERSION
+    was computed from the same inputs and parameters (input_hash) and has
+    its explanation stored, it is returned as-is and nothing is written.
+    force=true always re-scores.
+    New predictions are written inline, bypassing write-behind, so a repeat
+    call sees them instead of logging a duplicate.
     """
-    # 1) Find the pad by id or serial_number
-    pad = (
-        db.query(BrakePad)
-        .filter(or_(BrakePad.id == id, BrakePad.serial_number == id))
-        .first()
+    # 1) Pad + its latest mix + its latest prediction for this model, in one round trip
+    latest_pred = (
+        select(Prediction.id)
+        .where(
+            Prediction.brakepad_id == BrakePad.id,
+            Prediction.kind == PredictionKind.MIX,
+            Prediction.model_version == ml_model.MODEL_VERSION,
+        )
+        .order_by(Prediction.created_at.desc(), Prediction.id.desc())
+        .limit(1)
+        .correlate(BrakePad)
+        .scalar_subquery()
     )
-    if not pad:
-        raise HTTPException(status_code=404, detail=f"Pad not found: {id}")
-
-    # 2) Get the most recent material mix for this pad
-    mix = (
-        db.query(MaterialMix)
-        .filter(MaterialMix.brakepad_id == pad.id)
+    row = db.execute(
+        select(
+            BrakePad.id, BrakePad.serial_number, MaterialMix.id.label("mix_id"), *_MIX_COLUMNS,
+            Prediction.label, Prediction.score, Prediction.explanation_json,
+            Prediction.input_hash, Prediction.created_at,
+        )
+        .outerjoin(MaterialMix, MaterialMix.brakepad_id == BrakePad.id)
+        .outerjoin(Prediction, Prediction.id == latest_pred)
+        .where(or_(BrakePad.id == id, BrakePad.serial_number == id))
         .order_by(MaterialMix.id.desc())
-        .first()
-    )
-    if not mix:
+        .limit(1)
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Pad not found: {id}")
+    if row.mix_id is None:
         raise HTTPException(
             status_code=400,
-            detail=f"No material mix found for pad {pad.serial_number or pad.id}",
+            detail=f"No material mix found for pad {row.serial_number or row.id}",
         )
 
-    # 3) Build payload expected by predict_mix() The exact features we used to predict (matches model.py)
-    mix_payload = {
-        "resin_pct":        mix.resin_pct,
-        "fiber_pct":        mix.fiber_pct,
-        "metal_powder_pct": mix.metal_powder_pct,
-        "filler_pct":       mix.filler_pct,
-        "abrasives_pct":    mix.abrasives_pct,
-        "binder_pct":       mix.binder_pct,
-        "temp_c":           mix.temp_c,
-        "pressure_mpa":     mix.pressure_mpa,
-        "cure_time_s":      mix.cure_time_s,
-        "moisture_pct":     mix.moisture_pct,
-    }
+    # 2) The exact features the model scores (matches model.py)
+    mix_payload = {k: getattr(row, k) for k in ml_model.FEATURES}
+    pad_meta = {"id": row.id, "serial_number": row.serial_number}
+    try:
+        input_hash = ml_model.mix_input_hash(mix_payload)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"predict_mix failed: {e}")
+
+    # 3) Unchanged since the last prediction: serve it, don't log a duplicate
+    if (not force and row.input_hash == input_hash and row.score is not None
+            and row.explanation_json is not None):
+        raw = ml_model.stored_result(row.label, row.score, row.explanation_json)
+        return {**raw, "pad": pad_meta, "material_mix": mix_payload,
+                "reused": True, "predicted_at": _as_utc(row.created_at)}
 
     # 4) Run the model
     try:
@@ -150,30 +499,23 @@ def predict_for_pad(
         raise HTTPException(status_code=400, detail=f"predict_mix failed: {e}")
 
     # 5) Persist for audit / expert-in-the-loop Log prediction
-    pred = Prediction(
-        brakepad_id=pad.id,
+    now = datetime.now(timezone.utc)
+    _log_prediction(db, dict(
+        brakepad_id=row.id,
         kind=PredictionKind.MIX,  # reusing MIX since we predicted from the material mix
         model_version=raw.get("model_version", "demo"),
         label=raw.get("label"),
         score=raw.get("score", 0.0),
         explanation_json=raw.get("explanation"),
-    )
-    db.add(pred)
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=400, detail="Failed to log prediction")
+        input_hash=input_hash,
+        created_at=now,
+    ), integrity_detail="Failed to log prediction", write_behind=False)
 
     # 6) Enrich response with pad meta + material mix used
-    return {
-        **raw,
-        "pad": {"id": pad.id, "serial_number": pad.serial_number},
-        "material_mix": mix_payload,
-    }
+    return {**raw, "pad": pad_meta, "material_mix": mix_payload, "reused": False, "predicted_at": now}
 
 @router.get("/nominal", name="predict:nominal")
-def get_nominal():
+async def get_nominal():  # no I/O: runs on the event loop, no threadpool hop
     """
     Model metadata for UI highlighting: nominal ranges, weights, and thresholds.
     """
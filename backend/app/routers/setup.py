@@ -1,44 +1,69 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from ..database import SessionLocal
 from ..deps import get_db
 from ..utils.seed import seed_factory
-from ..utils.synthetic import generate_synthetic_pads  # DB-side generator
-from ..utils.images import generate_image_set, get_image_dir
+from ..utils.synthetic import iter_bulk_pads  # DB-side generator
+from ..utils.images import (
+    generate_image_set, get_image_dir, render_image_task, resolve_base_seed, resolve_workers
+)
+from ..utils.jobs import jobs, Job, JobCancelled, JobLimitReached
 
 router = APIRouter()
 
+# each background generate job starts its own render pool (one process per
+# worker), so only this many run at once; more are refused with 409
+GENERATE_MAX_JOBS = int(os.getenv("GENERATE_MAX_JOBS", "1"))
+
 @router.post("/seed")
 def seed(db: Session = Depends(get_db)):
     return seed_factory(db)
 
 @router.post("/generate")
-def generate(count: int = 150, lines: int = 2, belts_per_line: int = 3, db: Session = Depends(get_db)):
+def generate(
+    count: int = 150,
+    lines: int = 2,
+    belts_per_line: int = 3,
+    background: bool = False,
+    chunk_size: int = 1000,
+    workers: int | None = None,
+    seed: int | None = None,
+    db: Session = Depends(get_db),
+):
     """
     1) Create synthetic BrakePad rows in DB
     2) Generate synthetic images for those pads
     3) Return a compact summary
-    """
-    # 1) Create pads in DB
-    try:
-        pads = generate_synthetic_pads(db, count=count, lines=lines, belts_per_line=belts_per_line, create_mixes=True)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"generate_synthetic_pads failed: {e!s}")
 
-    # 2) Build image metadata from pads (be tolerant of Enum vs str)
-    def to_pad_type(pt):
+    background=true: return a job id immediately and run DB inserts and image
+    rendering as an overlapping pipeline; poll GET /setup/jobs/{id}.
+    At most GENERATE_MAX_JOBS run at once (409 beyond that).
+    """
+    if background:
+        params = {"count": count, "belts_per_line": belts_per_line,
+                  "chunk_size": chunk_size, "workers": workers, "seed": seed}
         try:
-            return pt.value if hasattr(pt, "value") else str(pt)
-        except Exception:
-            return "TRANSIT"
+            job = jobs.submit("generate", lambda j: _generate_job(j, **params), params,
+                              max_active=max(1, GENERATE_MAX_JOBS))
+        except JobLimitReached as e:
+            raise HTTPException(status_code=409, detail=f"{e}; cancel it or wait for it to finish")
+        return {"job_id": job.id, "status": job.status, "status_url": f"/setup/jobs/{job.id}"}
 
+    # 1) Create pads in DB (chunked bulk insert; plain dicts, no ORM objects)
     pad_infos = []
-    for p in pads:
-        pad_infos.append({
-            "id": getattr(p, "id", None),
-            "serial_number": getattr(p, "serial_number", None),
-            "pad_type": to_pad_type(getattr(p, "pad_type", "TRANSIT")),
-            "stage_name": getattr(getattr(p, "stage", None), "name", None),
-        })
+    try:
+        for rows in iter_bulk_pads(db, count, belts_per_line=belts_per_line, create_mixes=True):
+            # 2) Build image metadata from pads
+            pad_infos.extend(
+                {"id": r["id"], "serial_number": r["serial_number"],
+                 "pad_type": r["pad_type"], "stage_name": r["stage_name"]}
+                for r in rows
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"generate_synthetic_pads failed: {e!s}")
 
     # 3) Generate images
     try:
@@ -48,7 +73,82 @@ def generate(count: int = 150, lines: int = 2, belts_per_line: int = 3, db: Sess
 
     return {
         "status": "ok",
-        "pads_created": len(pads),
+        "pads_created": len(pad_infos),
         "images_created": len(images),
         "image_dir": str(get_image_dir()),
-    }
\ No newline at end of file
+    }
+
+def _generate_job(job: Job, count: int, belts_per_line: int, chunk_size: int, workers: int | None, seed: int | None):
+    """
+    Pipeline: the job thread inserts pads chunk by chunk while the previous
+    chunks' images render in a pool (processes, or one thread when workers=1).
+    At most a few chunks are in flight, so memory stays bounded.
+    """
+    job.update(pads_total=count, pads_done=0, images_done=0)
+    img_dir = str(get_image_dir())
+    base_seed = resolve_base_seed(seed)
+    workers = resolve_workers(workers)
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        pool = ThreadPoolExecutor(max_workers=1)
+    max_in_flight = max(2, workers) * chunk_size
+
+    pending = set()
+
+    def collect(done):
+        for f in done:
+            try:
+                f.result()
+                job.incr("images_done")
+            except Exception as e:
+                job.add_error(f"image: {e!s}")
+
+    index = 0
+    try:
+        with SessionLocal() as db:
+            for rows in iter_bulk_pads(db, count, chunk_size=chunk_size, belts_per_line=belts_per_line,
+                                       create_mixes=True, seed=seed):
+                job.incr("pads_done", len(rows))
+                for r in rows:
+                    index += 1
+                    info = {"id": r["id"], "serial_number": r["serial_number"],
+                            "pad_type": r["pad_type"], "stage_name": r["stage_name"]}
+                    pending.add(pool.submit(render_image_task, (index, info, img_dir, base_seed)))
+                # backpressure: don't let rendering fall arbitrarily far behind inserts
+                while len(pending) > max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                job.check_cancelled()
+        while pending:
+            job.check_cancelled()
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            collect(done)
+    except JobCancelled:
+        for f in pending:
+            f.cancel()
+        raise
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    return {"pads_created": job.progress["pads_done"], "images_created": job.progress["images_done"],
+            "image_dir": img_dir}
+
+@router.get("/jobs")
+def list_jobs():
+    return [j.to_dict() for j in jobs.list()]
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+@router.post("/jobs/{job_id}/cancel")
+@router.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
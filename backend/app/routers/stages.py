@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from ..deps import get_db
-from ..models import Stage
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..deps import get_async_read_db
+from ..utils.refcache import refcache
 
 router = APIRouter()
 
 @router.get("")  # GET /stages
-def list_stages(line_id: int | None = Query(None), db: Session = Depends(get_db)):
-    q = db.query(Stage)
+async def list_stages(request: Request, response: Response, line_id: int | None = Query(None),
+                      db: AsyncSession = Depends(get_async_read_db)):
+    # served from the in-memory reference cache; ETag lets clients revalidate for free
+    # (the session is only touched if the cache needs a reload)
+    ref = await refcache.aget(db)
+    if request.headers.get("if-none-match") == ref.etag:
+        return Response(status_code=304, headers={"ETag": ref.etag})
+    response.headers["ETag"] = ref.etag
+    rows = ref.stages_sorted
     if line_id:
-        q = q.filter(Stage.line_id == line_id)
-    rows = q.order_by(Stage.sequence.asc(), Stage.id.asc()).all()
-    return [{"id": s.id, "name": s.name, "sequence": s.sequence, "line_id": s.line_id} for s in rows]
\ No newline at end of file
+        rows = [s for s in rows if s["line_id"] == line_id]
+    return [{"id": s["id"], "name": s["name"], "sequence": s["sequence"], "line_id": s["line_id"]} for s in rows]
\ No newline at end of file
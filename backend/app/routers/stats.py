@@ -1,33 +1,52 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..deps import get_db
-from ..models import BrakePad, AssemblyLine, PadStatus
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..deps import get_async_read_db
+from ..models import BrakePad, PadStatus, PadStatusCount
+from ..utils.rollup import rollup_active
+from ..utils.refcache import refcache
 
 router = APIRouter()
 
-def _line_stats_impl(db: Session):
-    lines = db.query(AssemblyLine).all()
+async def _line_stats_impl(db: AsyncSession):
+    # One grouped aggregate instead of 4 COUNTs per line; served from the
+    # pad_status_counts rollup (O(lines*stages)) when it is active.
+    if rollup_active():
+        stmt = (
+            select(PadStatusCount.line_id, PadStatusCount.status, func.sum(PadStatusCount.count))
+            .group_by(PadStatusCount.line_id, PadStatusCount.status)
+        )
+    else:
+        stmt = (
+            select(BrakePad.line_id, BrakePad.status, func.count())  # count(*): index-only on (line_id, status)
+            .group_by(BrakePad.line_id, BrakePad.status)
+        )
+    counts = (await db.execute(stmt)).all()
+    by_line: dict[int, dict] = {}
+    for line_id, status, n in counts:
+        by_line.setdefault(line_id, {})[status] = int(n or 0)
+
     out = []
-    for ln in lines:
-        q = db.query(BrakePad).filter(BrakePad.line_id == ln.id)
-        total = q.count()
-        passed = q.filter(BrakePad.status == PadStatus.PASSED).count()
-        failed = q.filter(BrakePad.status == PadStatus.FAILED).count()
-        inprog = q.filter(BrakePad.status == PadStatus.IN_PROGRESS).count()
+    for line_id, ln in (await refcache.aget(db)).lines.items():  # line names from the reference cache
+        name = ln["name"]
+        c = by_line.get(line_id, {})
+        passed = c.get(PadStatus.PASSED, 0)
+        failed = c.get(PadStatus.FAILED, 0)
+        inprog = c.get(PadStatus.IN_PROGRESS, 0)
         out.append(
-            {"line": ln.name, "total": total, "passed": passed, "failed": failed, "in_progress": inprog}
+            {"line": name, "total": sum(c.values()), "passed": passed, "failed": failed, "in_progress": inprog}
         )
     return out
 
 # Canonical path used by frontend: /stats/lines
 @router.get("/lines")
-def line_stats(db: Session = Depends(get_db)):
+async def line_stats(db: AsyncSession = Depends(get_async_read_db)):
     """Pass/Fail/In-progress counts per line — canonical: '/stats/lines'."""
-    return _line_stats_impl(db)
+    return await _line_stats_impl(db)
 
 # Optional convenience alias: /stats  (same payload)
 @router.get("")
 @router.get("/")
-def line_stats_root(db: Session = Depends(get_db)):
+async def line_stats_root(db: AsyncSession = Depends(get_async_read_db)):
     """Alias for '/stats': returns the same line stats."""
-    return _line_stats_impl(db)
\ No newline at end of file
+    return await _line_stats_impl(db)
\ No newline at end of file
@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel, Field, AliasChoices, ConfigDict, model_validator
-from typing import List, Optional, Literal, Dict
+from typing import Any, List, Optional, Literal, Dict
 
 class LineStats(BaseModel):
     line: str
@@ -58,14 +59,43 @@ class PredictMixResponse(BaseModel):
     # makes it flexible to populate by field-name too
     model_config = ConfigDict(populate_by_name=True)
 
+# --- batch scoring: items are validated one by one so a bad item
+#     (e.g. mix not summing to 100) only fails itself, not the whole batch ---
+MAX_MIX_BATCH = 5000
+
+class PredictMixBatchRequest(BaseModel):
+    items: list[dict[str, Any]] = Field(min_length=1, max_length=MAX_MIX_BATCH)
+
+class PredictMixBatchItem(BaseModel):
+    index: int
+    ok: bool
+    error: str | None = None
+    result: PredictMixResponse | None = None
+
+class PredictMixBatchResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: list[PredictMixBatchItem]
+
 class PredictImageRequest(BaseModel):
     brakepad_id: Optional[str] = None
     image_base64: Optional[str] = None
 
+class DefectFinding(BaseModel):
+    defect: str
+    confidence: float
+    bbox: list[int]  # [x0, y0, x1, y1] in original image pixels
+
 class PredictImageResponse(BaseModel):
     defects: list[str] = []
     score: float | None = None
     stage_guess: str | None = None
+    findings: list[DefectFinding] = []
+    cache_hit: bool = False  # served from the repeated-frame cache
+    tiles: int | None = None  # tiles analysed (1 = whole frame)
+    peak_rss_mb: float | None = None
+    peak_rss_scope: str | None = None  # "request", "process" (platform can't reset the peak) or "cached"
 
     ml_model_version: str = Field(
         ...,
@@ -95,4 +125,6 @@ class PadMeta(BaseModel):
 # --- NEW: response for /predict/pad that includes pad & material_mix ---
 class PredictPadResponse(PredictMixResponse):
     pad: PadMeta | None = None
-    material_mix: MaterialMixOut | None = None
\ No newline at end of file
+    material_mix: MaterialMixOut | None = None
+    reused: bool = False  # stored Prediction for the same mix + model parameters, nothing written
+    predicted_at: datetime | None = None
\ No newline at end of file
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ..ml import model as ml_model
+from ..models import BackfillCheckpoint, BrakePad, MaterialMix, Prediction, PredictionKind
+from .jobs import Job
+
+# ---------------------------------------------------------------------
+# Re-score every pad that has a MaterialMix after the mix model changes
+# (MODEL_VERSION, NOMINAL, WEIGHTS, threshold, risk band).
+#   - brake_pads JOIN material_mixes is read in brake_pads.id order; on
+#     PostgreSQL through a server-side cursor (yield_per) on its own
+#     connection, elsewhere as keyset pages
+#   - each chunk is scored in one predict_mix_batch() pass and its
+#     Prediction rows are inserted together with the checkpoint, in one
+#     transaction, so a rerun resumes after the last committed chunk
+#   - pads whose latest MIX prediction for this MODEL_VERSION already has
+#     the current input_hash are skipped. explain=False rows get their own
+#     hash (mix_input_hash(..., explain=False)): a --no-explain run skips
+#     pads that are already scored either way, a full run replaces them
+#   - the checkpoint is named after the parameter hash: a new model starts
+#     from the beginning. brake_pads.id is a random uuid4, so pads added
+#     after a run can sort before the checkpoint; a rerun of a completed
+#     checkpoint therefore rescans everything and, with the skip above,
+#     writes only pads added (or whose mix changed) since the last run
+#   - max_rows_per_sec throttles the writes so the live API keeps its share
+#     of the database
+# Rows carry input_hash, so GET /predict/pad serves them without re-scoring
+# (explained rows only; it re-scores pads backfilled with explain=False).
+# ---------------------------------------------------------------------
+_MIX_COLUMNS = [getattr(MaterialMix, k) for k in ml_model.FEATURES]
+
+
+def checkpoint_name() -> str:
+    return f"mix:{ml_model.MODEL_VERSION}:{ml_model.params_hash()}"
+
+
+def _query(after: Optional[str]):
+    latest_hash = (
+        select(Prediction.input_hash)
+        .where(
+            Prediction.brakepad_id == BrakePad.id,
+            Prediction.kind == PredictionKind.MIX,
+            Prediction.model_version == ml_model.MODEL_VERSION,
+        )
+        .order_by(Prediction.created_at.desc(), Prediction.id.desc())
+        .limit(1)
+        .correlate(BrakePad)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(BrakePad.id, latest_hash.label("latest_hash"), *_MIX_COLUMNS)
+        .join(MaterialMix, MaterialMix.brakepad_id == BrakePad.id)
+        .order_by(BrakePad.id)
+    )
+    if after is not None:
+        stmt = stmt.where(BrakePad.id > after)
+    return stmt
+
+
+def _stream(db: Session, after: Optional[str], chunk_size: int) -> Iterator[list]:
+    """Chunks of (pad_id, latest input_hash, *features) rows after `after`, in pad id order."""
+    engine = db.get_bind()
+    if engine.dialect.name == "postgresql":
+        # separate connection: committing the write session must not close the cursor
+        with engine.connect() as conn:
+            result = conn.execute(_query(after).execution_options(yield_per=chunk_size))
+            for part in result.partitions():
+                yield part
+        return
+    # no server-side cursors (SQLite): an open read would also block the writer's commit
+    while True:
+        part = db.execute(_query(after).limit(chunk_size)).all()
+        if not part:
+            return
+        yield part
+        after = part[-1][0]
+
+
+def _throttle(job: Job, written: int, t0: float, max_rows_per_sec: float) -> None:
+    if max_rows_per_sec <= 0:
+        return
+    wait = written / max_rows_per_sec - (time.monotonic() - t0)
+    while wait > 0 and not job.cancelled:
+        time.sleep(min(wait, 0.25))
+        wait = written / max_rows_per_sec - (time.monotonic() - t0)
+
+
+def run_mix_backfill(
+    db: Session,
+    *,
+    chunk_size: int = 1000,
+    max_rows_per_sec: float = 0.0,
+    explain: bool = True,
+    restart: bool = False,
+    job: Optional[Job] = None,
+) -> dict:
+    """
+    Write a MIX Prediction for every pad with a MaterialMix that has no
+    prediction for the current inputs and model parameters yet (restart=True:
+    for every pad). Progress/cancellation go through `job`.
+    """
+    job = job or Job("mix_backfill", {})
+    name = checkpoint_name()
+    cp = db.get(BackfillCheckpoint, name)
+    if cp is None:
+        cp = BackfillCheckpoint(name=name, rows_done=0)
+        db.add(cp)
+    elif restart:
+        cp.last_key, cp.rows_done, cp.completed_at = None, 0, None
+    elif cp.completed_at is not None:
+        # finished before: rescan for pads added since (their ids can sort anywhere)
+        cp.last_key, cp.completed_at = None, None
+    cp.updated_at = datetime.now(timezone.utc)
+    db.commit()
+    after = cp.last_key
+    job.update(checkpoint=name, resumed_after=after, pads_done=0, skipped_current=0, resumed_rows=cp.rows_done)
+
+    t0 = time.monotonic()
+    written = 0
+    for part in _stream(db, after, chunk_size):
+        job.check_cancelled()
+        todo = []
+        for r in part:
+            mix = dict(zip(ml_model.FEATURES, r[2:]))
+            h = ml_model.mix_input_hash(mix)
+            current = {h}
+            if not explain:
+                h = ml_model.mix_input_hash(mix, explain=False)
+                current.add(h)
+            if restart or r[1] not in current:
+                todo.append((r[0], mix, h))
+        job.incr("skipped_current", len(part) - len(todo))
+        now = datetime.now(timezone.utc)
+        rows = []
+        if todo:
+            scored = ml_model.predict_mix_batch([mix for _, mix, _ in todo], explain=explain)
+            rows = [{
+                "brakepad_id": pad_id,
+                "kind": PredictionKind.MIX,
+                "model_version": res["model_version"],
+                "label": res["label"],
+                "score": res["score"],
+                "explanation_json": res["explanation"],
+                "input_hash": h,
+                "created_at": now,
+            } for (pad_id, _, h), res in zip(todo, scored)]
+            db.execute(insert(Prediction), rows)
+        cp.last_key = part[-1][0]
+        cp.rows_done += len(rows)
+        cp.updated_at = now
+        db.commit()  # predictions and checkpoint together
+        written += len(rows)
+        job.incr("pads_done", len(rows))
+        _throttle(job, written, t0, max_rows_per_sec)
+
+    cp.completed_at = datetime.now(timezone.utc)
+    db.commit()
+    elapsed = time.monotonic() - t0
+    return {
+        "checkpoint": name,
+        "model_version": ml_model.MODEL_VERSION,
+        "predictions_written": written,
+        "total_for_model": cp.rows_done,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_sec": round(written / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+# python -m app.utils.backfill [--chunk-size 1000] [--max-rows-per-sec 0] [--restart]
+if __name__ == "__main__":
+    from ..database import SessionLocal
+
+    ap = argparse.ArgumentParser(description="Re-score every pad's material mix with the current model")
+    ap.add_argument("--chunk-size", type=int, default=1000)
+    ap.add_argument("--max-rows-per-sec", type=float, default=0.0, help="write throttle (0 = unthrottled)")
+    ap.add_argument("--no-explain", action="store_true", help="skip per-feature importances (GET /predict/pad then re-scores those pads)")
+    ap.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = ap.parse_args()
+
+    job = Job("mix_backfill", vars(args))
+    job.started_at = time.monotonic()
+    with SessionLocal() as db:
+        result = run_mix_backfill(db, chunk_size=args.chunk_size, max_rows_per_sec=args.max_rows_per_sec,
+                                  explain=not args.no_explain, restart=args.restart, job=job)
+    print(result)
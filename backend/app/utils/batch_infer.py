@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import re
+import tarfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ..ml.cv_defects import MODEL_VERSION, analyze_image
+from ..ml.pool import init_worker
+from ..models import BrakePad, Prediction, PredictionKind
+from .images import get_image_dir, resolve_workers
+from .jobs import Job
+
+# ---------------------------------------------------------------------
+# Bulk image inference over a directory or archive of pad images.
+#   - pad_<serial>.png (as written by generate_image_set) -> BrakePad by
+#     serial_number, falling back to id
+#   - pads that already have an IMAGE prediction for the current
+#     MODEL_VERSION are skipped, so an interrupted run resumes where it
+#     stopped (rescore=True analyses them again)
+#   - analysis fans out to a process pool; predictions are inserted and
+#     committed one chunk at a time
+# ---------------------------------------------------------------------
+IMAGE_NAME = re.compile(r"^pad_(?P<basis>.+)\.(?:png|jpe?g|webp|bmp|tiff?)$", re.IGNORECASE)
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+
+
+def _is_archive(path: Path) -> bool:
+    return path.is_file() and path.name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def list_images(source: Path) -> list[str]:
+    """Matching image names in a directory or archive, sorted."""
+    if _is_archive(source):
+        if source.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(source) as zf:
+                names = [i.filename for i in zf.infolist() if not i.is_dir()]
+        else:
+            with tarfile.open(source) as tf:
+                names = [m.name for m in tf.getmembers() if m.isfile()]
+    else:
+        names = [p.name for p in source.iterdir() if p.is_file()]
+    return sorted(n for n in names if IMAGE_NAME.match(Path(n).name))
+
+
+def _reader(source: Path) -> tuple[Callable[[str], bytes], Callable[[], None]]:
+    """(read(name) -> bytes, close) for a directory or archive."""
+    if _is_archive(source):
+        if source.name.lower().endswith(".zip"):
+            zf = zipfile.ZipFile(source)
+            return zf.read, zf.close
+        tf = tarfile.open(source)
+        return (lambda name: tf.extractfile(name).read()), tf.close
+    return (lambda name: (source / name).read_bytes()), (lambda: None)
+
+
+def _chunks(items: list, n: int) -> Iterator[list]:
+    for i in range(0, len(items), n):
+        yield items[i:i + n]
+
+
+def _match_pads(db: Session, names: list[str]) -> dict[str, str]:
+    """file name -> BrakePad.id for one chunk (one query on serial_number, one on id)."""
+    basis = {n: IMAGE_NAME.match(Path(n).name).group("basis") for n in names}
+    keys = set(basis.values())
+    by_serial = dict(db.execute(
+        select(BrakePad.serial_number, BrakePad.id).where(BrakePad.serial_number.in_(keys))).all())
+    rest = keys - by_serial.keys()
+    by_id = set(db.execute(select(BrakePad.id).where(BrakePad.id.in_(rest))).scalars()) if rest else set()
+    out = {}
+    for n, b in basis.items():
+        if b in by_serial:
+            out[n] = by_serial[b]
+        elif b in by_id:
+            out[n] = b
+    return out
+
+
+def _already_scored(db: Session, pad_ids: list[str]) -> set[str]:
+    if not pad_ids:
+        return set()
+    return set(db.execute(
+        select(Prediction.brakepad_id).distinct().where(
+            Prediction.brakepad_id.in_(pad_ids),
+            Prediction.kind == PredictionKind.IMAGE,
+            Prediction.model_version == MODEL_VERSION,
+        )).scalars())
+
+
+def run_batch_inference(
+    db: Session,
+    source: Optional[str | Path] = None,
+    *,
+    workers: Optional[int] = None,
+    chunk_size: int = 200,
+    rescore: bool = False,
+    tiled: bool = False,
+    job: Optional[Job] = None,
+) -> dict:
+    """
+    Analyse every pad image in `source` (default get_image_dir()) and write
+    Prediction(kind=IMAGE) rows. Progress/cancellation go through `job`.
+    workers: analysis processes; None or 0 = one per core (IMAGE_WORKERS is the
+    image generator's default and is not used here).
+    """
+    job = job or Job("image_batch", {})
+    src = Path(source) if source else get_image_dir()
+    if not src.exists():
+        raise FileNotFoundError(f"No such image directory or archive: {src}")
+    names = list_images(src)
+    job.update(images_total=len(names), images_done=0, skipped_scored=0, skipped_unmatched=0, failed=0)
+
+    workers = resolve_workers(workers or 0)
+    if workers > 1:
+        # spawn: the API process has DB/writer threads, which fork() doesn't mix well with
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=init_worker)
+    else:
+        pool = ThreadPoolExecutor(max_workers=1)
+    read, close = _reader(src)
+    written = 0
+    try:
+        for chunk in _chunks(names, chunk_size):
+            job.check_cancelled()
+            pads = _match_pads(db, chunk)
+            job.incr("skipped_unmatched", len(chunk) - len(pads))
+            done = set() if rescore else _already_scored(db, list(set(pads.values())))
+            todo = [(n, pid) for n, pid in pads.items() if pid not in done]
+            job.incr("skipped_scored", len(pads) - len(todo))
+
+            futures = {pool.submit(analyze_image, read(n), pid, tiled): (n, pid) for n, pid in todo}
+            rows = []
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for f in finished:
+                    name, pid = futures[f]
+                    try:
+                        r = f.result()
+                    except Exception as e:
+                        job.incr("failed")
+                        job.add_error(f"{name}: {e!s}")
+                        continue
+                    rows.append({
+                        "brakepad_id": pid,
+                        "kind": PredictionKind.IMAGE,
+                        "model_version": r["model_version"],
+                        "label": ",".join(r["defects"]),
+                        "score": r["score"],
+                        "explanation_json": {"stage_guess": r["stage_guess"], "findings": r["findings"],
+                                             "tiles": r["tiles"], "source": "batch", "file": name},
+                        "created_at": datetime.now(timezone.utc),
+                    })
+                    job.incr("images_done")
+                if job.cancelled:
+                    for f in pending:
+                        f.cancel()
+                    break
+            if rows:
+                db.execute(insert(Prediction), rows)
+                db.commit()  # per chunk: a rerun resumes after the last committed chunk
+                written += len(rows)
+            job.check_cancelled()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        close()
+    return {"source": str(src), "predictions_written": written, "model_version": MODEL_VERSION}
+
+
+# python -m app.utils.batch_infer [--source DIR_OR_ARCHIVE] [--workers 0] [--rescore]
+if __name__ == "__main__":
+    from ..database import SessionLocal
+
+    ap = argparse.ArgumentParser(description="Analyse stored pad images in bulk")
+    ap.add_argument("--source", default=None, help="directory or .zip/.tar(.gz); default IMAGE_DIR")
+    ap.add_argument("--workers", type=int, default=0, help="processes (0 = one per core)")
+    ap.add_argument("--chunk-size", type=int, default=200)
+    ap.add_argument("--rescore", action="store_true", help="re-analyse pads already scored for this model")
+    ap.add_argument("--tiled", action="store_true")
+    args = ap.parse_args()
+
+    job = Job("image_batch", vars(args))
+    job.started_at = time.monotonic()
+    with SessionLocal() as db:
+        result = run_batch_inference(db, args.source, workers=args.workers, chunk_size=args.chunk_size,
+                                     rescore=args.rescore, tiled=args.tiled, job=job)
+    job.finished_at = time.monotonic()
+    info = job.to_dict()
+    print(result)
+    print(info["progress"], info["throughput"], f"{info['elapsed_s']}s")
+    for err in info["errors"]:
+        print("error:", err)
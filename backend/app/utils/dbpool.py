@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .metrics import Histogram
+
+# ---------------------------------------------------------------------
+# Connection pool helpers for app/database.py
+#   - QueuePool / AsyncAdaptedQueuePool that time every checkout: the wait
+#     for a free connection (plus connect() when the pool grows), and
+#     timeouts, for /metrics
+#   - "idle" pre-ping: only ping connections that sat in the pool longer
+#     than a threshold, instead of one extra round trip per checkout
+# ---------------------------------------------------------------------
+CHECKOUT_WAIT_MS_BUCKETS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class _TimedCheckout:
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self._wait_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.checkout_wait_ms = Histogram(CHECKOUT_WAIT_MS_BUCKETS)
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        ms = (time.perf_counter() - t0) * 1000.0
+        with self._wait_lock:
+            self.checkouts += 1
+            self.checkout_wait_ms.observe(ms)
+        return conn
+
+    def stats(self) -> dict:
+        with self._wait_lock:
+            return {
+                "size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_out": self.checkedout(),
+                "overflow": max(0, self.overflow()),
+                "timeout_s": self._timeout,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "checkout_wait_ms": self.checkout_wait_ms.stats(),
+            }
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def install_idle_pre_ping(engine: Engine, idle_s: float) -> None:
+    """
+    Ping a connection at checkout only if it has been idle in the pool for
+    more than idle_s. A failed ping raises DisconnectionError, which makes
+    the pool discard it and hand out a fresh one. For an AsyncEngine pass
+    async_engine.sync_engine.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_conn, record):
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        last = record.info.get("checked_in_at")
+        if last is None or time.monotonic() - last <= idle_s:
+            return  # new connection, or used moments ago
+        cur = dbapi_conn.cursor()
+        try:
+            cur.execute("SELECT 1")
+        except Exception as e:
+            raise exc.DisconnectionError(f"idle connection failed pre-ping: {e}") from e
+        finally:
+            try:
+                cur.close()
+            except Exception:
+                pass
+
+
+def pool_stats(engines: dict) -> dict:
+    """name -> Engine (sync or sync_engine of an async one) -> pool stats, or a minimal view for other pools."""
+    out = {}
+    for name, eng in engines.items():
+        if eng is None:
+            continue
+        pool = eng.pool
+        out[name] = pool.stats() if isinstance(pool, _TimedCheckout) else {"pool": type(pool).__name__,
+                                                                          "status": pool.status()}
+    return out
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import multiprocessing
 import os
 import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable, Optional
 
@@ -30,6 +33,7 @@ DEFECT_TYPES = [
 ]
 
 # A tiny, safe font fallback (Pillow will default if not found)
+@lru_cache(maxsize=8)
 def _load_font(size: int = 14):
     try:
         return ImageFont.truetype("arial.ttf", size=size)
@@ -37,10 +41,11 @@ def _load_font(size: int = 14):
         return ImageFont.load_default()
 
 
-def _draw_defect(draw: ImageDraw.ImageDraw, defect: str, w: int, h: int) -> None:
+def _draw_defect(draw: ImageDraw.ImageDraw, defect: str, w: int, h: int, rng=random) -> None:
     """
     Draw a crude visual for a given defect on the pad area.
     This is *only* for demo visuals; replace with real CV later.
+    rng: random.Random for reproducible output (defaults to the module RNG).
     """
     # pad rectangle is centered; we roughly target that area
     pad_left, pad_top = int(w * 0.12), int(h * 0.18)
@@ -48,12 +53,12 @@ def _draw_defect(draw: ImageDraw.ImageDraw, defect: str, w: int, h: int) -> None
 
     if defect == "crack":
         # jagged polyline from left to right
-        y = random.randint(pad_top + 20, pad_bottom - 20)
+        y = rng.randint(pad_top + 20, pad_bottom - 20)
         x = pad_left
         prev = (x, y)
         for _ in range(10):
             x += (pad_right - pad_left) // 10
-            y += random.randint(-12, 12)
+            y += rng.randint(-12, 12)
             draw.line([prev, (x, y)], fill=(180, 30, 30), width=3)
             prev = (x, y)
 
@@ -69,17 +74,17 @@ def _draw_defect(draw: ImageDraw.ImageDraw, defect: str, w: int, h: int) -> None
     elif defect == "surface_pit":
         # a cluster of dots
         for _ in range(25):
-            x = random.randint(pad_left + 40, pad_right - 40)
-            y = random.randint(pad_top + 40, pad_bottom - 40)
-            r = random.randint(1, 3)
+            x = rng.randint(pad_left + 40, pad_right - 40)
+            y = rng.randint(pad_top + 40, pad_bottom - 40)
+            r = rng.randint(1, 3)
             draw.ellipse((x - r, y - r, x + r, y + r), fill=(120, 120, 120))
 
     elif defect == "glaze":
         # glossy streak
-        x1 = random.randint(pad_left + 40, pad_right - 100)
-        y1 = random.randint(pad_top + 20, pad_bottom - 60)
-        x2 = x1 + random.randint(60, 140)
-        y2 = y1 + random.randint(10, 30)
+        x1 = rng.randint(pad_left + 40, pad_right - 100)
+        y1 = rng.randint(pad_top + 20, pad_bottom - 60)
+        x2 = x1 + rng.randint(60, 140)
+        y2 = y1 + rng.randint(10, 30)
         draw.rounded_rectangle((x1, y1, x2, y2), radius=10, outline=(200, 200, 240), width=3)
 
     elif defect == "uneven_wear":
@@ -92,9 +97,9 @@ def _draw_defect(draw: ImageDraw.ImageDraw, defect: str, w: int, h: int) -> None
     elif defect == "contamination":
         # dark smudges
         for _ in range(6):
-            x = random.randint(pad_left + 30, pad_right - 30)
-            y = random.randint(pad_top + 30, pad_bottom - 30)
-            r = random.randint(12, 24)
+            x = rng.randint(pad_left + 30, pad_right - 30)
+            y = rng.randint(pad_top + 30, pad_bottom - 30)
+            r = rng.randint(12, 24)
             draw.ellipse((x - r, y - r, x + r, y + r), fill=(60, 60, 60))
 
 
@@ -104,12 +109,14 @@ def generate_pad_image(
     defects: Optional[list[str]] = None,
     stage_hint: Optional[str] = None,
     size: tuple[int, int] = (640, 360),
+    rng: Optional[random.Random] = None,
 ) -> None:
     """
     Create a synthetic pad image with light UI annotations.
     - pad_type: "TRANSIT" | "FREIGHT"
     - defects: list from DEFECT_TYPES
     - stage_hint: optional (e.g., 'Grinding')
+    - rng: drives defect placement (module RNG if omitted)
     """
     defects = defects or []
     w, h = size
@@ -128,7 +135,7 @@ def generate_pad_image(
 
     # Apply defects
     for d in defects:
-        _draw_defect(draw, d, w, h)
+        _draw_defect(draw, d, w, h, rng or random)
 
     # Header text
     font = _load_font(14)
@@ -140,12 +147,74 @@ def generate_pad_image(
     img.save(outfile, format="PNG")
 
 
+def _pick_defects(rng: random.Random) -> list[str]:
+    # 60% none/minor, 25% one, 10% two, 5% three defects
+    roll = rng.random()
+    if roll < 0.60:
+        return []
+    elif roll < 0.85:
+        return [rng.choice(DEFECT_TYPES)]
+    elif roll < 0.95:
+        return rng.sample(DEFECT_TYPES, 2)
+    else:
+        return rng.sample(DEFECT_TYPES, 3)
+
+
+def _pick_pad_type(info: Optional[dict], rng: random.Random) -> str:
+    if info and "pad_type" in info and info["pad_type"]:
+        # allow any casing
+        return str(info["pad_type"]).upper()
+    return "TRANSIT" if rng.random() < 0.5 else "FREIGHT"
+
+
+def render_image_task(task: tuple) -> dict:
+    """
+    Render image #i. Everything random about it comes from its own RNG seeded
+    with (base_seed, i), so the result doesn't depend on which process renders
+    it or in what order. Top-level so process pools can pickle it.
+    """
+    i, info, img_dir, base_seed = task
+    rng = random.Random(f"{base_seed}:{i}")
+    ptype = _pick_pad_type(info, rng)
+    stage = info.get("stage_name") if isinstance(info, dict) else None
+    defects = _pick_defects(rng)
+
+    # Prefer serial_number then id for filename
+    basis = str(info.get("serial_number") or info.get("id") or f"{i:05d}")
+    filename = f"pad_{basis}.png"
+    path = Path(img_dir) / filename
+
+    generate_pad_image(path, pad_type=ptype, defects=defects, stage_hint=stage, rng=rng)
+
+    return {
+        "filename": filename,
+        "path": str(path),
+        "url": f"/images/{filename}",
+        "pad_type": ptype,
+        "defects": defects,
+        "stage": stage,
+    }
+
+
+def resolve_base_seed(seed: Optional[int]) -> int:
+    return seed if seed is not None else random.SystemRandom().randrange(2**63)
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    if workers is None:
+        workers = int(os.getenv("IMAGE_WORKERS", "1"))
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
 def generate_image_set(
     count: int = 50,
     out_dir: Optional[str | Path] = None,
     *,
     seed: Optional[int] = None,
     pad_infos: Optional[Iterable[dict]] = None,
+    workers: Optional[int] = None,
 ) -> list[dict]:
     """
     Generate a batch of synthetic pad images.
@@ -153,64 +222,37 @@ def generate_image_set(
     Args:
       - count: number of images to generate *if* pad_infos is not provided.
       - out_dir: directory to write images (defaults to get_image_dir()).
-      - seed: for reproducibility.
+      - seed: for reproducibility; each image gets its own RNG derived from
+        (seed, index), so serial and parallel runs produce identical output.
       - pad_infos: optional iterable of dicts describing pads; if given, we use
         these to name files / choose pad_type, e.g.:
           {"id": 12, "serial_number": "TR-00012", "pad_type": "TRANSIT", "stage_name": "Grinding"}
+      - workers: processes to render with; 1 = in this thread, 0 = one per core,
+        None = IMAGE_WORKERS env (default 1).
 
-    Returns: list of dicts:
+    Returns: list of dicts (in input order):
       [{ "filename": "pad_00001.png", "path": "/abs/path/...png", "url": "/images/pad_00001.png",
          "pad_type": "TRANSIT", "defects": ["crack"], "stage": "Grinding" }, ...]
     """
-    rng = random.Random(seed)
-    out = []
-
     img_dir = Path(out_dir) if out_dir else get_image_dir()
     img_dir.mkdir(parents=True, exist_ok=True)
 
-    def pick_defects() -> list[str]:
-        # 60% none/minor, 25% one, 10% two, 5% three defects
-        roll = rng.random()
-        if roll < 0.60:
-            return []
-        elif roll < 0.85:
-            return [rng.choice(DEFECT_TYPES)]
-        elif roll < 0.95:
-            return rng.sample(DEFECT_TYPES, 2)
-        else:
-            return rng.sample(DEFECT_TYPES, 3)
-
-    def pick_pad_type(info: Optional[dict]) -> str:
-        if info and "pad_type" in info and info["pad_type"]:
-            # allow any casing
-            return str(info["pad_type"]).upper()
-        return "TRANSIT" if rng.random() < 0.5 else "FREIGHT"
+    # one base seed per call; unseeded runs still derive every image from it
+    base_seed = resolve_base_seed(seed)
 
     # Build the work list
     if pad_infos:
         work = list(pad_infos)
     else:
         work = [{"id": i + 1, "serial_number": f"PAD-{i+1:05d}"} for i in range(count)]
+    tasks = [(i, info, str(img_dir), base_seed) for i, info in enumerate(work, start=1)]
 
-    for i, info in enumerate(work, start=1):
-        ptype = pick_pad_type(info)
-        stage = info.get("stage_name") if isinstance(info, dict) else None
-        defects = pick_defects()
-
-        # Prefer serial_number then id for filename
-        basis = str(info.get("serial_number") or info.get("id") or f"{i:05d}")
-        filename = f"pad_{basis}.png"
-        path = img_dir / filename
-
-        generate_pad_image(path, pad_type=ptype, defects=defects, stage_hint=stage)
-
-        out.append({
-            "filename": filename,
-            "path": str(path),
-            "url": f"/images/{filename}",
-            "pad_type": ptype,
-            "defects": defects,
-            "stage": stage,
-        })
+    workers = min(resolve_workers(workers), len(tasks) or 1)
+    if workers <= 1:
+        return [render_image_task(t) for t in tasks]
 
-    return out
\ No newline at end of file
+    # spawn: the API process has DB/writer threads, which fork() doesn't mix well with
+    ctx = multiprocessing.get_context("spawn")
+    chunksize = max(1, len(tasks) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        return list(pool.map(render_image_task, tasks, chunksize=chunksize))
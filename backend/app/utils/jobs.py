@@ -0,0 +1,162 @@
+# backend/app/utils/jobs.py
+from __future__ import annotations
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+# ---------------------------------------------------------------------
+# Minimal in-process background jobs (one thread per job)
+#   - progress counters ("*_done" counters also get a "*_per_sec" rate)
+#   - cooperative cancellation: job functions poll job.cancelled
+#   - the last MAX_JOBS jobs are kept for GET /.../jobs/{id}; only
+#     finished jobs are dropped, so queued/running ones stay reachable
+#     (and cancellable) even when that briefly exceeds MAX_JOBS
+# State lives in this process only; with several API workers, poll the
+# worker that accepted the job (or run a single worker for long jobs).
+# ---------------------------------------------------------------------
+MAX_JOBS = 100
+MAX_ERRORS = 50
+
+
+class JobCancelled(Exception):
+    """Raise from a job function to stop early; the job ends as 'cancelled'."""
+
+
+class JobLimitReached(Exception):
+    """Raised by JobManager.submit when max_active jobs of that kind are already queued/running."""
+
+
+class Job:
+    def __init__(self, kind: str, params: dict):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"  # queued | running | done | failed | cancelled
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.progress: dict = {}
+        self.errors: list[str] = []
+        self.error_count = 0
+        self.error: Optional[str] = None
+        self.result: Optional[dict] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def update(self, **counters) -> None:
+        with self._lock:
+            self.progress.update(counters)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.progress[name] = self.progress.get(name, 0) + n
+
+    def add_error(self, msg: str) -> None:
+        with self._lock:
+            self.error_count += 1
+            if len(self.errors) < MAX_ERRORS:
+                self.errors.append(msg)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            progress = dict(self.progress)
+            errors = list(self.errors)
+        end = self.finished_at or time.monotonic()
+        elapsed = (end - self.started_at) if self.started_at else 0.0
+        rates = {
+            f"{k[:-5]}_per_sec": round(v / elapsed, 1)
+            for k, v in progress.items()
+            if k.endswith("_done") and isinstance(v, (int, float)) and elapsed > 0
+        }
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "created_at": self.created_at,
+            "elapsed_s": round(elapsed, 3),
+            "progress": progress,
+            "throughput": rates,
+            "error_count": self.error_count,
+            "errors": errors,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class JobManager:
+    def __init__(self, max_jobs: int = MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[[Job], Optional[dict]], params: dict,
+               max_active: Optional[int] = None) -> Job:
+        """
+        Run fn(job) on a daemon thread; its return value becomes job.result.
+        max_active: refuse (JobLimitReached) while that many jobs of this kind
+        are queued or running.
+        """
+        job = Job(kind, params)
+        with self._lock:
+            if max_active is not None:
+                active = sum(1 for j in self._jobs.values()
+                             if j.kind == kind and j.status in ("queued", "running"))
+                if active >= max_active:
+                    raise JobLimitReached(f"{active} {kind} job(s) already running (limit {max_active})")
+            self._jobs[job.id] = job
+            self._evict_finished()
+        threading.Thread(target=self._run, args=(job, fn), name=f"job-{kind}-{job.id[:8]}", daemon=True).start()
+        return job
+
+    def _evict_finished(self) -> None:
+        # Oldest first; caller holds self._lock.
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        finished = [jid for jid, j in self._jobs.items() if j.status in ("done", "failed", "cancelled")]
+        for jid in finished[:excess]:
+            del self._jobs[jid]
+
+    def _run(self, job: Job, fn: Callable[[Job], Optional[dict]]) -> None:
+        job.status = "running"
+        job.started_at = time.monotonic()
+        try:
+            job.result = fn(job)
+            job.status = "cancelled" if job.cancelled else "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{e!s}"
+            job.add_error(traceback.format_exc(limit=3))
+        finally:
+            job.finished_at = time.monotonic()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, kind: Optional[str] = None) -> list[Job]:
+        return [j for j in list(self._jobs.values()) if kind is None or j.kind == kind]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.status in ("queued", "running"):
+            job._cancel.set()
+        return job
+
+
+jobs = JobManager()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import resource
+import sys
+
+# ---------------------------------------------------------------------
+# Peak RSS of the current process, resettable where Linux allows it.
+# Writing "5" to /proc/self/clear_refs resets VmHWM (the high-water mark),
+# so reset_peak_rss() + peak_rss_mb() brackets one request in a worker
+# process. Elsewhere ru_maxrss is used, which is the lifetime peak.
+# Only processes that run one request at a time (analysis pool workers,
+# via mark_single_request_process) reset it: in the API process other
+# requests share the mark, and resetting it would also wipe the peak
+# that monitoring reads.
+# ---------------------------------------------------------------------
+_single_request = False
+
+
+def mark_single_request_process() -> None:
+    """Allow reset_peak_rss() in this process (a worker that runs one task at a time)."""
+    global _single_request
+    _single_request = True
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the RSS high-water mark; False if this process isn't a marked
+    worker or the platform can't (the peak is then process-lifetime).
+    """
+    if not _single_request:
+        return False
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)  # kB
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kB on Linux/BSD
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
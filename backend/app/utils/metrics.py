@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+# ---------------------------------------------------------------------
+# Small in-process metric types for the /metrics JSON
+# ---------------------------------------------------------------------
+
+
+class Histogram:
+    """Fixed upper-bound buckets (Prometheus-style cumulative counts in stats())."""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # last = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(self.bounds) and value > self.bounds[i]:
+            i += 1
+        self._counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def stats(self) -> dict:
+        buckets, running = {}, 0
+        for bound, n in zip([*self.bounds, "+Inf"], self._counts):
+            running += n
+            buckets[f"le_{bound}"] = running
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "buckets": buckets,
+        }
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from ..ml.model import predict_mix_batch
+from ..models import BrakePad, Prediction, PredictionKind
+from .metrics import Histogram
+from .prediction_log import PredictionQueueFull, get_prediction_writer
+
+log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------
+# Dynamic micro-batching for POST /predict/material_mix (opt-in)
+#   MIX_BATCHER=1               enable
+#   MIX_BATCH_WINDOW_MS         how long the first request of a batch waits for company
+#   MIX_BATCH_MAX               items per batch (a full batch goes without waiting)
+#   MIX_BATCH_MAX_PENDING       queued requests before submit() refuses (503)
+# Concurrent requests are collected on the event loop, then scored in one
+# predict_mix_batch() pass and their Prediction rows written in one
+# transaction (or handed to the write-behind log) on a worker thread.
+# While a batch is being processed the next one keeps filling, so batches
+# grow with load on their own.
+# ---------------------------------------------------------------------
+ENABLED = os.getenv("MIX_BATCHER", "").strip().lower() in ("1", "true", "yes", "on")
+WINDOW_MS = float(os.getenv("MIX_BATCH_WINDOW_MS", "5"))
+MAX_ITEMS = int(os.getenv("MIX_BATCH_MAX", "64"))
+MAX_PENDING = int(os.getenv("MIX_BATCH_MAX_PENDING", "4096"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+QUEUE_DELAY_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+_STOP = object()
+
+
+class MixBatcherBusy(Exception):
+    """Raised by MixBatcher.submit when max_pending requests are already queued."""
+
+
+class MixBatcher:
+    def __init__(
+        self,
+        engine: Engine,
+        window_ms: float = WINDOW_MS,
+        max_items: int = MAX_ITEMS,
+        max_pending: int = MAX_PENDING,
+    ):
+        self.engine = engine
+        self.window_s = max(0.0, window_ms / 1000.0)
+        self.max_items = max(1, max_items)
+        self.max_pending = max(1, max_pending)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._lock = threading.Lock()
+        # counters
+        self.submitted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.failed = 0
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_delay_ms = Histogram(QUEUE_DELAY_MS_BUCKETS)
+
+    # -- lifecycle (on the event loop) --------------------------------
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="mix-batcher")
+
+    async def stop(self) -> None:
+        """
+        Stop collecting and refuse new submits. The batch being collected is
+        still answered; requests queued behind it fail with MixBatcherBusy.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._queue.put_nowait(_STOP)
+        await self._task
+        self._task = None
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP and not item[3].done():
+                item[3].set_exception(MixBatcherBusy("mix batcher is shutting down"))
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    # -- producer side -----------------------------------------------
+    async def submit(self, row: dict, brakepad_id: Optional[str], explain: bool) -> dict:
+        """
+        predict_mix() result for one request, scored and logged with whatever
+        else arrives within the window. Raises ValueError (bad input / unknown
+        pad), PredictionQueueFull, or MixBatcherBusy (full or shutting down).
+        """
+        if self._stopping:
+            raise MixBatcherBusy("mix batcher is shutting down")
+        if self._queue.qsize() >= self.max_pending:
+            with self._lock:
+                self.rejected += 1
+            raise MixBatcherBusy(f"mix batcher is full ({self.max_pending} pending)")
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, brakepad_id, explain, fut, time.perf_counter()))
+        with self._lock:
+            self.submitted += 1
+        return await fut
+
+    # -- collector ---------------------------------------------------
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = loop.time() + self.window_s
+            while len(batch) < self.max_items:
+                timeout = deadline - loop.time()
+                try:
+                    item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(
+                        self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            now = time.perf_counter()
+            with self._lock:
+                self.batches += 1
+                self.batch_size.observe(len(batch))
+                for item in batch:
+                    self.queue_delay_ms.observe((now - item[4]) * 1000.0)
+            try:
+                outcomes = await loop.run_in_executor(None, self._process, batch)
+            except Exception as e:  # a bug in _process must not strand the callers
+                log.exception("mix batch of %d failed", len(batch))
+                outcomes = [e] * len(batch)
+            for item, outcome in zip(batch, outcomes):
+                fut = item[3]
+                if fut.done():  # caller went away
+                    continue
+                if isinstance(outcome, BaseException):
+                    fut.set_exception(outcome)
+                else:
+                    fut.set_result(outcome)
+
+    # -- worker thread -----------------------------------------------
+    def _process(self, batch: list[tuple]) -> list:
+        outcomes: list = [None] * len(batch)
+
+        # FK check for every referenced pad in one round trip
+        wanted = {item[1] for item in batch if item[1]}
+        known = set()
+        if wanted:
+            with self.engine.connect() as conn:
+                known = set(conn.execute(select(BrakePad.id).where(BrakePad.id.in_(wanted))).scalars())
+
+        groups: dict[bool, list[int]] = {True: [], False: []}
+        for i, (_, bp_id, explain, _, _) in enumerate(batch):
+            if bp_id and bp_id not in known:
+                outcomes[i] = ValueError(f"Unknown brakepad_id: {bp_id}")
+            else:
+                groups[bool(explain)].append(i)
+
+        rows = []
+        for explain, idx in groups.items():
+            if not idx:
+                continue
+            try:
+                scored = predict_mix_batch([batch[i][0] for i in idx], explain=explain)
+            except Exception as e:
+                for i in idx:
+                    outcomes[i] = ValueError(f"predict_mix failed: {e}")
+                continue
+            now = datetime.now(timezone.utc)
+            for i, result in zip(idx, scored):
+                outcomes[i] = result
+                rows.append((i, {
+                    "brakepad_id": batch[i][1] or None,
+                    "kind": PredictionKind.MIX,
+                    "model_version": result.get("model_version", "demo"),
+                    "label": result.get("label"),
+                    "score": result.get("score", 0.0),
+                    "explanation_json": result.get("explanation"),
+                    "created_at": now,
+                }))
+        if rows:
+            self._write(rows, outcomes)
+        with self._lock:
+            self.failed += sum(isinstance(o, BaseException) for o in outcomes)
+        return outcomes
+
+    def _write(self, rows: list[tuple[int, dict]], outcomes: list) -> None:
+        writer = get_prediction_writer()
+        if writer is not None:
+            for i, row in rows:
+                try:
+                    writer.submit(row)
+                except PredictionQueueFull as e:
+                    outcomes[i] = e
+            return
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(Prediction), [row for _, row in rows])
+        except IntegrityError:
+            # a pad was deleted after the FK check: isolate it, keep the rest
+            for i, row in rows:
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(insert(Prediction), [row])
+                except IntegrityError:
+                    outcomes[i] = ValueError("Invalid brakepad_id")
+
+    # -- metrics -----------------------------------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": True,
+                "window_ms": round(self.window_s * 1000.0, 3),
+                "max_items": self.max_items,
+                "queue_depth": self._queue.qsize() if self._queue else 0,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "failed": self.failed,
+                "batch_size": self.batch_size.stats(),
+                "queue_delay_ms": self.queue_delay_ms.stats(),
+            }
+
+
+# ---------------------------------------------------------------------
+# Process-wide instance (started/stopped from main.py lifespan)
+# ---------------------------------------------------------------------
+_batcher: Optional[MixBatcher] = None
+
+
+def get_mix_batcher() -> Optional[MixBatcher]:
+    """The running batcher, or None when disabled / not started."""
+    return _batcher if _batcher is not None and _batcher.running else None
+
+
+def start_mix_batcher(engine: Engine) -> Optional[MixBatcher]:
+    global _batcher
+    if not ENABLED:
+        return None
+    if _batcher is None:
+        _batcher = MixBatcher(engine)
+    _batcher.start()
+    return _batcher
+
+
+async def stop_mix_batcher() -> None:
+    global _batcher
+    if _batcher is not None:
+        await _batcher.stop()
+        _batcher = None
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from ..models import Prediction
+
+log = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------
+# Write-behind audit log for Prediction rows (opt-in)
+#   PREDICTION_WRITE_BEHIND=1       enable
+#   PREDICTION_QUEUE_MAX            bounded queue size (backpressure beyond this)
+#   PREDICTION_FLUSH_ROWS           flush when this many rows are pending ...
+#   PREDICTION_FLUSH_MS             ... or when the oldest pending row is this old
+#   PREDICTION_PUT_TIMEOUT_MS       how long a request waits for queue space before 503
+# FK validation of brakepad_id stays on the request path (routers/predict.py);
+# only the INSERT + COMMIT move to the background flusher.
+# ---------------------------------------------------------------------
+WRITE_BEHIND = os.getenv("PREDICTION_WRITE_BEHIND", "").strip().lower() in ("1", "true", "yes", "on")
+QUEUE_MAX = int(os.getenv("PREDICTION_QUEUE_MAX", "10000"))
+FLUSH_ROWS = int(os.getenv("PREDICTION_FLUSH_ROWS", "500"))
+FLUSH_MS = float(os.getenv("PREDICTION_FLUSH_MS", "200"))
+PUT_TIMEOUT_MS = float(os.getenv("PREDICTION_PUT_TIMEOUT_MS", "100"))
+
+# column order used for both COPY and executemany
+_COLUMNS = ["brakepad_id", "kind", "model_version", "label", "score", "explanation_json", "created_at", "input_hash"]
+
+
+class PredictionQueueFull(Exception):
+    """Raised by PredictionWriter.submit when the queue stays full past the put timeout."""
+
+
+class PredictionWriter:
+    """
+    Bounded in-process queue + one background thread that writes Prediction
+    rows in batches (COPY on PostgreSQL, multi-row INSERT elsewhere).
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        max_queue: int = QUEUE_MAX,
+        flush_rows: int = FLUSH_ROWS,
+        flush_ms: float = FLUSH_MS,
+        put_timeout_ms: float = PUT_TIMEOUT_MS,
+    ):
+        self.engine = engine
+        self.flush_rows = max(1, flush_rows)
+        self.flush_s = max(0.001, flush_ms / 1000.0)
+        self.put_timeout_s = max(0.0, put_timeout_ms / 1000.0)
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, max_queue))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)  # no submit() between its check and its put
+        self._closing = False
+        self._inflight = 0
+        self._use_copy = engine.dialect.name == "postgresql"
+        # counters
+        self.enqueued = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    # -- lifecycle ---------------------------------------------------
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        with self._lock:
+            self._closing = False
+        self._thread = threading.Thread(target=self._run, name="prediction-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop accepting work (submit raises) and flush everything still queued."""
+        with self._lock:
+            self._closing = True
+            self._idle.wait_for(lambda: self._inflight == 0, timeout)
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        # anything left (e.g. thread never started) is written inline
+        self._flush(self._drain(len_hint=self._q.qsize()))
+
+    # -- producer side -----------------------------------------------
+    def submit(self, row: dict) -> None:
+        """
+        Queue one Prediction row (column -> value). Blocks up to put_timeout, then
+        raises PredictionQueueFull; also raises once stop() has begun.
+        """
+        row = dict(row)
+        row.setdefault("created_at", datetime.now(timezone.utc))  # request time, not flush time
+        with self._lock:
+            if self._closing:
+                self.rejected += 1
+                raise PredictionQueueFull("prediction log is shutting down")
+            self._inflight += 1
+        queued = False
+        try:
+            self._q.put(row, timeout=self.put_timeout_s)
+            queued = True
+        except queue.Full:
+            pass
+        finally:
+            with self._lock:
+                self._inflight -= 1
+                if queued:
+                    self.enqueued += 1
+                else:
+                    self.rejected += 1
+                self._idle.notify_all()
+        if not queued:
+            raise PredictionQueueFull("prediction log queue is full")
+
+    # -- consumer side -----------------------------------------------
+    def _drain(self, len_hint: int) -> list[dict]:
+        rows = []
+        for _ in range(len_hint):
+            try:
+                rows.append(self._q.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self._q.empty():
+            try:
+                first = self._q.get(timeout=min(self.flush_s, 0.1))  # short: notice stop() promptly
+            except queue.Empty:
+                continue
+            rows = [first]
+            deadline = time.monotonic() + self.flush_s
+            # size or time trigger, whichever comes first
+            while len(rows) < self.flush_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    rows.extend(self._drain(self.flush_rows - len(rows)))
+                    break
+                try:
+                    rows.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(rows)
+
+    def _flush(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        t0 = time.perf_counter()
+        try:
+            if self._use_copy:
+                self._write_copy(rows)
+            else:
+                self._write_insert(rows)
+            ok = len(rows)
+        except Exception:
+            log.exception("prediction flush of %d rows failed; retrying as INSERT", len(rows))
+            try:
+                self._write_insert(rows)
+                ok = len(rows)
+            except Exception:
+                # one bad row (e.g. a pad deleted meanwhile) must not cost the batch
+                log.exception("INSERT retry of %d prediction rows failed; writing row by row", len(rows))
+                ok = self._write_rows(rows)
+        ms = (time.perf_counter() - t0) * 1000.0
+        with self._lock:
+            self.written += ok
+            self.failed += len(rows) - ok
+            self.flushes += 1
+            self.last_flush_ms = ms
+            self.max_flush_ms = max(self.max_flush_ms, ms)
+            self._total_flush_ms += ms
+
+    def _write_insert(self, rows: list[dict]) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(insert(Prediction), [{k: r.get(k) for k in _COLUMNS} for r in rows])
+
+    def _write_rows(self, rows: list[dict]) -> int:
+        """Insert row by row, each in its own transaction; returns how many made it."""
+        ok = 0
+        for r in rows:
+            try:
+                self._write_insert([r])
+                ok += 1
+            except Exception as e:
+                log.warning("dropping prediction row for pad %s: %s", r.get("brakepad_id"), e)
+        return ok
+
+    def _write_copy(self, rows: list[dict]) -> None:
+        cols = ", ".join(_COLUMNS)
+        raw = self.engine.raw_connection()
+        try:
+            cur = raw.cursor()
+            with cur.copy(f"COPY {Prediction.__tablename__} ({cols}) FROM STDIN") as cp:
+                for r in rows:
+                    kind = r.get("kind")
+                    expl = r.get("explanation_json")
+                    cp.write_row((
+                        r.get("brakepad_id"),
+                        getattr(kind, "name", kind),  # SAEnum stores member names
+                        r.get("model_version"),
+                        r.get("label"),
+                        r.get("score"),
+                        json.dumps(expl) if expl is not None else None,
+                        r.get("created_at"),
+                        r.get("input_hash"),
+                    ))
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    # -- metrics -----------------------------------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": True,
+                "queue_depth": self._q.qsize(),
+                "queue_max": self._q.maxsize,
+                "enqueued": self.enqueued,
+                "rejected": self.rejected,
+                "written": self.written,
+                "failed": self.failed,
+                "flushes": self.flushes,
+                "last_flush_ms": round(self.last_flush_ms, 3),
+                "max_flush_ms": round(self.max_flush_ms, 3),
+                "avg_flush_ms": round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+            }
+
+
+# ---------------------------------------------------------------------
+# Process-wide instance (started/stopped from main.py lifespan)
+# ---------------------------------------------------------------------
+_writer: Optional[PredictionWriter] = None
+
+
+def get_prediction_writer() -> Optional[PredictionWriter]:
+    """The running writer, or None when write-behind is disabled."""
+    return _writer
+
+
+def start_prediction_writer(engine: Engine) -> Optional[PredictionWriter]:
+    global _writer
+    if not WRITE_BEHIND:
+        return None
+    if _writer is None:
+        _writer = PredictionWriter(engine)
+    _writer.start()
+    return _writer
+
+
+def stop_prediction_writer() -> None:
+    global _writer
+    writer, _writer = _writer, None  # new requests write inline from here on
+    if writer is not None:
+        writer.stop()
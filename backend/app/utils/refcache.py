@@ -0,0 +1,96 @@
+# backend/app/utils/refcache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import AssemblyLine, ConveyorBelt, Stage
+
+# ---------------------------------------------------------------------
+# In-process cache of the small dimension tables (lines, belts, stages).
+#   - loaded at startup, swapped atomically as one immutable snapshot
+#   - invalidated by seed_factory / create_pads when they add rows
+#   - REFCACHE_TTL_S bounds staleness across workers/processes (0 = never)
+# ---------------------------------------------------------------------
+TTL_S = float(os.getenv("REFCACHE_TTL_S", "60"))
+
+
+class RefSnapshot:
+    """One consistent, read-only view of lines/belts/stages."""
+
+    def __init__(self, version: int, lines: list[dict], belts: list[dict], stages: list[dict]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.lines = {ln["id"]: ln for ln in lines}
+        self.belts = {b["id"]: b for b in belts}
+        self.stages = {s["id"]: s for s in stages}
+        # ordered like the old /stages query: sequence, id
+        self.stages_sorted = sorted(stages, key=lambda s: (s["sequence"], s["id"]))
+        payload = json.dumps([lines, belts, stages], sort_keys=True, separators=(",", ":"))
+        # content hash, so every worker with the same data hands out the same ETag
+        self.etag = '"ref-' + hashlib.sha1(payload.encode()).hexdigest()[:16] + '"'
+
+    def stage(self, stage_id: int) -> Optional[dict]:
+        return self.stages.get(stage_id)
+
+
+class RefCache:
+    def __init__(self, ttl_s: float = TTL_S):
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._snap: Optional[RefSnapshot] = None
+        self._version = 0
+        self.loads = 0
+
+    def load(self, db: Session) -> RefSnapshot:
+        """(Re)load from the database and publish a new snapshot."""
+        lines = [{"id": i, "name": n} for i, n in db.execute(
+            select(AssemblyLine.id, AssemblyLine.name).order_by(AssemblyLine.id)).all()]
+        belts = [{"id": i, "name": n, "line_id": l} for i, n, l in db.execute(
+            select(ConveyorBelt.id, ConveyorBelt.name, ConveyorBelt.line_id).order_by(ConveyorBelt.id)).all()]
+        stages = [{"id": i, "name": n, "sequence": s, "line_id": l} for i, n, s, l in db.execute(
+            select(Stage.id, Stage.name, Stage.sequence, Stage.line_id).order_by(Stage.id)).all()]
+        with self._lock:
+            self._version += 1
+            self._snap = RefSnapshot(self._version, lines, belts, stages)
+            self.loads += 1
+            return self._snap
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snap = None
+
+    def get(self, db: Session) -> RefSnapshot:
+        """Current snapshot; reloads when invalidated or older than the TTL."""
+        snap = self._snap
+        if snap is None or (self.ttl_s > 0 and time.monotonic() - snap.loaded_at > self.ttl_s):
+            snap = self.load(db)
+        return snap
+
+    async def aget(self, db) -> RefSnapshot:
+        """get() for async routes (AsyncSession or ThreadpoolSession); the reload runs via run_sync."""
+        snap = self._snap
+        if snap is None or (self.ttl_s > 0 and time.monotonic() - snap.loaded_at > self.ttl_s):
+            snap = await db.run_sync(self.load)
+        return snap
+
+    def stats(self) -> dict:
+        snap = self._snap
+        return {
+            "version": snap.version if snap else None,
+            "etag": snap.etag if snap else None,
+            "loads": self.loads,
+            "lines": len(snap.lines) if snap else 0,
+            "belts": len(snap.belts) if snap else 0,
+            "stages": len(snap.stages) if snap else 0,
+        }
+
+
+refcache = RefCache()
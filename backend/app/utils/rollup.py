@@ -0,0 +1,126 @@
+# backend/app/utils/rollup.py
+import argparse
+import os
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from ..models import BrakePad, PadStatusCount
+
+# ---------------------------------------------------------------------
+# Incremental pad_status_counts rollup (opt-in: STATS_ROLLUP=1, PostgreSQL)
+#   - statement-level AFTER triggers with transition tables, so a bulk
+#     INSERT of N pads does one grouped upsert, not N single-row ones
+#   - built from brake_pads when the triggers are missing or the rollup is
+#     empty, so it starts consistent; API workers that find it installed
+#     start without locking brake_pads. Force a rebuild with
+#     python -m app.utils.rollup --rebuild
+# ---------------------------------------------------------------------
+STATS_ROLLUP = os.getenv("STATS_ROLLUP", "").strip().lower() in ("1", "true", "yes", "on")
+
+_PADS = BrakePad.__tablename__
+_ROLLUP = PadStatusCount.__tablename__
+
+_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION {_ROLLUP}_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE {_ROLLUP} c SET count = c.count - o.n
+        FROM (SELECT line_id, stage_id, status, count(*) AS n
+              FROM old_rows GROUP BY line_id, stage_id, status) o
+        WHERE c.line_id = o.line_id AND c.stage_id = o.stage_id AND c.status = o.status;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {_ROLLUP} (line_id, stage_id, status, count)
+        SELECT line_id, stage_id, status, count(*)
+        FROM new_rows GROUP BY line_id, stage_id, status
+        ON CONFLICT (line_id, stage_id, status)
+        DO UPDATE SET count = {_ROLLUP}.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+_TRIGGERS = {
+    f"{_ROLLUP}_ins": "AFTER INSERT ON {t} REFERENCING NEW TABLE AS new_rows",
+    f"{_ROLLUP}_upd": "AFTER UPDATE ON {t} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    f"{_ROLLUP}_del": "AFTER DELETE ON {t} REFERENCING OLD TABLE AS old_rows",
+}
+
+_active = False
+
+
+def rollup_active() -> bool:
+    """True once install_stats_rollup() has set up triggers + a fresh rollup."""
+    return _active
+
+
+def _installed(conn) -> tuple[set, bool]:
+    """(rollup triggers present on brake_pads, rollup has rows or there are no pads)."""
+    names = set(conn.execute(
+        text("SELECT tgname FROM pg_trigger WHERE tgrelid = CAST(:t AS regclass)"), {"t": _PADS}
+    ).scalars()) & set(_TRIGGERS)
+    populated = conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {_ROLLUP}) OR NOT EXISTS (SELECT 1 FROM {_PADS})"
+    )).scalar()
+    return names, bool(populated)
+
+
+def install_stats_rollup(engine: Engine, rebuild: bool = False) -> bool:
+    """
+    Make sure the triggers exist and pad_status_counts is populated; the
+    rebuild (which blocks pad writes) only runs when one of them is missing,
+    or with rebuild=True. When STATS_ROLLUP is off (or not on PostgreSQL) the
+    triggers are dropped so pad writes don't pay for an unused rollup.
+    Returns whether the rollup is active.
+    """
+    global _active
+    if engine.dialect.name != "postgresql":
+        _active = False
+        return False
+
+    with engine.connect() as conn:
+        names, populated = _installed(conn)
+    if not STATS_ROLLUP:
+        if names:
+            with engine.begin() as conn:
+                for name in names:
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {name} ON {_PADS}"))
+        _active = False
+        return False
+    if not rebuild and names == set(_TRIGGERS) and populated:
+        _active = True
+        return True
+
+    with engine.begin() as conn:
+        # block pad writes while we swap triggers + rebuild, so no delta is lost
+        conn.execute(text(f"LOCK TABLE {_PADS} IN SHARE ROW EXCLUSIVE MODE"))
+        names, populated = _installed(conn)
+        if not rebuild and names == set(_TRIGGERS) and populated:
+            _active = True  # another worker finished it while we waited for the lock
+            return True
+        conn.execute(text(_FUNCTION_SQL))
+        for name, spec in _TRIGGERS.items():
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name} ON {_PADS}"))
+            conn.execute(text(
+                f"CREATE TRIGGER {name} {spec.format(t=_PADS)} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION {_ROLLUP}_sync()"
+            ))
+        conn.execute(text(f"DELETE FROM {_ROLLUP}"))
+        conn.execute(text(
+            f"INSERT INTO {_ROLLUP} (line_id, stage_id, status, count) "
+            f"SELECT line_id, stage_id, status, count(*) FROM {_PADS} "
+            f"GROUP BY line_id, stage_id, status"
+        ))
+    _active = True
+    return True
+
+
+# python -m app.utils.rollup [--rebuild]     (needs STATS_ROLLUP=1)
+if __name__ == "__main__":
+    from ..database import engine
+
+    ap = argparse.ArgumentParser(description="Install the pad_status_counts triggers and rollup")
+    ap.add_argument("--rebuild", action="store_true", help="recount from brake_pads even if already installed")
+    args = ap.parse_args()
+    print({"rollup_active": install_stats_rollup(engine, rebuild=args.rebuild)})
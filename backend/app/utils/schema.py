@@ -0,0 +1,122 @@
+# backend/app/utils/schema.py
+import argparse
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+from ..models import Base
+
+log = logging.getLogger(__name__)
+
+
+def ensure_schema(engine: Engine) -> None:
+    """
+    Create tables (if not using Alembic for migrations) and anything create_all
+    skips on tables that already exist:
+      - pg_trgm extension for the trigram search indexes (best effort: needs
+        the contrib package and CREATE privilege)
+      - nullable columns added to a model after its table was created
+    Fresh tables get their indexes from create_all. Indexes missing on existing
+    tables are only reported: a plain CREATE INDEX blocks writes for the whole
+    build, so they are added by  python -m app.utils.schema --create-indexes
+    (CREATE INDEX CONCURRENTLY on PostgreSQL), not by every API worker at boot.
+    """
+    _enable_pg_trgm(engine)
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    with engine.connect() as conn:
+        missing = [index.name for index in _missing_indexes(conn)]
+    if missing:
+        log.warning("missing indexes %s; run: python -m app.utils.schema --create-indexes", ", ".join(missing))
+
+
+def create_missing_indexes(engine: Engine) -> list[str]:
+    """
+    Build every declared index the database doesn't have yet, one at a time.
+    PostgreSQL: CREATE INDEX CONCURRENTLY in autocommit (writes keep going);
+    an INVALID index left by an interrupted build is dropped and rebuilt.
+    Returns the names built.
+    """
+    _enable_pg_trgm(engine)
+    pg = engine.dialect.name == "postgresql"
+    built = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if pg:
+            invalid = conn.execute(text(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+            )).scalars().all()
+            declared = {ix.name for t in Base.metadata.sorted_tables for ix in t.indexes}
+            for name in set(invalid) & declared:
+                log.info("dropping invalid index %s", name)
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        for index in _missing_indexes(conn):
+            ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+            if pg:
+                ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+            log.info("building index %s", index.name)
+            conn.execute(text(ddl))
+            built.append(index.name)
+    return built
+
+
+def _missing_indexes(conn) -> list:
+    """Declared indexes (that apply to this database, per ddl_if) absent from their existing tables."""
+    insp = inspect(conn)
+    out = []
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in insp.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            cond = index._ddl_if
+            if cond is not None and not cond._should_execute(CreateIndex(index), index, conn):
+                continue
+            out.append(index)
+    return out
+
+
+def _enable_pg_trgm(engine: Engine) -> None:
+    if engine.dialect.name != "postgresql":
+        return
+    try:
+        with engine.begin() as conn:
+            available = conn.execute(text(
+                "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+            )).first()
+            if available:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except Exception as e:
+        log.warning("pg_trgm not enabled, substring search stays unindexed: %s", e)
+
+
+def _add_missing_columns(engine: Engine) -> None:
+    # only nullable, default-less columns: ADD COLUMN is then a catalog-only change
+    insp = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in existing or not col.nullable or col.server_default is not None:
+                continue
+            ddl = (f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(col)} "
+                   f"{col.type.compile(dialect=engine.dialect)}")
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
+            log.info("added column %s.%s", table.name, col.name)
+
+
+# python -m app.utils.schema --create-indexes
+if __name__ == "__main__":
+    from ..database import engine
+
+    ap = argparse.ArgumentParser(description="Schema maintenance outside API startup")
+    ap.add_argument("--create-indexes", action="store_true",
+                    help="build missing indexes (CONCURRENTLY on PostgreSQL)")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    ensure_schema(engine)
+    if args.create_indexes:
+        print({"indexes_built": create_missing_indexes(engine)})
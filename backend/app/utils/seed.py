@@ -2,6 +2,7 @@
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from ..models import AssemblyLine, ConveyorBelt, Stage
+from .refcache import refcache
 
 def seed_factory(db: Session) -> dict:
     """
@@ -37,4 +38,5 @@ def seed_factory(db: Session) -> dict:
         created["stages"] += len(stages)
 
     db.commit()
+    refcache.invalidate()
     return {"status": "ok", **created}
\ No newline at end of file
@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import argparse
 import random
+import time
+import uuid
 from datetime import datetime, timezone
-from typing import List
+from typing import Iterator, List
+
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import BigInteger, cast, select, insert, func
 
 from ..models import (
-    AssemblyLine, ConveyorBelt, Stage, BrakePad, MaterialMix, PadStatus, PadType
+    AssemblyLine, ConveyorBelt, Stage, BrakePad, MaterialMix, PadStatus, PadType, pad_serial_seq
 )
+from .refcache import refcache
 
 def _random_mix_fields() -> dict:
     """
@@ -44,87 +50,238 @@ def _make_batch_code(line_id: int, belt_id: int, when: datetime, rng: random.Ran
     """Deterministic-ish but unique enough for demo data."""
     return f"BC-{line_id:02d}{belt_id:02d}-{when:%Y%m%d}-{rng.randint(1000,9999)}"
 
-def create_pads(
-    db: Session,
-    count: int,
-    lines: int = 2,  # for API compatibility; we use existing seeded lines
-    belts_per_line: int = 3,
-    create_mixes: bool = True, # <-- default ON
-) -> List[BrakePad]:
+MIX_PCT_FIELDS = ["resin_pct", "fiber_pct", "metal_powder_pct", "filler_pct", "abrasives_pct", "binder_pct"]
+MIX_FIELDS = MIX_PCT_FIELDS + ["temp_c", "pressure_mpa", "cure_time_s", "moisture_pct"]
+
+def _random_mix_matrix(n: int, gen: np.random.Generator) -> np.ndarray:
     """
-    Create 'count' synthetic BrakePad rows distributed across existing lines/belts/stages.
-    If a line has no belts/stages yet, minimal ones are created. Optionally creates a
-    MaterialMix per pad for ML features.
+    Vectorized _random_mix_fields() for n pads: same distributions and rounding,
+    returned as an (n, 10) array in MIX_FIELDS order.
+    """
+    parts = gen.uniform(0.5, 1.5, size=(n, 6))
+    pct = np.round(parts / parts.sum(axis=1, keepdims=True) * 100, 2)
+    # Adjust last one so total is ~100.00
+    pct[:, -1] = np.round(pct[:, -1] + (100.0 - pct.sum(axis=1)), 2)
+    return np.column_stack([
+        pct,
+        np.round(gen.uniform(80, 160, n), 1),          # mix temperature
+        np.round(gen.uniform(5, 20, n), 2),            # press force
+        np.floor(gen.uniform(900, 5400, n)),           # cure time (int seconds)
+        np.round(gen.uniform(0.0, 2.0, n), 2),
+    ])
 
-    Requires that /setup/seed has already created at least one AssemblyLine.
+def _ensure_dimensions(db: Session, belts_per_line: int):
+    """
+    Ensure belts/stages per line (idempotent-ish). Returns plain ids/names:
+      line_ids, {line_id: [belt_id]}, {line_id: [(stage_id, stage_name)]}
     """
-    line_rows = db.execute(select(AssemblyLine)).scalars().all()
-    if not line_rows:
+    line_ids = db.execute(select(AssemblyLine.id).order_by(AssemblyLine.id)).scalars().all()
+    if not line_ids:
         raise RuntimeError("No assembly lines found. Run /setup/seed first.")
 
-    # Ensure belts/stages per line (idempotent-ish)
     belts_by_line, stages_by_line = {}, {}
-    for ln in line_rows:
-        belts = db.execute(select(ConveyorBelt).where(ConveyorBelt.line_id == ln.id)).scalars().all()
+    added_dims = False
+    for line_id in line_ids:
+        belt_q = select(ConveyorBelt.id).where(ConveyorBelt.line_id == line_id).order_by(ConveyorBelt.id)
+        belts = db.execute(belt_q).scalars().all()
         if not belts:
             for b in range(1, belts_per_line + 1):
-                db.add(ConveyorBelt(name=f"Belt {b}", line_id=ln.id))
+                db.add(ConveyorBelt(name=f"Belt {b}", line_id=line_id))
             db.flush()
-            belts = db.execute(select(ConveyorBelt).where(ConveyorBelt.line_id == ln.id)).scalars().all()
+            added_dims = True
+            belts = db.execute(belt_q).scalars().all()
 
-        stages = db.execute(select(Stage).where(Stage.line_id == ln.id).order_by(Stage.sequence)).scalars().all()
+        stage_q = select(Stage.id, Stage.name).where(Stage.line_id == line_id).order_by(Stage.sequence)
+        stages = db.execute(stage_q).all()
         if not stages:
             for n, s in [("Mixing",1),("Molding",2),("Curing",3),("Grinding",4),("Painting",5),("Final QC",6)]:
-                db.add(Stage(name=n, sequence=s, line_id=ln.id))
+                db.add(Stage(name=n, sequence=s, line_id=line_id))
             db.flush()
-            stages = db.execute(select(Stage).where(Stage.line_id == ln.id).order_by(Stage.sequence)).scalars().all()
+            added_dims = True
+            stages = db.execute(stage_q).all()
 
-        belts_by_line[ln.id] = belts
-        stages_by_line[ln.id] = stages
+        belts_by_line[line_id] = list(belts)
+        stages_by_line[line_id] = [(sid, name) for sid, name in stages]
 
-    rng = random.Random()
-    pads_created: List[BrakePad] = []
+    if added_dims:
+        db.commit()
+        refcache.invalidate()
+    return line_ids, belts_by_line, stages_by_line
+
+_serial_seq_synced = False
+
+def _max_serial():
+    """Largest trailing number of any serial_number (TR-01-02-00042 -> 42), as a scalar subquery."""
+    s = BrakePad.serial_number
+    digits = func.substr(s, func.length(func.rtrim(s, "0123456789")) + 1)
+    return select(func.coalesce(func.max(cast(func.nullif(digits, ""), BigInteger)), 0)).scalar_subquery()
+
+def _allocate_serials(db: Session, n: int, after: int | None = None) -> list[int]:
+    """
+    Reserve n serial numbers in one round trip.
+    PostgreSQL: from brake_pad_serial_seq (safe across concurrent generators).
+    Elsewhere (dev/SQLite): continue after `after` (the last serial this
+    generator handed out), or after the highest serial in use when None;
+    that lookup scans brake_pads, so chunked callers pass `after`.
+    Going by the highest number, not the row count, keeps serials unique
+    after pads have been deleted.
+    """
+    global _serial_seq_synced
+    if db.bind.dialect.name != "postgresql":
+        if after is None:
+            after = db.execute(select(_max_serial())).scalar() or 0
+        return list(range(after + 1, after + 1 + n))
+
+    seq = pad_serial_seq.name
+    if not _serial_seq_synced:
+        # serials from before the sequence (or from other generators); never hand those out again
+        db.execute(select(func.setval(seq, func.greatest(_max_serial(), func.nextval(seq)))))
+        _serial_seq_synced = True
+    return list(db.execute(
+        select(func.nextval(seq)).select_from(func.generate_series(1, n))
+    ).scalars())
 
-    for i in range(count):
-        ln = rng.choice(line_rows)
-        belt = rng.choice(belts_by_line[ln.id])
-        stage = rng.choice(stages_by_line[ln.id])
+def _build_pad_rows(n, dims, serials, rng: random.Random, now: datetime) -> list[dict]:
+    line_ids, belts_by_line, stages_by_line = dims
+    rows = []
+    for i in range(n):
+        line_id = rng.choice(line_ids)
+        belt_id = rng.choice(belts_by_line[line_id])
+        stage_id, stage_name = rng.choice(stages_by_line[line_id])
 
         ptype_str = "TRANSIT" if rng.random() < 0.5 else "FREIGHT"
-        
-        status_str = "PASSED" if (r := rng.random()) < 0.65 else ("IN_PROGRESS" if r < 0.85 else "FAILED")
 
-        now = datetime.now(timezone.utc)
-        batch_code = _make_batch_code(ln.id, belt.id, now, rng)
+        status_str = "PASSED" if (r := rng.random()) < 0.65 else ("IN_PROGRESS" if r < 0.85 else "FAILED")
 
         serial_prefix = "TR" if ptype_str == "TRANSIT" else "FR"
-        serial_number = f"{serial_prefix}-{ln.id:02d}-{belt.id:02d}-{i+1:05d}"
-
-        pad = BrakePad(
-            serial_number=serial_number,
-            pad_type=_coerce_enum(ptype_str, PadType),
-            status=_coerce_enum(status_str, PadStatus),
-            line_id=ln.id,
-            belt_id=belt.id,
-            stage_id=stage.id,
-            created_at=now,
-            batch_code=batch_code
-        )
-        db.add(pad)
-        db.flush() # need pad.id for MaterialMix FK
+        rows.append({
+            "id": str(uuid.uuid4()),  # client-side, so no flush round trip per pad
+            "serial_number": f"{serial_prefix}-{line_id:02d}-{belt_id:02d}-{serials[i]:05d}",
+            "pad_type": ptype_str,
+            "status": status_str,
+            "batch_code": _make_batch_code(line_id, belt_id, now, rng),
+            "line_id": line_id,
+            "belt_id": belt_id,
+            "stage_id": stage_id,
+            "created_at": now,
+            "stage_name": stage_name,  # not a column; handy for image generation
+        })
+    return rows
+
+def create_pads(
+    db: Session,
+    count: int,
+    lines: int = 2,  # for API compatibility; we use existing seeded lines
+    belts_per_line: int = 3,
+    create_mixes: bool = True, # <-- default ON
+) -> List[BrakePad]:
+    """
+    Create 'count' synthetic BrakePad rows distributed across existing lines/belts/stages.
+    If a line has no belts/stages yet, minimal ones are created. Optionally creates a
+    MaterialMix per pad for ML features.
 
+    ORM objects are returned for small, interactive counts; use bulk_create_pads()
+    for load-test sized datasets.
+
+    Requires that /setup/seed has already created at least one AssemblyLine.
+    """
+    dims = _ensure_dimensions(db, belts_per_line)
+    rng = random.Random()
+    now = datetime.now(timezone.utc)
+    rows = _build_pad_rows(count, dims, _allocate_serials(db, count), rng, now)
+
+    pads_created: List[BrakePad] = []
+    for row in rows:
+        row.pop("stage_name")
+        pad = BrakePad(**{
+            **row,
+            "pad_type": _coerce_enum(row["pad_type"], PadType),
+            "status": _coerce_enum(row["status"], PadStatus),
+        })
+        db.add(pad)
         if create_mixes:
-            mix = _random_mix_fields()
             db.add(MaterialMix(
-                brakepad_id=pad.id,  # <-- matches your FK column
-                **mix
+                brakepad_id=pad.id,  # <-- id is generated client-side, no flush needed
+                **_random_mix_fields()
             ))
-
         pads_created.append(pad)
 
     db.commit()
     return pads_created
 
+_PAD_COLUMNS = ["id", "serial_number", "pad_type", "status", "batch_code", "line_id", "belt_id", "stage_id", "created_at"]
+
+def _write_chunk(db: Session, table, columns: list[str], rows: list[tuple]) -> None:
+    """COPY on PostgreSQL (inside the session's transaction), multi-row INSERT elsewhere."""
+    if db.bind.dialect.name == "postgresql":
+        cur = db.connection().connection.driver_connection.cursor()
+        with cur.copy(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN") as cp:
+            for r in rows:
+                cp.write_row(r)
+    else:
+        db.execute(insert(table), [dict(zip(columns, r)) for r in rows])
+
+def iter_bulk_pads(
+    db: Session,
+    count: int,
+    chunk_size: int = 5000,
+    belts_per_line: int = 3,
+    create_mixes: bool = True,
+    seed: int | None = None,
+) -> Iterator[list[dict]]:
+    """
+    Insert 'count' synthetic pads (and mixes) in committed chunks, yielding each
+    chunk's pad dicts (id, serial_number, pad_type, stage_name, ...) as it lands.
+    Memory is O(chunk_size) whatever the count; no ORM objects are built.
+    """
+    dims = _ensure_dimensions(db, belts_per_line)
+    rng = random.Random(seed)
+    gen = np.random.default_rng(seed)
+
+    done = 0
+    last_serial = None  # non-PG: look up the highest serial once, then count on locally
+    while done < count:
+        n = min(chunk_size, count - done)
+        serials = _allocate_serials(db, n, after=last_serial)
+        last_serial = serials[-1]
+        rows = _build_pad_rows(n, dims, serials, rng, datetime.now(timezone.utc))
+        _write_chunk(db, BrakePad.__table__, _PAD_COLUMNS, [tuple(r[c] for c in _PAD_COLUMNS) for r in rows])
+        if create_mixes:
+            mixes = _random_mix_matrix(n, gen).tolist()
+            _write_chunk(db, MaterialMix.__table__, ["brakepad_id"] + MIX_FIELDS,
+                         [(r["id"], *m) for r, m in zip(rows, mixes)])
+        db.commit()
+        done += n
+        yield rows
+
+def bulk_create_pads(db: Session, count: int, **kwargs) -> int:
+    """Run iter_bulk_pads() to completion; returns the number of pads created."""
+    created = 0
+    for rows in iter_bulk_pads(db, count, **kwargs):
+        created += len(rows)
+    return created
+
 # Wrapper function - Convenience alias - other parts of the app expect this name
 def generate_synthetic_pads(db: Session, count: int, lines: int = 2, belts_per_line: int = 3, create_mixes: bool = True):
-    return create_pads(db, count=count, lines=lines, belts_per_line=belts_per_line, create_mixes=create_mixes)
\ No newline at end of file
+    return create_pads(db, count=count, lines=lines, belts_per_line=belts_per_line, create_mixes=create_mixes)
+
+
+# python -m app.utils.synthetic --count 1000000   (load-test databases)
+if __name__ == "__main__":
+    from ..database import SessionLocal
+
+    ap = argparse.ArgumentParser(description="Bulk-generate synthetic brake pads")
+    ap.add_argument("--count", type=int, required=True)
+    ap.add_argument("--chunk-size", type=int, default=10000)
+    ap.add_argument("--no-mixes", action="store_true")
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    created = 0
+    with SessionLocal() as db:
+        for rows in iter_bulk_pads(db, args.count, chunk_size=args.chunk_size,
+                                   create_mixes=not args.no_mixes, seed=args.seed):
+            created += len(rows)
+            elapsed = time.perf_counter() - t0
+            print(f"{created:>10,} pads  {created / elapsed:>10,.0f} pads/s", flush=True)
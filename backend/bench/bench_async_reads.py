@@ -0,0 +1,140 @@
+"""
+Load test for the read routes moved to the async engine (/pads, /stats/lines,
+/stages, /predict/nominal): throughput and latency at rising concurrency,
+with the sync path (ASYNC_DB=0: sync Session in the threadpool) and the
+async path (ASYNC_DB=1: AsyncSession on psycopg async) side by side.
+
+    cd backend
+    python -m bench.bench_async_reads                         # starts uvicorn per mode on :8765
+    python -m bench.bench_async_reads --concurrency 16,64,256 --seconds 10
+    python -m bench.bench_async_reads --url http://localhost:8000   # an already running server
+
+While the load runs, a probe requests the sync /health route every 50 ms.
+Sync routes share the threadpool with the sync DB path, so its latency
+shows when DB waits are starving the threadpool.
+
+Uses DATABASE_URL (same default as app/database.py); load data first with
+/setup/seed + /setup/generate. Needs httpx (pip install httpx).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+ROUTES = [
+    ("/pads", {"page_size": 20}),
+    ("/pads", {"page_size": 20, "status": "FAILED", "sort_by": "serial_number", "sort_dir": "asc"}),
+    ("/pads", {"page_size": 20, "q": "TR-01", "q_mode": "prefix"}),
+    ("/stats/lines", {}),
+    ("/stages", {}),
+    ("/predict/nominal", {}),
+]
+
+
+async def _worker(client: httpx.AsyncClient, stop_at: float, lat: list, errors: list, rng: random.Random) -> None:
+    while time.perf_counter() < stop_at:
+        path, params = rng.choice(ROUTES)
+        t = time.perf_counter()
+        try:
+            r = await client.get(path, params=params)
+            ok = r.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            lat.append((time.perf_counter() - t) * 1000)
+        else:
+            errors.append(path)
+
+
+async def _probe(client: httpx.AsyncClient, stop_at: float, lat: list) -> None:
+    while time.perf_counter() < stop_at:
+        t = time.perf_counter()
+        try:
+            await client.get("/health")
+            lat.append((time.perf_counter() - t) * 1000)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.05)
+
+
+async def run_level(url: str, concurrency: int, seconds: float, seed: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        lat, errors, probe = [], [], []
+        stop_at = time.perf_counter() + seconds
+        rng = random.Random(seed)
+        tasks = [_worker(client, stop_at, lat, errors, random.Random(rng.random())) for _ in range(concurrency)]
+        t0 = time.perf_counter()
+        await asyncio.gather(_probe(client, stop_at, probe), *tasks)
+        elapsed = time.perf_counter() - t0
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if lat else (float("nan"),) * 3
+    return {
+        "concurrency": concurrency,
+        "rps": len(lat) / elapsed,
+        "p50": p50, "p95": p95, "p99": p99,
+        "errors": len(errors),
+        "probe_p95": float(np.percentile(probe, 95)) if probe else float("nan"),
+    }
+
+
+def _start_server(port: int, async_db: bool) -> subprocess.Popen:
+    env = dict(os.environ, ASYNC_DB="1" if async_db else "0")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("server did not come up")
+
+
+def _print(label: str, rows: list[dict]) -> None:
+    print(f"\n{label}")
+    print(f"{'conc':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'/health p95':>12}")
+    for r in rows:
+        print(f"{r['concurrency']:>6} {r['rps']:>9.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f} "
+              f"{r['errors']:>7} {r['probe_p95']:>12.1f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default=None, help="test this server only (no A/B)")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--concurrency", default="8,32,128,256")
+    ap.add_argument("--seconds", type=float, default=5.0, help="per concurrency level")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+    levels = [int(v) for v in args.concurrency.split(",")]
+
+    def sweep(url: str) -> list[dict]:
+        return [asyncio.run(run_level(url, n, args.seconds, args.seed)) for n in levels]
+
+    if args.url:
+        _print(args.url, sweep(args.url))
+        return
+    for async_db in (False, True):
+        proc = _start_server(args.port, async_db)
+        try:
+            rows = sweep(f"http://127.0.0.1:{args.port}")
+        finally:
+            proc.terminate()
+            proc.wait()
+        _print("ASYNC_DB=1 (AsyncSession)" if async_db else "ASYNC_DB=0 (sync Session in threadpool)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Accuracy and latency of the image defect detectors (app/ml/cv_defects.py)
+on a synthetic image set, where the drawn defects are the ground truth:
+
+    cd backend
+    python -m bench.bench_cv_defects --count 500 --seed 7
+    python -m bench.bench_cv_defects --budget-ms 50     # exit 1 if p95 is over budget
+    python -m bench.bench_cv_defects --count 20 --size 8000x2000 --tiled --budget-ms 5000
+
+Single process, so latencies are per image on one core (decode + detect).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from app.ml.cv_defects import DEFECTS, analyze_image
+from app.utils.images import DEFECT_TYPES, generate_image_set, generate_pad_image
+
+# renderer name -> detector label (uneven_wear has no detector label)
+TRUTH = {
+    "crack": "CRACK",
+    "chip": "CHIP",
+    "surface_pit": "SURFACE_POROSITY",
+    "glaze": "BURN_MARK",
+    "contamination": "INCLUSION",
+}
+
+
+def _render_large(count: int, out_dir: str, seed: int, size: tuple[int, int]) -> list[dict]:
+    # generate_image_set renders 640x360; large frames keep the same defect sizes in px
+    images = []
+    for i in range(count):
+        rng = random.Random(f"{seed}:{i}")
+        defects = rng.sample(DEFECT_TYPES, rng.randint(0, 3))
+        path = Path(out_dir) / f"large_{i:04d}.png"
+        generate_pad_image(path, pad_type=rng.choice(["TRANSIT", "FREIGHT"]), defects=defects, size=size, rng=rng)
+        images.append({"path": str(path), "defects": defects})
+    return images
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--count", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--budget-ms", type=float, default=50.0, help="p95 latency budget per image")
+    ap.add_argument("--size", default=None, help="render WxH frames instead of the standard 640x360 set")
+    ap.add_argument("--tiled", action="store_true", help="analyse in tiles at full resolution")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        if args.size:
+            w, h = (int(v) for v in args.size.lower().split("x"))
+            images = _render_large(args.count, tmp, args.seed, (w, h))
+        else:
+            images = generate_image_set(args.count, out_dir=tmp, seed=args.seed, workers=0)
+        print(f"rendered {len(images)} images in {time.perf_counter() - t0:.1f}s")
+
+        tp, fp, fn = Counter(), Counter(), Counter()
+        exact = 0
+        lat, rss = [], []
+        for img in images:
+            data = Path(img["path"]).read_bytes()
+            t = time.perf_counter()
+            result = analyze_image(data, None, tiled=args.tiled)
+            lat.append((time.perf_counter() - t) * 1000)
+            rss.append(result["peak_rss_mb"])
+
+            truth = {TRUTH[d] for d in img["defects"] if d in TRUTH}
+            found = set(result["defects"])
+            exact += truth == found
+            for d in DEFECTS:
+                tp[d] += d in truth and d in found
+                fp[d] += d in found and d not in truth
+                fn[d] += d in truth and d not in found
+
+    print(f"\n{'defect':<18} {'support':>8} {'precision':>10} {'recall':>8}")
+    for d in DEFECTS:
+        support = tp[d] + fn[d]
+        prec = tp[d] / (tp[d] + fp[d]) if tp[d] + fp[d] else float("nan")
+        rec = tp[d] / support if support else float("nan")
+        print(f"{d:<18} {support:>8} {prec:>10.3f} {rec:>8.3f}")
+    print(f"\nexact defect set match: {exact}/{len(images)} ({exact / len(images):.1%})")
+
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+    print(f"latency ms/image: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {max(lat):.1f}  "
+          f"(budget p95 <= {args.budget_ms:.0f})")
+    print(f"peak RSS MB/request: max {max(rss):.1f} ({result['peak_rss_scope']} scope)")
+    if p95 > args.budget_ms:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
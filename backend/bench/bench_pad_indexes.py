@@ -0,0 +1,192 @@
+"""
+Query plans for the /pads and /stats access paths, before and after the
+brake_pads / predictions indexes declared in app/models.py.
+
+Runs against PostgreSQL in a throwaway schema (default: qms_bench) so the
+app's own tables are untouched:
+
+    cd backend
+    python -m bench.bench_pad_indexes --pads 1000000
+    python -m bench.bench_pad_indexes --reuse --verbose   # skip the reload, print full plans
+
+Uses DATABASE_URL (same default as app/database.py).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.database import DB_URL
+from app.models import Base, BrakePad, Prediction
+
+# (name, SQL) — mirrors what _list_pads_impl / _line_stats_impl / predict emit
+QUERIES = [
+    ("page mode (created_at desc, id asc)",
+     "SELECT * FROM brake_pads ORDER BY created_at DESC, id ASC LIMIT 20"),
+    ("cursor mode (created_at, id desc)",
+     "SELECT * FROM brake_pads ORDER BY created_at DESC, id DESC LIMIT 20"),
+    ("deep OFFSET (100k rows)",
+     "SELECT * FROM brake_pads ORDER BY created_at DESC, id DESC OFFSET 100000 LIMIT 20"),
+    ("keyset page after cursor",
+     "SELECT * FROM brake_pads WHERE (created_at, id) < (now() - interval '45 days', '8') "
+     "ORDER BY created_at DESC, id DESC LIMIT 20"),
+    ("status filter + sort",
+     "SELECT * FROM brake_pads WHERE status = 'FAILED' ORDER BY created_at DESC, id DESC LIMIT 20"),
+    ("status filter count",
+     "SELECT count(id) FROM brake_pads WHERE status = 'FAILED'"),
+    ("belt filter + sort",
+     "SELECT * FROM brake_pads WHERE belt_id = 2 ORDER BY created_at DESC, id DESC LIMIT 20"),
+    ("stage filter + sort",
+     "SELECT * FROM brake_pads WHERE stage_id = 3 ORDER BY created_at DESC, id DESC LIMIT 20"),
+    ("batch_code sort",
+     "SELECT * FROM brake_pads ORDER BY batch_code ASC, id ASC LIMIT 20"),
+    ("typeahead prefix (serial)",
+     "SELECT id, serial_number, batch_code FROM brake_pads WHERE serial_number LIKE 'FR-02-05-00004%' "
+     "ORDER BY serial_number LIMIT 10"),
+    ("search prefix (serial or batch)",
+     "SELECT * FROM brake_pads WHERE serial_number LIKE 'FR-02-05-00004%' OR batch_code LIKE 'FR-02-05-00004%' "
+     "ORDER BY created_at DESC, id ASC LIMIT 20"),
+    ("search contains (trgm if installed)",
+     "SELECT * FROM brake_pads WHERE serial_number ILIKE '%0004217%' OR batch_code ILIKE '%0004217%' "
+     "ORDER BY created_at DESC, id ASC LIMIT 20"),
+    ("/stats GROUP BY line_id, status",
+     "SELECT line_id, status, count(*) FROM brake_pads GROUP BY line_id, status"),
+    ("latest prediction for a pad",
+     "SELECT * FROM predictions WHERE brakepad_id = (SELECT id FROM brake_pads LIMIT 1) "
+     "ORDER BY created_at DESC LIMIT 1"),
+]
+
+BENCH_INDEXES = [ix for t in (BrakePad.__table__, Prediction.__table__) for ix in t.indexes]
+
+
+def _vacuum_analyze(engine) -> None:
+    # VACUUM sets the visibility map, which index-only scans (e.g. /stats) rely on
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE"))
+
+
+def _load(conn, pads: int, predictions: int) -> None:
+    conn.execute(text("TRUNCATE predictions, material_mixes, brake_pads, stages, belts, assembly_lines CASCADE"))
+    conn.execute(text("INSERT INTO assembly_lines (id, name) VALUES (1, 'Transit Line A'), (2, 'Freight Line B')"))
+    conn.execute(text(
+        "INSERT INTO belts (id, name, line_id) "
+        "SELECT b, 'Belt ' || ((b - 1) % 3 + 1), (b - 1) / 3 + 1 FROM generate_series(1, 6) b"
+    ))
+    conn.execute(text(
+        "INSERT INTO stages (id, name, sequence, line_id) "
+        "SELECT s, 'Stage ' || ((s - 1) % 6 + 1), (s - 1) % 6 + 1, (s - 1) / 6 + 1 FROM generate_series(1, 12) s"
+    ))
+    # one set-based INSERT; belt/stage stay consistent with the line
+    conn.execute(text("""
+        INSERT INTO brake_pads (id, serial_number, pad_type, status, batch_code, line_id, belt_id, stage_id, created_at)
+        SELECT md5(g::text)::uuid::text,
+               CASE WHEN g % 2 = 0 THEN 'TR' ELSE 'FR' END || '-' || lpad(ln::text, 2, '0') || '-'
+                   || lpad(bt::text, 2, '0') || '-' || lpad(g::text, 7, '0'),
+               (CASE WHEN g % 2 = 0 THEN 'TRANSIT' ELSE 'FREIGHT' END)::pad_type,
+               (CASE WHEN r < 0.65 THEN 'PASSED' WHEN r < 0.85 THEN 'IN_PROGRESS' ELSE 'FAILED' END)::pad_status,
+               'BC-' || lpad(ln::text, 2, '0') || lpad(bt::text, 2, '0') || '-'
+                   || to_char(ts, 'YYYYMMDD') || '-' || (1000 + g % 9000),
+               ln, bt, st, ts
+        FROM (
+            SELECT g, random() AS r,
+                   1 + g % 2 AS ln,
+                   (g % 2) * 3 + 1 + (g / 2) % 3 AS bt,
+                   (g % 2) * 6 + 1 + (g / 7) % 6 AS st,
+                   now() - random() * interval '90 days' AS ts
+            FROM generate_series(1, :n) g
+        ) s
+    """), {"n": pads})
+    conn.execute(text("""
+        INSERT INTO predictions (brakepad_id, kind, model_version, label, score, created_at)
+        SELECT md5((1 + (random() * (:n - 1))::int)::text)::uuid::text, 'MIX'::prediction_kind,
+               'mix-baseline-0.1', CASE WHEN random() < 0.2 THEN 'FAIL' ELSE 'PASS' END, random(),
+               now() - random() * interval '90 days'
+        FROM generate_series(1, :m)
+    """), {"n": pads, "m": predictions})
+
+
+def _explain(conn, sql: str) -> tuple[float, list[str], str]:
+    plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]
+
+    nodes = []
+    def walk(n):
+        label = n["Node Type"]
+        if n.get("Index Name"):
+            label += f" using {n['Index Name']}"
+        nodes.append(label)
+        for child in n.get("Plans", []):
+            walk(child)
+    walk(root["Plan"])
+
+    text_plan = "\n".join(r[0] for r in conn.execute(text(f"EXPLAIN {sql}")).all())
+    return root["Execution Time"], nodes, text_plan
+
+
+def _run_queries(conn, verbose: bool) -> dict[str, tuple[float, list[str]]]:
+    out = {}
+    for name, sql in QUERIES:
+        _explain(conn, sql)  # warm cache
+        ms, nodes, plan = _explain(conn, sql)
+        out[name] = (ms, nodes)
+        if verbose:
+            print(f"--- {name}\n{plan}\n")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pads", type=int, default=1_000_000)
+    ap.add_argument("--predictions", type=int, default=200_000)
+    ap.add_argument("--schema", default="qms_bench")
+    ap.add_argument("--reuse", action="store_true", help="keep existing bench data")
+    ap.add_argument("--verbose", action="store_true", help="print full plans")
+    args = ap.parse_args()
+
+    if not DB_URL.startswith("postgresql"):
+        raise SystemExit("bench_pad_indexes needs PostgreSQL (set DATABASE_URL)")
+
+    admin = create_engine(DB_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{args.schema}"'))
+    engine = create_engine(DB_URL, connect_args={"options": f"-csearch_path={args.schema}"})
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        for ix in BENCH_INDEXES:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{ix.name}"'))
+        if not args.reuse:
+            t0 = time.perf_counter()
+            _load(conn, args.pads, args.predictions)
+            print(f"loaded {args.pads:,} pads + {args.predictions:,} predictions in {time.perf_counter() - t0:.1f}s")
+    _vacuum_analyze(engine)
+
+    with engine.connect() as conn:
+        print("\n== before (no secondary indexes)")
+        before = _run_queries(conn, args.verbose)
+
+    with engine.begin() as conn:
+        t0 = time.perf_counter()
+        for ix in BENCH_INDEXES:
+            ix.create(bind=conn)
+        print(f"\ncreated {len(BENCH_INDEXES)} indexes in {time.perf_counter() - t0:.1f}s")
+    _vacuum_analyze(engine)
+
+    with engine.connect() as conn:
+        print("\n== after")
+        after = _run_queries(conn, args.verbose)
+
+    print(f"\n{'query':<38} {'before ms':>10} {'after ms':>10}  plan after")
+    for name, _ in QUERIES:
+        b_ms, _b_nodes = before[name]
+        a_ms, a_nodes = after[name]
+        print(f"{name:<38} {b_ms:>10.2f} {a_ms:>10.2f}  {' > '.join(a_nodes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database, seeded with a few
+synthetic pads. From backend/:  pip install -r requirements-dev.txt && python -m pytest -q
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# before anything imports app.database: engines are built at import time
+_tmp = Path(tempfile.mkdtemp(prefix="qms-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp / 'qms.db'}"
+os.environ["IMAGE_DIR"] = str(_tmp / "images")
+os.environ["IMAGE_POOL"] = "0"
+for var in ("DATABASE_READ_URL", "MIX_BATCHER", "PREDICTION_WRITE_BEHIND"):
+    os.environ.pop(var, None)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+
+PADS = 24
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        assert c.post("/setup/seed").status_code == 200
+        assert c.post("/setup/generate", params={"count": PADS, "seed": 1}).status_code == 200
+        yield c
+
+
+@pytest.fixture
+def db(client):
+    with SessionLocal() as s:
+        yield s
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_tmp, ignore_errors=True)
@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.ml import model as ml_model
+from app.models import BackfillCheckpoint, MaterialMix
+from app.utils.backfill import checkpoint_name, run_mix_backfill
+from app.utils.jobs import Job, JobCancelled
+
+
+class _StopAfterFirstChunk(Job):
+    """Cancels itself once the first chunk is committed, like an interrupted run."""
+
+    def incr(self, name: str, n: int = 1) -> None:
+        super().incr(name, n)
+        if name == "pads_done":
+            self._cancel.set()
+
+
+@pytest.fixture
+def new_params(monkeypatch):
+    # a parameter change: new checkpoint, every stored input_hash is stale
+    monkeypatch.setitem(ml_model.WEIGHTS, "fiber_pct", ml_model.WEIGHTS["fiber_pct"] + 0.01)
+
+
+def _pads_with_mix(db) -> int:
+    return db.scalar(select(func.count(func.distinct(MaterialMix.brakepad_id))))
+
+
+def test_resume_after_interruption(client, db, new_params):
+    total = _pads_with_mix(db)
+    with pytest.raises(JobCancelled):
+        run_mix_backfill(db, chunk_size=5, max_rows_per_sec=0, job=_StopAfterFirstChunk("mix_backfill", {}))
+    cp = db.get(BackfillCheckpoint, checkpoint_name())
+    assert cp.rows_done == 5 and cp.last_key is not None and cp.completed_at is None
+
+    result = run_mix_backfill(db, chunk_size=5)
+    assert result["predictions_written"] == total - 5
+    assert result["total_for_model"] == total
+    db.refresh(cp)
+    assert cp.completed_at is not None
+
+
+def test_rerun_writes_only_new_pads(client, db, new_params):
+    run_mix_backfill(db, chunk_size=7)
+    assert run_mix_backfill(db, chunk_size=7)["predictions_written"] == 0
+
+    assert client.post("/setup/generate", params={"count": 3, "seed": 2}).status_code == 200
+    assert run_mix_backfill(db, chunk_size=7)["predictions_written"] == 3
+    assert run_mix_backfill(db, chunk_size=7)["predictions_written"] == 0
+
+
+def test_restart_rescores_everything(client, db, new_params):
+    run_mix_backfill(db, chunk_size=10)
+    result = run_mix_backfill(db, chunk_size=10, restart=True)
+    assert result["predictions_written"] == _pads_with_mix(db)
+
+
+def test_backfilled_rows_are_reused_by_predict_pad(client, db, new_params):
+    run_mix_backfill(db, chunk_size=10, restart=True)
+    pad_id = client.get("/pads", params={"page_size": 1}).json()["items"][0]["id"]
+    assert client.get("/predict/pad", params={"id": pad_id}).json()["reused"] is True
+
+
+def test_no_explain_rows_are_not_served_by_predict_pad(client, db, new_params):
+    result = run_mix_backfill(db, chunk_size=10, restart=True, explain=False)
+    assert result["predictions_written"] == _pads_with_mix(db)
+    assert run_mix_backfill(db, chunk_size=10, explain=False)["predictions_written"] == 0
+
+    pad_id = client.get("/pads", params={"page_size": 1}).json()["items"][0]["id"]
+    body = client.get("/predict/pad", params={"id": pad_id}).json()
+    assert body["reused"] is False and body["explanation"]
+    assert client.get("/predict/pad", params={"id": pad_id}).json()["reused"] is True
+
+
+def test_full_backfill_replaces_no_explain_rows(client, db, new_params):
+    run_mix_backfill(db, chunk_size=10, restart=True, explain=False)
+    assert run_mix_backfill(db, chunk_size=10)["predictions_written"] == _pads_with_mix(db)
+    assert run_mix_backfill(db, chunk_size=10, explain=False)["predictions_written"] == 0
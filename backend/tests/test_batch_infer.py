@@ -0,0 +1,78 @@
+import io
+import zipfile
+
+import pytest
+from PIL import Image
+from sqlalchemy import func, select
+
+from app.ml.cv_defects import MODEL_VERSION
+from app.models import BrakePad, Prediction, PredictionKind
+from app.utils.batch_infer import list_images, run_batch_inference
+from app.utils.jobs import Job
+
+
+def _png() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (48, 32), (140, 140, 140)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def image_dir(tmp_path, db):
+    scored = select(Prediction.brakepad_id).where(Prediction.kind == PredictionKind.IMAGE)
+    pads = db.execute(select(BrakePad.serial_number, BrakePad.id)
+                      .where(BrakePad.id.not_in(scored)).order_by(BrakePad.id).limit(4)).all()
+    (tmp_path / f"pad_{pads[0][0]}.png").write_bytes(_png())
+    (tmp_path / f"pad_{pads[1][0]}.png").write_bytes(_png())
+    (tmp_path / f"pad_{pads[2][1]}.png").write_bytes(_png())      # by id, not serial
+    (tmp_path / "pad_NO-SUCH-PAD.png").write_bytes(_png())
+    (tmp_path / f"pad_{pads[3][0]}.png").write_bytes(b"not a png")  # matched, undecodable
+    (tmp_path / "notes.txt").write_text("ignored")
+    return tmp_path
+
+
+def _image_rows(db, source: str) -> int:
+    return db.scalar(select(func.count()).select_from(Prediction).where(
+        Prediction.kind == PredictionKind.IMAGE,
+        Prediction.model_version == MODEL_VERSION,
+        Prediction.explanation_json["source"].as_string() == "batch",
+        Prediction.explanation_json["file"].as_string().like(f"{source}%")))
+
+
+def test_batch_scores_matched_images_and_resumes(db, image_dir):
+    assert len(list_images(image_dir)) == 5
+    job = Job("image_batch", {})
+    result = run_batch_inference(db, image_dir, workers=1, chunk_size=2, job=job)
+    assert result["predictions_written"] == 3
+    assert {k: job.progress[k] for k in ("images_done", "failed", "skipped_unmatched", "skipped_scored")} \
+        == {"images_done": 3, "failed": 1, "skipped_unmatched": 1, "skipped_scored": 0}
+    assert job.error_count == 1 and "pad_" in job.errors[0]
+
+    again = Job("image_batch", {})
+    assert run_batch_inference(db, image_dir, workers=1, job=again)["predictions_written"] == 0
+    assert again.progress["skipped_scored"] == 3  # the undecodable one is retried
+
+    rescored = run_batch_inference(db, image_dir, workers=1, rescore=True)
+    assert rescored["predictions_written"] == 3
+
+
+def test_batch_reads_zip_archives(db, image_dir, tmp_path_factory):
+    archive = tmp_path_factory.mktemp("archives") / "frames.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for p in image_dir.iterdir():
+            zf.write(p, f"line1/{p.name}")
+    job = Job("image_batch", {})
+    run_batch_inference(db, archive, workers=1, rescore=True, job=job)
+    assert job.progress["images_total"] == 5
+    assert job.progress["skipped_unmatched"] == 1
+    assert _image_rows(db, "line1/") == 3
+
+
+def test_missing_source_is_an_error(db, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        run_batch_inference(db, tmp_path / "missing", workers=1)
+
+
+def test_batch_endpoint_rejects_paths_outside_the_image_dir(client):
+    r = client.post("/predict/image/batch", params={"archive": "../outside.zip"})
+    assert r.status_code == 400
@@ -0,0 +1,41 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from app.ml import cv_defects
+from app.utils import memory
+
+
+def _png(w: int, h: int) -> bytes:
+    rng = np.random.default_rng(0)
+    buf = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (h, w, 3), dtype=np.uint8)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_banded_grayscale_matches_a_whole_frame_convert():
+    data = _png(300, 700)
+    gray, scale = cv_defects.decode_image(data, max_side=0)
+    expected = np.asarray(Image.open(io.BytesIO(data)).convert("L"))
+    assert scale == 1.0 and np.array_equal(gray, expected)
+
+
+def test_tiled_frames_may_be_as_large_as_downscaled_ones():
+    assert cv_defects.TILED_MAX_PIXELS >= cv_defects.MAX_PIXELS
+
+
+def test_api_process_reports_the_process_peak_without_resetting_it(monkeypatch):
+    monkeypatch.setattr(memory, "_single_request", False)
+    writes = []
+    monkeypatch.setattr(memory, "open", lambda *a, **k: writes.append(a) or open(*a, **k), raising=False)
+    result = cv_defects.analyze_image(_png(64, 64), None)
+    assert result["peak_rss_scope"] == "process"
+    assert not any("clear_refs" in str(a[0]) for a in writes)
+
+
+def test_pool_workers_report_a_per_request_peak(monkeypatch):
+    monkeypatch.setattr(memory, "_single_request", True)
+    can_reset = memory.reset_peak_rss()
+    result = cv_defects.analyze_image(_png(64, 64), None, tiled=True)
+    assert result["peak_rss_scope"] == ("request" if can_reset else "process")
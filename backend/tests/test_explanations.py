@@ -0,0 +1,38 @@
+import pytest
+
+from app.ml import model as ml_model
+
+from .test_mix_model import _mixes
+
+
+def _rescored_importance(row: dict) -> dict:
+    """The definition: re-score the row with each feature moved to its nominal midpoint."""
+    _, base, _ = ml_model.score_features(row)
+    out = {}
+    for k in ml_model.FEATURES:
+        lo, hi = ml_model.NOMINAL[k]
+        _, risk, _ = ml_model.score_features({**row, k: (lo + hi) / 2.0})
+        out[k] = max(0.0, base - risk)
+    return out
+
+
+def test_permutation_importance_matches_rescoring():
+    for row in _mixes(200, seed=10):
+        fast = ml_model.permutation_importance(row)
+        slow = _rescored_importance(row)
+        assert list(fast) == ml_model.FEATURES
+        assert fast == pytest.approx(slow, abs=1e-12)
+
+
+def test_importance_batch_matches_scalar_exactly():
+    rows = _mixes(200, seed=11)
+    _, risk, contribs = ml_model.score_batch(rows)
+    batch = ml_model.importance_batch(contribs, risk)
+    for i, row in enumerate(rows):
+        assert batch[i].tolist() == [ml_model.permutation_importance(row)[k] for k in ml_model.FEATURES]
+
+
+def test_explain_false_has_no_explanation():
+    row = _mixes(1, seed=12)[0]
+    assert ml_model.predict_mix(row, explain=False)["explanation"] is None
+    assert ml_model.predict_mix(row)["explanation"] == ml_model.permutation_importance(row)
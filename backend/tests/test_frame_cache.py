@@ -0,0 +1,66 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+from sqlalchemy import select
+
+from app.ml.frame_cache import FrameCache
+from app.models import BrakePad
+from app.routers import predict
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    c = FrameCache(max_entries=16, ttl_s=60, max_distance=4)
+    monkeypatch.setattr(predict, "frame_cache", c)
+    return c
+
+
+@pytest.fixture
+def pad_ids(db):
+    return db.scalars(select(BrakePad.id).limit(2)).all()
+
+
+def _frame(tweak: int = 0) -> bytes:
+    """A pad-like gradient; tweak nudges one pixel so the bytes differ but the dHash doesn't."""
+    arr = np.tile(np.linspace(40, 200, 96, dtype=np.uint8), (64, 1))
+    arr[0, 0] += tweak
+    buf = io.BytesIO()
+    Image.fromarray(arr).convert("RGB").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _upload(client, data: bytes, pad_id: str | None = None, tiled: bool = False) -> dict:
+    params = {"tiled": tiled}
+    if pad_id:
+        params["brakepad_id"] = pad_id
+    r = client.post("/predict/image/upload", content=data, params=params,
+                    headers={"content-type": "application/octet-stream"})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_identical_bytes_hit_without_a_pad(client, cache):
+    first = _upload(client, _frame())
+    again = _upload(client, _frame())
+    assert (first["cache_hit"], again["cache_hit"]) == (False, True)
+    assert again["defects"] == first["defects"]
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_near_duplicates_hit_only_within_one_pad(client, cache, pad_ids):
+    a, b = pad_ids
+    assert _upload(client, _frame(), a)["cache_hit"] is False
+    assert _upload(client, _frame(tweak=1), a)["cache_hit"] is True
+    assert _upload(client, _frame(tweak=2), b)["cache_hit"] is False
+    assert _upload(client, _frame(tweak=3))["cache_hit"] is False  # no pad: exact bytes only
+    stats = cache.stats()
+    assert (stats["near_hits"], stats["misses"]) == (1, 3)
+
+
+def test_tiled_results_are_cached_separately(client, cache, pad_ids):
+    assert _upload(client, _frame(), pad_ids[0])["cache_hit"] is False
+    assert _upload(client, _frame(), pad_ids[0], tiled=True)["cache_hit"] is False
+    assert _upload(client, _frame(tweak=1), pad_ids[0], tiled=True)["cache_hit"] is True
+    assert cache.stats()["size"] == 2
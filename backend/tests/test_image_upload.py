@@ -0,0 +1,61 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.routers import predict
+
+LIMIT = 4096
+
+
+@pytest.fixture
+def small_cap(monkeypatch):
+    monkeypatch.setattr(predict, "IMAGE_MAX_BYTES", LIMIT)
+
+
+def _png() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (32, 32), (120, 120, 120)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _chunks(data: bytes, size: int = 1024):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def test_octet_stream_upload_is_analysed(client, small_cap):
+    r = client.post("/predict/image/upload", content=_png(),
+                    headers={"content-type": "application/octet-stream"})
+    assert r.status_code == 200, r.text
+
+
+def test_octet_stream_over_the_cap_is_refused(client, small_cap):
+    r = client.post("/predict/image/upload", content=b"\0" * (LIMIT + 1),
+                    headers={"content-type": "application/octet-stream"})
+    assert r.status_code == 413
+
+
+def test_chunked_octet_stream_is_counted_while_streaming(client, small_cap):
+    r = client.post("/predict/image/upload", content=_chunks(b"\0" * (LIMIT * 3)),
+                    headers={"content-type": "application/octet-stream"})
+    assert r.status_code == 413
+
+
+def test_multipart_over_the_cap_is_refused(client, small_cap):
+    big = b"\0" * (LIMIT + predict._MULTIPART_OVERHEAD + 1)
+    r = client.post("/predict/image/upload", files={"file": ("pad.png", big, "image/png")})
+    assert r.status_code == 413
+
+
+def test_multipart_without_content_length_is_refused(client, small_cap):
+    body = (b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"pad.png\"\r\n"
+            b"Content-Type: image/png\r\n\r\n" + _png() + b"\r\n--b--\r\n")
+    r = client.post("/predict/image/upload", content=_chunks(body),
+                    headers={"content-type": "multipart/form-data; boundary=b"})
+    assert r.status_code == 411
+
+
+def test_multipart_upload_is_analysed(client, small_cap):
+    r = client.post("/predict/image/upload", files={"file": ("pad.png", _png(), "image/png")})
+    assert r.status_code == 200, r.text
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from app.routers import setup
+from app.utils.jobs import JobCancelled, JobLimitReached, JobManager
+
+
+def _wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.status in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+def _blocking(release: threading.Event):
+    def fn(job):
+        while not release.wait(0.01):
+            job.check_cancelled()
+        return {"ok": True}
+    return fn
+
+
+def test_max_active_refuses_until_a_job_finishes():
+    mgr, release = JobManager(), threading.Event()
+    first = mgr.submit("gen", _blocking(release), {}, max_active=1)
+    with pytest.raises(JobLimitReached):
+        mgr.submit("gen", _blocking(release), {}, max_active=1)
+    mgr.submit("other", lambda j: None, {}, max_active=1)  # limit is per kind
+
+    mgr.cancel(first.id)
+    assert _wait(first) == "cancelled"
+    second = mgr.submit("gen", _blocking(release), {}, max_active=1)
+    release.set()
+    assert _wait(second) == "done"
+
+
+def test_eviction_never_drops_active_jobs():
+    mgr, release = JobManager(max_jobs=2), threading.Event()
+    running = [mgr.submit("gen", _blocking(release), {}) for _ in range(3)]
+    assert all(mgr.get(j.id) is running[i] for i, j in enumerate(running))
+
+    release.set()
+    for j in running:
+        _wait(j)
+    late = mgr.submit("gen", lambda j: None, {})
+    ids = [j.id for j in mgr.list()]
+    assert len(ids) == 2 and ids[-1] == late.id and running[0].id not in ids
+
+
+def test_generate_endpoint_returns_409_at_the_limit(client, monkeypatch):
+    release = threading.Event()
+
+    def slow_job(job, **params):
+        while not release.wait(0.01):
+            if job.cancelled:
+                raise JobCancelled()
+
+    monkeypatch.setattr(setup, "_generate_job", slow_job)
+    monkeypatch.setattr(setup, "GENERATE_MAX_JOBS", 1)
+    first = client.post("/setup/generate", params={"count": 1, "background": True})
+    assert first.status_code == 200
+    try:
+        assert client.post("/setup/generate", params={"count": 1, "background": True}).status_code == 409
+        client.post(f"/setup/jobs/{first.json()['job_id']}/cancel")
+        assert _wait(setup.jobs.get(first.json()["job_id"])) == "cancelled"
+        again = client.post("/setup/generate", params={"count": 1, "background": True})
+        assert again.status_code == 200
+    finally:
+        release.set()
+    assert _wait(setup.jobs.get(again.json()["job_id"])) == "done"
@@ -0,0 +1,60 @@
+import numpy as np
+from sqlalchemy import func, select
+
+from app.models import Prediction
+
+PCT = ["resin_pct", "fiber_pct", "metal_powder_pct", "filler_pct", "abrasives_pct", "binder_pct"]
+
+
+def _payloads(n: int, seed: int = 0) -> list[dict]:
+    """Mixes that pass MixIn validation (percentages sum to 100), some far out of range."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        parts = rng.uniform(0.5, 1.5, 6)
+        pct = np.round(parts / parts.sum() * 100, 2)
+        pct[-1] = round(100.0 - pct[:-1].sum(), 2)
+        out.append({
+            **dict(zip(PCT, pct.tolist())),
+            "temp_c": float(rng.uniform(100, 230)),
+            "pressure_mpa": float(rng.uniform(20, 60)),
+            "cure_time_s": float(rng.uniform(600, 1800)),
+            "moisture_pct": float(rng.uniform(0.0, 1.5)),
+        })
+    return out
+
+
+def _predictions(db) -> int:
+    return db.scalar(select(func.count()).select_from(Prediction))
+
+
+def test_batch_matches_single_requests(client, db):
+    items = _payloads(12, seed=20)
+    pad_id = client.get("/pads", params={"page_size": 1}).json()["items"][0]["id"]
+    items[3]["brakepad_id"] = pad_id
+    before = _predictions(db)
+    body = client.post("/predict/material_mix/batch", json={"items": items}).json()
+    assert (body["total"], body["succeeded"], body["failed"]) == (12, 12, 0)
+    assert _predictions(db) == before + 12
+
+    for item, res in zip(items, body["results"]):
+        single = client.post("/predict/material_mix", json=item).json()
+        assert res["ok"] and res["result"] == single
+
+
+def test_bad_items_fail_alone(client, db):
+    items = _payloads(3, seed=21)
+    items[0] = {**items[0], "resin_pct": items[0]["resin_pct"] + 5}  # no longer sums to 100
+    items[2] = {**items[2], "brakepad_id": "no-such-pad"}
+    before = _predictions(db)
+    body = client.post("/predict/material_mix/batch", json={"items": items}).json()
+    assert [r["ok"] for r in body["results"]] == [False, True, False]
+    assert "no-such-pad" in body["results"][2]["error"]
+    assert _predictions(db) == before + 1
+
+
+def test_explain_false_and_empty_batch(client):
+    body = client.post("/predict/material_mix/batch", params={"explain": False},
+                       json={"items": _payloads(2, seed=22)}).json()
+    assert all(r["result"]["explanation"] is None for r in body["results"])
+    assert client.post("/predict/material_mix/batch", json={"items": []}).status_code == 422
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import engine
+from app.ml.model import predict_mix
+from app.models import BrakePad, Prediction
+from app.utils.mix_batcher import MixBatcher, MixBatcherBusy
+
+from .test_mix_model import _mixes
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_batched_results_match_unbatched(client, db):
+    pad_ids = db.scalars(select(BrakePad.id).limit(4)).all()
+    rows = _mixes(40, seed=5)
+    owners = [pad_ids[i % len(pad_ids)] if i % 3 else None for i in range(len(rows))]
+    explains = [i % 2 == 0 for i in range(len(rows))]
+    before = db.scalar(select(func.count()).select_from(Prediction))
+
+    async def go():
+        b = MixBatcher(engine, window_ms=20, max_items=16)
+        b.start()
+        try:
+            return await asyncio.gather(*(b.submit(r, o, e) for r, o, e in zip(rows, owners, explains))), b.stats()
+        finally:
+            await b.stop()
+
+    results, stats = _run(go())
+    assert results == [predict_mix(r, explain=e) for r, e in zip(rows, explains)]
+    assert stats["batches"] < len(rows)  # actually batched
+    assert db.scalar(select(func.count()).select_from(Prediction)) == before + len(rows)
+
+
+def test_unknown_pad_fails_only_its_request(client):
+    rows = _mixes(3, seed=6)
+
+    async def go():
+        b = MixBatcher(engine, window_ms=20)
+        b.start()
+        try:
+            return await asyncio.gather(b.submit(rows[0], None, False), b.submit(rows[1], "no-such-pad", False),
+                                        b.submit(rows[2], None, False), return_exceptions=True)
+        finally:
+            await b.stop()
+
+    ok1, bad, ok2 = _run(go())
+    assert isinstance(bad, ValueError)
+    assert ok1 == predict_mix(rows[0], explain=False) and ok2 == predict_mix(rows[2], explain=False)
+
+
+def test_stopped_batcher_refuses_work(client):
+    async def go():
+        b = MixBatcher(engine)
+        b.start()
+        await b.stop()
+        assert not b.running
+        with pytest.raises(MixBatcherBusy):
+            await b.submit(_mixes(1)[0], None, False)
+
+    _run(go())
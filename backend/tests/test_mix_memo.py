@@ -0,0 +1,54 @@
+import pytest
+
+from app.ml import model
+from .test_mix_model import _mixes
+
+
+@pytest.fixture
+def memo(monkeypatch):
+    m = model._MixMemo(max_size=8, decimals=6)
+    monkeypatch.setattr(model, "_mix_memo", m)
+    return m
+
+
+def test_repeat_calls_hit_and_return_independent_copies(memo):
+    row = _mixes(1, seed=3)[0]
+    first = model.predict_mix(row)
+    first["explanation"]["resin_pct"] = 99.0
+    again = model.predict_mix(row)
+    assert again == model._predict_mix_uncached(row)
+    assert (memo.stats()["hits"], memo.stats()["misses"]) == (1, 1)
+
+
+def test_explain_false_bypasses_the_memo(memo):
+    row = _mixes(1, seed=4)[0]
+    assert model.predict_mix(row, explain=False)["explanation"] is None
+    assert memo.stats()["size"] == 0
+
+
+@pytest.mark.parametrize("change", [
+    lambda mp: mp.setitem(model.NOMINAL, "temp_c", (150, 170)),
+    lambda mp: mp.setitem(model.WEIGHTS, "resin_pct", 3.0),
+    lambda mp: mp.setattr(model, "MIX_FAIL_THRESHOLD", 0.3),
+    lambda mp: mp.setattr(model, "MODEL_VERSION", "mix-baseline-test"),
+])
+def test_parameter_changes_empty_the_memo(memo, monkeypatch, change):
+    row = _mixes(1, seed=5)[0]
+    model.predict_mix(row)
+    before = model.mix_input_hash(row)
+    change(monkeypatch)
+    fresh = model.predict_mix(row)
+    assert fresh == model._predict_mix_uncached(row)
+    stats = memo.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"], stats["size"]) == (0, 2, 1, 1)
+    assert model.mix_input_hash(row) != before
+
+
+def test_lru_eviction_keeps_the_newest(memo):
+    rows = _mixes(10, seed=6)
+    for r in rows:
+        model.predict_mix(r)
+    assert memo.stats()["size"] == 8 and memo.stats()["evictions"] == 2
+    model.predict_mix(rows[-1])
+    model.predict_mix(rows[0])
+    assert memo.stats()["hits"] == 1
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.ml import model as ml_model
+
+
+def _mixes(n: int, seed: int = 0) -> list[dict]:
+    """Random mixes around the nominal ranges, a good share of them out of range."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        row = {}
+        for k in ml_model.FEATURES:
+            lo, hi = ml_model.NOMINAL[k]
+            span = hi - lo
+            row[k] = float(np.round(rng.uniform(lo - span, hi + span), 3))
+        rows.append(row)
+    return rows
+
+
+def test_score_batch_matches_score_features():
+    rows = _mixes(200)
+    labels, risk, contribs = ml_model.score_batch(rows)
+    for i, row in enumerate(rows):
+        label, r, c = ml_model.score_features(row)
+        assert labels[i] == label
+        assert risk[i] == r
+        assert contribs[i].tolist() == [c[k] for k in ml_model.FEATURES]
+
+
+def test_score_batch_accepts_a_matrix():
+    rows = _mixes(20, seed=1)
+    from_dicts = ml_model.score_batch(rows)
+    from_matrix = ml_model.score_batch(ml_model.mixes_to_matrix(rows))
+    for a, b in zip(from_dicts, from_matrix):
+        assert np.array_equal(a, b)
+
+
+def test_score_batch_rejects_wrong_width():
+    with pytest.raises(ValueError):
+        ml_model.score_batch(np.zeros((3, len(ml_model.FEATURES) - 1)))
+
+
+@pytest.mark.parametrize("explain", [True, False])
+def test_predict_mix_batch_matches_predict_mix(explain):
+    rows = _mixes(200, seed=2)
+    batch = ml_model.predict_mix_batch(rows, explain=explain)
+    assert batch == [ml_model.predict_mix(row, explain=explain) for row in rows]
+
+
+def test_stored_result_round_trips():
+    row = _mixes(1, seed=3)[0]
+    fresh = ml_model.predict_mix(row)
+    assert ml_model.stored_result(fresh["label"], fresh["score"], fresh["explanation"]) == fresh
@@ -0,0 +1,43 @@
+def _pads(client) -> list[dict]:
+    return client.get("/pads", params={"page_size": 100}).json()["items"]
+
+
+def _search(client, q: str, mode: str) -> set[str]:
+    body = client.get("/pads", params={"q": q, "q_mode": mode, "page_size": 100}).json()
+    return {p["id"] for p in body["items"]}
+
+
+def test_prefix_search_matches_serial_and_batch_prefixes(client):
+    pads = _pads(client)
+    serial = pads[0]["serial_number"]
+    prefix = serial[:5]  # e.g. "TR-01"
+    expected = {p["id"] for p in pads
+                if p["serial_number"].startswith(prefix) or (p["batch_code"] or "").startswith(prefix)}
+    assert _search(client, prefix, "prefix") == expected
+    assert _search(client, prefix.lower(), "prefix") == expected  # upper-cased before matching
+
+
+def test_prefix_search_treats_wildcards_literally(client):
+    serial = _pads(client)[0]["serial_number"]
+    assert _search(client, serial[:1] + "_", "prefix") == set()
+    assert _search(client, "%", "prefix") == set()
+
+
+def test_contains_search_finds_substrings(client):
+    pads = _pads(client)
+    needle = pads[0]["serial_number"][-5:]  # the numeric tail
+    expected = {p["id"] for p in pads
+                if needle in p["serial_number"] or needle in (p["batch_code"] or "")}
+    assert pads[0]["id"] in expected
+    assert _search(client, needle, "contains") == expected
+
+
+def test_suggest_returns_sorted_prefix_matches(client):
+    pads = _pads(client)
+    prefix = pads[0]["serial_number"][:3]
+    body = client.get("/pads/suggest", params={"q": prefix, "limit": 5}).json()
+    serials = [r["serial_number"] for r in body]
+    assert serials == sorted(p["serial_number"] for p in pads if p["serial_number"].startswith(prefix))[:5]
+    batch = pads[0]["batch_code"]
+    body = client.get("/pads/suggest", params={"q": batch, "field": "batch_code"}).json()
+    assert pads[0]["id"] in {r["id"] for r in body}
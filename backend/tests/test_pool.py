@@ -0,0 +1,66 @@
+import os
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.ml.pool import AnalysisPool, AnalysisPoolBusy
+from app.routers import predict
+
+
+@pytest.fixture
+def pool():
+    p = AnalysisPool(workers=1, max_pending=1)
+    yield p
+    p.stop()
+
+
+def test_submit_refuses_past_max_pending(pool):
+    fut = pool.submit(time.sleep, 0.3)
+    assert pool.in_flight == 1
+    with pytest.raises(AnalysisPoolBusy):
+        pool.submit(time.sleep, 0)
+    fut.result(timeout=60)
+    assert pool.in_flight == 0
+    assert pool.submit(abs, -2).result(timeout=60) == 2
+    stats = pool.stats()
+    assert (stats["submitted"], stats["rejected"], stats["completed"]) == (2, 1, 2)
+
+
+def test_a_dead_worker_fails_its_task_and_the_pool_restarts(pool):
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(os._exit, 1).result(timeout=60)
+    assert pool.submit(abs, -3).result(timeout=60) == 3
+    assert pool.stats()["restarts"] == 1
+    assert pool.stats()["failed"] == 1 and pool.in_flight == 0
+
+
+class _FakePool:
+    def __init__(self, exc: Exception | None = None, busy: bool = False):
+        self.exc, self.busy = exc, busy
+
+    def submit(self, fn, *args):
+        if self.busy:
+            raise AnalysisPoolBusy("full")
+        fut = Future()
+        fut.set_exception(self.exc)
+        return fut
+
+
+@pytest.mark.parametrize("fake", [_FakePool(busy=True), _FakePool(BrokenProcessPool("worker died"))])
+def test_pool_trouble_is_a_503_not_a_bad_image(client, monkeypatch, fake):
+    monkeypatch.setattr(predict, "get_analysis_pool", lambda: fake)
+    monkeypatch.setattr(predict, "frame_cache", None)
+    r = client.post("/predict/image/upload", content=b"not an image",
+                    headers={"content-type": "application/octet-stream"})
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+
+
+def test_analysis_errors_stay_400(client, monkeypatch):
+    monkeypatch.setattr(predict, "get_analysis_pool", lambda: _FakePool(ValueError("cannot decode")))
+    monkeypatch.setattr(predict, "frame_cache", None)
+    r = client.post("/predict/image/upload", content=b"not an image",
+                    headers={"content-type": "application/octet-stream"})
+    assert r.status_code == 400
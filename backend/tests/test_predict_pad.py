@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from app.models import Prediction, PredictionKind
+
+
+def _pad_id(client) -> str:
+    return client.get("/pads", params={"page_size": 1, "sort_by": "serial_number", "sort_dir": "asc"}).json()["items"][0]["id"]
+
+
+def _mix_rows(db, pad_id: str) -> int:
+    return db.scalar(select(func.count()).select_from(Prediction).where(
+        Prediction.brakepad_id == pad_id, Prediction.kind == PredictionKind.MIX))
+
+
+def test_repeat_call_reuses_stored_prediction(client, db):
+    pad_id = _pad_id(client)
+    first = client.get("/predict/pad", params={"id": pad_id, "force": True}).json()
+    before = _mix_rows(db, pad_id)
+
+    again = client.get("/predict/pad", params={"id": pad_id}).json()
+    assert first["reused"] is False
+    assert again["reused"] is True
+    for k in ("label", "score", "confidence", "explanation", "model_version"):
+        assert again[k] == first[k]
+    assert datetime.fromisoformat(again["predicted_at"]) == datetime.fromisoformat(first["predicted_at"])
+    assert _mix_rows(db, pad_id) == before  # nothing written
+
+
+def test_predicted_at_is_utc(client):
+    pad_id = _pad_id(client)
+    for force in (True, False):
+        body = client.get("/predict/pad", params={"id": pad_id, "force": force}).json()
+        assert datetime.fromisoformat(body["predicted_at"]).utcoffset().total_seconds() == 0
+
+
+def test_force_rescores_and_logs(client, db):
+    pad_id = _pad_id(client)
+    client.get("/predict/pad", params={"id": pad_id})
+    before = _mix_rows(db, pad_id)
+    body = client.get("/predict/pad", params={"id": pad_id, "force": True}).json()
+    assert body["reused"] is False
+    assert _mix_rows(db, pad_id) == before + 1
+
+
+def test_serial_number_lookup_and_unknown_pad(client):
+    pad = client.get("/pads", params={"page_size": 1}).json()["items"][0]
+    body = client.get("/predict/pad", params={"id": pad["serial_number"]}).json()
+    assert body["pad"]["id"] == pad["id"]
+    assert client.get("/predict/pad", params={"id": "no-such-pad"}).status_code == 404
+
+
+def test_stored_row_without_explanation_is_rescored(client, db):
+    pad_id = _pad_id(client)
+    first = client.get("/predict/pad", params={"id": pad_id, "force": True}).json()
+    latest = db.scalars(select(Prediction).where(
+        Prediction.brakepad_id == pad_id, Prediction.kind == PredictionKind.MIX,
+    ).order_by(Prediction.created_at.desc(), Prediction.id.desc()).limit(1)).one()
+    latest.explanation_json = None
+    db.commit()
+
+    body = client.get("/predict/pad", params={"id": pad_id}).json()
+    assert body["reused"] is False
+    assert body["explanation"] == first["explanation"]
+    assert client.get("/predict/pad", params={"id": pad_id}).json()["reused"] is True
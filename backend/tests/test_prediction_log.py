@@ -0,0 +1,85 @@
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import engine
+from app.models import Prediction, PredictionKind
+from app.utils import prediction_log
+from app.utils.prediction_log import PredictionQueueFull, PredictionWriter
+
+
+def _rows(n: int, tag: str, **extra) -> list[dict]:
+    return [dict(kind=PredictionKind.MIX, model_version=tag, label="PASS", score=0.1,
+                 created_at=datetime.now(timezone.utc), **extra) for _ in range(n)]
+
+
+def _stored(db, tag: str) -> int:
+    db.expire_all()
+    return db.scalar(select(func.count()).select_from(Prediction).where(Prediction.model_version == tag))
+
+
+def _wait_for(cond, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def tag():
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+def test_flushes_when_batch_is_full(client, db, tag):
+    w = PredictionWriter(engine, flush_rows=5, flush_ms=60_000)
+    w.start()
+    try:
+        for r in _rows(5, tag):
+            w.submit(r)
+        _wait_for(lambda: w.stats()["written"] == 5)
+        assert _stored(db, tag) == 5
+        assert w.stats()["flushes"] == 1
+    finally:
+        w.stop()
+
+
+def test_stop_drains_the_queue_and_refuses_more(client, db, tag):
+    w = PredictionWriter(engine, flush_rows=1000, flush_ms=60_000)
+    w.start()
+    for r in _rows(7, tag):
+        w.submit(r)
+    w.stop()
+    assert _stored(db, tag) == 7
+    with pytest.raises(PredictionQueueFull):
+        w.submit(_rows(1, tag)[0])
+    assert _stored(db, tag) == 7
+
+
+def test_full_queue_rejects(client, tag):
+    w = PredictionWriter(engine, max_queue=1, put_timeout_ms=0)  # not started: nothing drains
+    w.submit(_rows(1, tag)[0])
+    with pytest.raises(PredictionQueueFull):
+        w.submit(_rows(1, tag)[0])
+    assert (w.stats()["enqueued"], w.stats()["rejected"]) == (1, 1)
+    w.stop()
+
+
+def test_bad_row_does_not_cost_the_batch(client, db, tag):
+    rows = _rows(4, tag)
+    rows[1]["explanation_json"] = object()  # not JSON serialisable
+    w = PredictionWriter(engine)
+    w._flush(rows)
+    assert (w.written, w.failed) == (3, 1)
+    assert _stored(db, tag) == 3
+
+
+def test_stop_prediction_writer_clears_the_instance_first(client, monkeypatch):
+    monkeypatch.setattr(prediction_log, "WRITE_BEHIND", True)
+    w = prediction_log.start_prediction_writer(engine)
+    seen = []
+    monkeypatch.setattr(w, "stop", lambda: seen.append(prediction_log.get_prediction_writer()))
+    prediction_log.stop_prediction_writer()
+    assert seen == [None] and prediction_log.get_prediction_writer() is None
+    PredictionWriter.stop(w)
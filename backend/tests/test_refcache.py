@@ -0,0 +1,66 @@
+import time
+
+from sqlalchemy import delete
+
+from app.models import AssemblyLine, ConveyorBelt, Stage
+from app.utils.refcache import RefCache, refcache
+from app.utils.synthetic import _ensure_dimensions
+
+
+def test_snapshot_is_reused_until_invalidated(client, db):
+    cache = RefCache(ttl_s=0)
+    first = cache.get(db)
+    assert cache.get(db) is first and cache.loads == 1
+    cache.invalidate()
+    second = cache.get(db)
+    assert second is not first and second.version == first.version + 1
+    assert second.etag == first.etag  # same rows, same content hash
+
+
+def test_ttl_bounds_staleness(client, db):
+    cache = RefCache(ttl_s=0.01)
+    first = cache.get(db)
+    time.sleep(0.02)
+    assert cache.get(db) is not first
+
+
+def test_etag_follows_the_data(client, db):
+    cache = RefCache(ttl_s=0)
+    before = cache.get(db)
+    line_id = next(iter(before.lines))
+    belt = ConveyorBelt(name="Belt test", line_id=line_id)
+    db.add(belt)
+    db.commit()
+    try:
+        cache.invalidate()
+        after = cache.get(db)
+        assert after.etag != before.etag and belt.id in after.belts
+    finally:
+        db.execute(delete(ConveyorBelt).where(ConveyorBelt.id == belt.id))
+        db.commit()
+        refcache.invalidate()
+
+
+def test_stages_honours_if_none_match(client):
+    r = client.get("/stages")
+    etag = r.headers["ETag"]
+    again = client.get("/stages", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["ETag"] == etag
+
+
+def test_adding_dimensions_invalidates(client, db):
+    snap = refcache.get(db)
+    line = AssemblyLine(name="Line test")
+    db.add(line)
+    db.commit()
+    try:
+        _ensure_dimensions(db, belts_per_line=1)  # creates the new line's belt and stages
+        fresh = refcache.get(db)
+        assert fresh is not snap and line.id in fresh.lines
+        assert any(b["line_id"] == line.id for b in fresh.belts.values())
+    finally:
+        for model in (ConveyorBelt, Stage):
+            db.execute(delete(model).where(model.line_id == line.id))
+        db.execute(delete(AssemblyLine).where(AssemblyLine.id == line.id))
+        db.commit()
+        refcache.invalidate()
@@ -0,0 +1,26 @@
+from sqlalchemy import inspect, text
+
+from app.database import engine
+from app.utils.schema import create_missing_indexes, ensure_schema
+
+INDEX = "ix_brake_pads_status_created_at"
+
+
+def _has_index() -> bool:
+    return INDEX in {ix["name"] for ix in inspect(engine).get_indexes("brake_pads")}
+
+
+def test_startup_reports_but_does_not_build_missing_indexes(client, caplog):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX {INDEX}"))
+    ensure_schema(engine)
+    assert not _has_index()
+    assert INDEX in caplog.text
+
+    assert create_missing_indexes(engine) == [INDEX]
+    assert _has_index()
+    assert create_missing_indexes(engine) == []
+
+
+def test_postgres_only_indexes_are_not_missing_on_sqlite(client):
+    assert create_missing_indexes(engine) == []  # text_pattern_ops / trigram indexes are skipped via ddl_if
@@ -0,0 +1,37 @@
+from sqlalchemy import delete, select
+
+from app.models import BrakePad, MaterialMix, Prediction
+from app.utils import synthetic
+
+
+def _serial_numbers(db) -> list[int]:
+    return [int(s.rsplit("-", 1)[-1]) for s in db.scalars(select(BrakePad.serial_number))]
+
+
+def test_serials_stay_unique_after_deletions(client, db):
+    client.post("/setup/generate", params={"count": 4, "seed": 3})
+    newest = db.scalars(select(BrakePad.id).order_by(BrakePad.serial_number.desc()).limit(2)).all()
+    oldest = db.scalars(select(BrakePad.id).order_by(BrakePad.created_at).limit(3)).all()
+    doomed = set(oldest) - set(newest)
+    for model in (Prediction, MaterialMix):
+        db.execute(delete(model).where(model.brakepad_id.in_(doomed)))
+    db.execute(delete(BrakePad).where(BrakePad.id.in_(doomed)))
+    db.commit()
+    highest = max(_serial_numbers(db))
+
+    assert synthetic._allocate_serials(db, 3) == [highest + 1, highest + 2, highest + 3]
+    assert client.post("/setup/generate", params={"count": 5, "seed": 4}).status_code == 200
+    numbers = _serial_numbers(db)
+    assert len(numbers) == len(set(numbers))
+
+
+def test_chunked_generation_looks_up_the_highest_serial_once(client, db, monkeypatch):
+    calls = []
+    real = synthetic._max_serial
+    monkeypatch.setattr(synthetic, "_max_serial", lambda: calls.append(1) or real())
+    before = max(_serial_numbers(db))
+    chunks = list(synthetic.iter_bulk_pads(db, 7, chunk_size=2, seed=5))
+    assert [len(c) for c in chunks] == [2, 2, 2, 1]
+    assert len(calls) == 1
+    serials = [int(r["serial_number"].rsplit("-", 1)[-1]) for c in chunks for r in c]
+    assert serials == list(range(before + 1, before + 8))